@@ -1 +1,2 @@
 from .pandas_excel_gateway import PandasExcelGateway
+from .writers import CsvChunkWriter, ParquetChunkWriter, XlsxwriterChunkWriter, open_chunk_writer
@@ -0,0 +1,214 @@
+import os
+import tempfile
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from openpyxl.styles import Alignment, Border, Font, Side
+from pandas import DataFrame
+from pandas.io.parsers import TextParser
+
+# Rows per worksheet, header included
+EXCEL_MAX_ROWS = 1_048_576
+
+def partial_path(path: str) -> str:
+    """
+    New empty file next to ``path`` for a writer to fill: it is renamed to ``path`` once
+    complete, so a failed write never leaves a partial output behind.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, partial = tempfile.mkstemp(prefix=f".{name}.", suffix=".partial", dir=directory)
+    os.close(fd)
+    return partial
+
+
+# Same header look as DataFrame.to_excel
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(*(Side(style="thin"),) * 4)
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+def _convert_cell(cell):
+    """Cell conversion used by pandas' openpyxl reader, so chunks parse like ``pd.read_excel``."""
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        val = int(cell.value)
+        if val == cell.value:
+            return val
+        return float(cell.value)
+    return cell.value
+
+
+def _trim(row: list) -> list:
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def sheet_row_count(path: str, sheet: str) -> Optional[int]:
+    """
+    Data rows (without the header) declared in the sheet's dimension, None if the file has none.
+
+    Cheap: only the dimension record is read. Files written in streaming mode may omit it.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        max_row = workbook[sheet].max_row
+    finally:
+        workbook.close()
+    return max(0, max_row - 1) if max_row else None
+
+
+def iter_sheet_chunks(
+        path: str,
+        sheet: str,
+        chunk_rows: int,
+        usecols: Optional[Sequence[str]] = None,
+) -> Iterator[DataFrame]:
+    """
+    Read ``sheet`` with openpyxl read-only mode and yield DataFrames of at most ``chunk_rows`` rows.
+
+    The first row is the header. Blank rows inside the sheet are kept and trailing ones dropped,
+    like ``pd.read_excel``; the first chunk is always yielded so the header is known even for
+    sheets without data. Column types are inferred per chunk, with text columns fixed by the
+    first chunk. With ``usecols`` only the header columns of those names are parsed; which
+    rows the sheet has is still decided by all of its cells.
+    """
+    if chunk_rows <= 0:
+        raise ValueError(f"chunk_rows must be positive, got {chunk_rows}")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet]
+        worksheet.reset_dimensions()
+        rows = (_trim([_convert_cell(cell) for cell in row]) for row in worksheet.rows)
+
+        header = next(rows, [])
+        width = len(header)
+        keep = [i for i, name in enumerate(header) if name in usecols] if usecols is not None else None
+        if keep is not None:
+            header = [header[i] for i in keep]
+        columns: Optional[list] = None
+        text_columns: dict = {}
+        buffer: list[list] = []
+        pending_blank: list[list] = []
+
+        def parse(data: list[list]) -> DataFrame:
+            # A chunk cannot see the whole column, so the first chunk decides which columns are
+            # text: those stay object in later chunks instead of coercing numeric-looking cells
+            nonlocal columns
+            data = [(row + [""] * (width - len(row)))[:width] for row in data]
+            if keep is not None:
+                data = [[row[i] for i in keep] for row in data]
+            if columns is None:
+                frame = TextParser([header] + data, header=0, skip_blank_lines=False).read()
+                columns = list(frame.columns)
+                text_columns.update({name: object for name in columns if frame[name].dtype == object})
+                return frame
+            return TextParser(
+                data, header=None, names=columns, dtype=text_columns or None, skip_blank_lines=False,
+            ).read()
+
+        for row in rows:
+            if not row:
+                # Only blank rows followed by data are part of the sheet
+                pending_blank.append(row)
+                continue
+            buffer.extend(pending_blank)
+            pending_blank.clear()
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield parse(buffer[:chunk_rows])
+                buffer = buffer[chunk_rows:]
+
+        if buffer or columns is None:
+            yield parse(buffer)
+    finally:
+        workbook.close()
+
+
+class OpenpyxlChunkWriter:
+    """
+    Appends DataFrame chunks to a write-only (constant memory) openpyxl workbook.
+
+    The header is fixed by ``columns`` or, if omitted, by the first chunk; later chunks
+    are aligned to it. Use as a context manager: the file is saved on a clean exit and
+    nothing is written when the block raises.
+    """
+
+    def __init__(self, path: str, sheet: str, columns: Optional[Sequence] = None) -> None:
+        self._path = path
+        self._partial = partial_path(path)
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(title=sheet)
+        self._columns: Optional[list] = None
+        self._closed = False
+        self.rows_written = 0
+        if columns is not None:
+            self._write_header(list(columns))
+
+    def _write_header(self, columns: list) -> None:
+        cells = []
+        for name in columns:
+            cell = WriteOnlyCell(self._sheet, value=str(name))
+            cell.font = _HEADER_FONT
+            cell.border = _HEADER_BORDER
+            cell.alignment = _HEADER_ALIGNMENT
+            cells.append(cell)
+        self._sheet.append(cells)
+        self._columns = columns
+
+    def append(self, df: DataFrame) -> None:
+        if self._columns is None:
+            self._write_header(list(df.columns))
+        elif list(df.columns) != self._columns:
+            extra = [c for c in df.columns if c not in self._columns]
+            if extra:
+                raise ValueError(f"Chunk has columns missing from the output header: {extra}")
+            df = df.reindex(columns=self._columns)
+        if 1 + self.rows_written + len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Output exceeds the Excel limit of {EXCEL_MAX_ROWS} rows per sheet")
+
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            self._sheet.append(row)
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._columns is None:
+            self._write_header([])
+        try:
+            self._workbook.save(self._partial)
+        except BaseException:
+            os.unlink(self._partial)
+            raise
+        os.replace(self._partial, self._path)
+
+    def __enter__(self) -> "OpenpyxlChunkWriter":
+        return self
+
+    def discard(self) -> None:
+        """Drop the rows written so far without creating the output file."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # Saving is the only public way to release the sheet's temporary row stream
+            self._workbook.save(self._partial)
+        finally:
+            os.unlink(self._partial)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
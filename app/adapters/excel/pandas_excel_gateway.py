@@ -1,13 +1,52 @@
+import sys
+from typing import Iterator, Optional, Sequence
+
 import pandas as pd
 from pandas import DataFrame
-from app.gateways.excel import ExcelGateway
+from app.adapters.excel.openpyxl_stream import iter_sheet_chunks, sheet_row_count
+from app.adapters.excel.writers import open_chunk_writer
+from app.core.enums import OutputFormats
+from app.gateways.excel import ExcelChunkWriter, ExcelGateway
 
 
 class PandasExcelGateway(ExcelGateway):
+    """
+    Reads workbooks with pandas/openpyxl and writes the output in ``output_format``
+    (see ``OutputFormats``): openpyxl or xlsxwriter workbooks, CSV or Parquet.
+    """
+
+    def __init__(self, output_format: str = OutputFormats.XLSX.value) -> None:
+        self._output_format = OutputFormats(output_format)
+
+    @property
+    def output_suffix(self) -> str:
+        """File suffix of the outputs ``write`` and ``open_writer`` produce."""
+        return self._output_format.suffix
+
     def read(self, path: str, sheet: str) -> DataFrame:
         """Reads an Excel file and returns its content as a DataFrame."""
         return pd.read_excel(path, sheet_name=sheet)
 
     def write(self, df: DataFrame, path: str, sheet: str) -> None:
-        """Writes a DataFrame to an Excel file."""
-        df.to_excel(path, index=False)
+        """Writes a DataFrame to a file in the output format; ``sheet`` names the Excel sheet."""
+        if self._output_format is OutputFormats.XLSX:
+            df.to_excel(path, sheet_name=sheet, index=False)
+            return
+        with open_chunk_writer(self._output_format, path, sheet, columns=df.columns) as writer:
+            writer.append(df)
+
+    def read_columns(self, path: str, sheet: str, columns: Sequence[str]) -> DataFrame:
+        """Reads only ``columns`` of a sheet (those it has), parsed as ``read`` would parse them."""
+        return next(iter_sheet_chunks(path, sheet, sys.maxsize, usecols=columns))
+
+    def iter_read(self, path: str, sheet: str, chunk_rows: int) -> Iterator[DataFrame]:
+        """Reads an Excel sheet lazily in DataFrame chunks of at most ``chunk_rows`` rows."""
+        return iter_sheet_chunks(path, sheet, chunk_rows)
+
+    def count_rows(self, path: str, sheet: str) -> Optional[int]:
+        """Returns the number of data rows the sheet declares, if known, without reading it."""
+        return sheet_row_count(path, sheet)
+
+    def open_writer(self, path: str, sheet: str, columns: Optional[Sequence] = None) -> ExcelChunkWriter:
+        """Opens a constant-memory writer that appends DataFrame chunks to a new file in the output format."""
+        return open_chunk_writer(self._output_format, path, sheet, columns=columns)
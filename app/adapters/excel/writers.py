@@ -0,0 +1,273 @@
+import os
+from typing import Optional, Sequence
+
+import pandas as pd
+from pandas import DataFrame
+
+from app.adapters.excel.openpyxl_stream import EXCEL_MAX_ROWS, OpenpyxlChunkWriter, partial_path
+from app.core.enums import CustomExcelColumns, ExcelColumns, OutputFormats
+
+# Columns the pipeline knows to hold text, whatever their values look like in one chunk
+_TEXT_COLUMNS = frozenset(column.value for column in (*ExcelColumns, *CustomExcelColumns))
+
+
+def _align(df: DataFrame, columns: list) -> DataFrame:
+    """Reorder ``df`` to the output header, failing on columns the header does not have."""
+    if list(df.columns) == columns:
+        return df
+    extra = [c for c in df.columns if c not in columns]
+    if extra:
+        raise ValueError(f"Chunk has columns missing from the output header: {extra}")
+    return df.reindex(columns=columns)
+
+
+def _to_text(value) -> str:
+    # Integral floats are integers whose chunk also had missing values
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _missing_dependency(module: str, output_format: OutputFormats) -> ImportError:
+    return ImportError(f"The {output_format.value!r} output format needs the {module!r} package: pip install {module}")
+
+
+class XlsxwriterChunkWriter:
+    """
+    Appends DataFrame chunks to an xlsxwriter workbook in constant-memory mode.
+
+    Every row goes straight to a temporary file, so memory stays flat however large the
+    output is. Cells are written like ``DataFrame.to_excel``: blank for missing values,
+    text is never turned into formulas or links, and the header is bold and bordered.
+    """
+
+    def __init__(self, path: str, sheet: str, columns: Optional[Sequence] = None) -> None:
+        try:
+            import xlsxwriter
+        except ImportError as exc:
+            raise _missing_dependency("xlsxwriter", OutputFormats.XLSXWRITER) from exc
+        self._path = path
+        self._partial = partial_path(path)
+        self._workbook = xlsxwriter.Workbook(self._partial, {
+            "constant_memory": True,
+            "strings_to_numbers": False,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+        self._sheet = self._workbook.add_worksheet(sheet)
+        self._header_format = self._workbook.add_format(
+            {"bold": True, "border": 1, "align": "center", "valign": "top"},
+        )
+        self._columns: Optional[list] = None
+        self._closed = False
+        self.rows_written = 0
+        if columns is not None:
+            self._write_header(list(columns))
+
+    def _write_header(self, columns: list) -> None:
+        self._sheet.write_row(0, 0, [str(name) for name in columns], self._header_format)
+        self._columns = columns
+
+    def append(self, df: DataFrame) -> None:
+        if self._columns is None:
+            self._write_header(list(df.columns))
+        df = _align(df, self._columns)
+        first = self.rows_written + 1
+        if first + len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Output exceeds the Excel limit of {EXCEL_MAX_ROWS} rows per sheet")
+
+        values = df.astype(object).where(df.notna(), None)
+        write_row = self._sheet.write_row
+        for offset, row in enumerate(values.itertuples(index=False, name=None)):
+            write_row(first + offset, 0, row)
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._columns is None:
+            self._write_header([])
+        try:
+            self._workbook.close()
+        except BaseException:
+            os.unlink(self._partial)
+            raise
+        os.replace(self._partial, self._path)
+
+    def discard(self) -> None:
+        """Drop the rows written so far without creating the output file."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # Closing is the only public way to release the constant-memory row files
+            self._workbook.close()
+        finally:
+            os.unlink(self._partial)
+
+    def __enter__(self) -> "XlsxwriterChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class CsvChunkWriter:
+    """
+    Appends DataFrame chunks to a UTF-8 CSV file with one header row.
+
+    The file is removed again when the ``with`` block raises.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence] = None) -> None:
+        self._path = path
+        self._fh = open(path, "w", encoding="utf-8", newline="")
+        self._columns: Optional[list] = None
+        self._closed = False
+        self.rows_written = 0
+        if columns is not None:
+            self._write_header(list(columns))
+
+    def _write_header(self, columns: list) -> None:
+        DataFrame(columns=columns).to_csv(self._fh, index=False)
+        self._columns = columns
+
+    def append(self, df: DataFrame) -> None:
+        if self._columns is None:
+            self._write_header(list(df.columns))
+        _align(df, self._columns).to_csv(self._fh, header=False, index=False)
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._columns is None:
+            self._write_header([])
+        self._fh.close()
+
+    def discard(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._fh.close()
+        os.unlink(self._path)
+
+    def __enter__(self) -> "CsvChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class ParquetChunkWriter:
+    """
+    Appends DataFrame chunks to a Parquet file, one row group per chunk.
+
+    The pipeline's own columns and columns without values in the first chunk are stored
+    as text. Other columns take their type from the first chunk: integer, float, boolean
+    and datetime columns keep it (missing values become nulls), the rest are text. Every
+    chunk is cast to that schema; a value that does not fit it raises ``ValueError`` and,
+    through ``__exit__``, removes the partly written file.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence] = None) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise _missing_dependency("pyarrow", OutputFormats.PARQUET) from exc
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._path = path
+        self._columns: Optional[list] = list(columns) if columns is not None else None
+        self._schema = None
+        self._writer = None
+        self._closed = False
+        self.rows_written = 0
+
+    def _arrow_type(self, name, values: pd.Series):
+        pa = self._pa
+        if name in _TEXT_COLUMNS or not values.notna().any():
+            return pa.string()
+        kind = values.dtype.kind
+        if kind in "iu":
+            return pa.int64()
+        if kind == "f":
+            return pa.float64()
+        if kind == "b":
+            return pa.bool_()
+        if kind == "M":
+            return pa.timestamp("ns")
+        return pa.string()
+
+    def _table(self, df: DataFrame):
+        arrays = []
+        for field in self._schema:
+            values = df[field.name]
+            if field.type == self._pa.string():
+                values = values.map(_to_text, na_action="ignore").astype(object).where(values.notna(), None)
+            try:
+                arrays.append(self._pa.Array.from_pandas(values, type=field.type))
+            except (self._pa.ArrowInvalid, self._pa.ArrowTypeError) as exc:
+                raise ValueError(f"Column {field.name!r} does not fit its Parquet type {field.type}: {exc}") from exc
+        return self._pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def _open(self, df: DataFrame) -> None:
+        if self._columns is None:
+            self._columns = list(df.columns)
+        df = _align(df, self._columns)
+        self._schema = self._pa.schema([(str(name), self._arrow_type(name, df[name])) for name in self._columns])
+        self._writer = self._pq.ParquetWriter(self._path, self._schema)
+
+    def append(self, df: DataFrame) -> None:
+        if self._writer is None:
+            self._open(df)
+        # A renamed copy: the caller's frame keeps its column labels
+        df = _align(df, self._columns).rename(columns=str)
+        self._writer.write_table(self._table(df))
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is None:
+            self._open(DataFrame(columns=self._columns or []))
+        self._writer.close()
+
+    def discard(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+            os.unlink(self._path)
+
+    def __enter__(self) -> "ParquetChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def open_chunk_writer(output_format: OutputFormats, path: str, sheet: str, columns: Optional[Sequence] = None):
+    """Chunk writer for ``output_format``; ``sheet`` only applies to the Excel formats."""
+    if output_format is OutputFormats.XLSXWRITER:
+        return XlsxwriterChunkWriter(path, sheet, columns=columns)
+    if output_format is OutputFormats.CSV:
+        return CsvChunkWriter(path, columns=columns)
+    if output_format is OutputFormats.PARQUET:
+        return ParquetChunkWriter(path, columns=columns)
+    return OpenpyxlChunkWriter(path, sheet, columns=columns)
@@ -0,0 +1 @@
+from .sqlite_row_cache import SqliteRowCache
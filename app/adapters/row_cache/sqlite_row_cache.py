@@ -0,0 +1,94 @@
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Keys per SELECT; stays below SQLite's host parameter limit
+_QUERY_BATCH = 500
+
+# After eviction the cache is trimmed to this share of its budget, so it does not evict on every run
+_EVICT_TO = 0.8
+
+
+class SqliteRowCache:
+    """
+    Size-bounded key/value store for built rows, kept in a single SQLite file.
+
+    Values are opaque bytes. Every lookup refreshes the entries it hits, and ``evict``
+    drops the least recently used ones once the stored bytes exceed ``max_bytes``.
+    Several processes may share the file; SQLite serializes the writers.
+    """
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " key BLOB PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rows_used ON rows(used)")
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[bytes]) -> dict[bytes, bytes]:
+        keys = list(dict.fromkeys(keys))
+        found: dict[bytes, bytes] = {}
+        for start in range(0, len(keys), _QUERY_BATCH):
+            batch = keys[start:start + _QUERY_BATCH]
+            marks = ",".join("?" * len(batch))
+            found.update(self._conn.execute(f"SELECT key, value FROM rows WHERE key IN ({marks})", batch))
+        if found:
+            now = time.time()
+            self._conn.executemany("UPDATE rows SET used = ? WHERE key = ?", ((now, key) for key in found))
+            self._conn.commit()
+        return found
+
+    def put_many(self, items: dict[bytes, bytes]) -> None:
+        if not items:
+            return
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO rows (key, value, size, used) VALUES (?, ?, ?, ?)",
+            ((key, value, len(key) + len(value), now) for key, value in items.items()),
+        )
+        self._conn.commit()
+
+    def size_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM rows").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least recently used entries while over budget; returns how many were removed."""
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return 0
+        target = self.max_bytes * _EVICT_TO
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM rows ORDER BY used").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM rows WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        logger.info("Row cache: evicted %s entries, %.1f MiB left", removed, total / 2 ** 20)
+        return removed
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM rows")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SqliteRowCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
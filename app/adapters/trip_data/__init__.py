@@ -1 +1,2 @@
 from .resource_trip_data_provider import ResourceTripDataProvider
+from .preloaded_trip_data_provider import PreloadedTripDataProvider
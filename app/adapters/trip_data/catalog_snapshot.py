@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from app.core.dataclasses import TripIndex, Triplets
+from app.core.services.model_brand_resolver import ModelBrandResolver
+
+logger = logging.getLogger(__name__)
+
+# Bump when the pickled structures change shape so stale snapshots get rebuilt
+SNAPSHOT_FORMAT_VERSION = 3
+
+
+@dataclass(frozen=True)
+class _FileStamp:
+    name: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Compiled trip catalog: triplets, their index, resolver maps and group codes.
+
+    Pickled as one object so the index and resolver keep pointing at the same
+    triplet dicts after loading.
+    """
+    triplets: Triplets
+    trip_index: TripIndex
+    resolver: ModelBrandResolver
+    filtered_groups: dict[str, str]
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _stamp(path: Path, sha256: Optional[str] = None) -> _FileStamp:
+    stat = path.stat()
+    return _FileStamp(
+        name=path.name,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha256=sha256 if sha256 is not None else _sha256(path),
+    )
+
+
+def _stamps_match(stamps: tuple[_FileStamp, ...], paths: list[Path]) -> Optional[bool]:
+    """
+    Compare stored stamps with files on disk.
+
+    Returns True when nothing changed, None when only mtimes moved but the contents
+    hash the same (the snapshot is valid but should be re-stamped), False otherwise.
+    """
+    if [stamp.name for stamp in stamps] != [path.name for path in paths]:
+        return False
+    touched = False
+    for stamp, path in zip(stamps, paths):
+        stat = path.stat()
+        if stat.st_size != stamp.size:
+            return False
+        if stat.st_mtime_ns != stamp.mtime_ns:
+            if _sha256(path) != stamp.sha256:
+                return False
+            touched = True
+    return None if touched else True
+
+
+class CatalogSnapshotStore:
+    """
+    Reads and writes a single pickled ``CatalogSnapshot`` keyed by its source files.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self, sources: Iterable[Path]) -> Optional[CatalogSnapshot]:
+        """
+        Return the stored snapshot if it was built from the current ``sources``.
+        """
+        if not self._path.is_file():
+            return None
+        paths = list(sources)
+        try:
+            with self._path.open("rb") as fh:
+                version, stamps, snapshot = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError, TypeError) as exc:
+            logger.warning("Ignoring unreadable catalog snapshot %s: %s", self._path, exc)
+            return None
+
+        if version != SNAPSHOT_FORMAT_VERSION:
+            logger.info("Catalog snapshot format changed, rebuilding")
+            return None
+
+        state = _stamps_match(stamps, paths)
+        if state is False:
+            logger.info("Catalog resources changed, rebuilding snapshot")
+            return None
+        if state is None:
+            # Contents are the same, only timestamps moved: refresh stamps for the next run
+            self.save(snapshot, paths, hashes={stamp.name: stamp.sha256 for stamp in stamps})
+        return snapshot
+
+    def save(
+            self,
+            snapshot: CatalogSnapshot,
+            sources: Iterable[Path],
+            hashes: Optional[dict[str, str]] = None,
+    ) -> None:
+        """
+        Atomically write ``snapshot`` together with stamps of its ``sources``.
+        """
+        hashes = hashes or {}
+        stamps = tuple(_stamp(path, hashes.get(path.name)) for path in sources)
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self._path.parent, prefix=self._path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    pickle.dump((SNAPSHOT_FORMAT_VERSION, stamps, snapshot), fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_name, self._path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            logger.warning("Could not write catalog snapshot %s: %s", self._path, exc)
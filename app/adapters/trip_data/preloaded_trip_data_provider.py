@@ -0,0 +1,76 @@
+import threading
+from typing import Optional
+
+from app.core.dataclasses import TripIndex, Triplets
+from app.core.services.model_brand_resolver import ModelBrandResolver
+from app.gateways.trip_data_prodiver import TripDataProvider
+
+
+class PreloadedTripDataProvider(TripDataProvider):
+    """
+    Loads the catalog from another provider once and serves it from memory afterwards.
+
+    Triplets, index, resolver and group codes are built on first use (or by ``preload``)
+    and shared by every pipeline run that uses this provider, including worker processes
+    forked after preloading. Loading is serialized, so a run started while another thread
+    preloads waits for that catalog instead of loading its own.
+    """
+
+    def __init__(self, provider: TripDataProvider) -> None:
+        self._provider = provider
+        self._triplets: Optional[Triplets] = None
+        self._trip_index: Optional[TripIndex] = None
+        self._resolver: Optional[ModelBrandResolver] = None
+        self._filtered_groups: Optional[dict[str, str]] = None
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> dict:
+        # Locks cannot be pickled; every process gets its own
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def preload(self) -> "PreloadedTripDataProvider":
+        with self._lock:
+            triplets = self.load_triplets()
+            self.build_index(triplets)
+            self.build_resolver(triplets)
+            self.load_filtered_groups()
+        return self
+
+    def load_triplets(self) -> Triplets:
+        with self._lock:
+            if self._triplets is None:
+                self._triplets = self._provider.load_triplets()
+            return self._triplets
+
+    def build_index(self, triplets: Triplets) -> TripIndex:
+        if triplets is not self.load_triplets():
+            return self._provider.build_index(triplets)
+        with self._lock:
+            if self._trip_index is None:
+                self._trip_index = self._provider.build_index(triplets)
+            return self._trip_index
+
+    def build_resolver(self, triplets: Triplets) -> ModelBrandResolver:
+        with self._lock:
+            if triplets is self.load_triplets() and self._resolver is not None:
+                return self._resolver
+            if hasattr(self._provider, "build_resolver"):
+                resolver = self._provider.build_resolver(triplets)
+            else:
+                resolver = ModelBrandResolver(triplets.raw)
+            if triplets is self._triplets:
+                self._resolver = resolver
+            return resolver
+
+    def load_filtered_groups(self) -> dict[str, str]:
+        with self._lock:
+            if self._filtered_groups is None:
+                self._filtered_groups = self._provider.load_filtered_groups() \
+                    if hasattr(self._provider, "load_filtered_groups") else {}
+            return self._filtered_groups
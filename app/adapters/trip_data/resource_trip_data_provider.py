@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 from pathlib import Path
@@ -5,8 +6,11 @@ from typing import Optional, Iterator
 
 import app.adapters.trip_data.resources as trip_resources
 
+from app.adapters.trip_data.catalog_snapshot import CatalogSnapshot, CatalogSnapshotStore
 from app.gateways.trip_data_prodiver import TripDataProvider
 from app.core.dataclasses import TripIndex, Triplets
+from app.core.services.model_brand_resolver import ModelBrandResolver
+from app.utils.cache_dir import user_cache_dir
 from app.utils.finder import build_trip_index
 from app.settings import ALLOWED_LANGUAGES
 
@@ -29,9 +33,17 @@ def _is_triplet_dict(obj: dict) -> bool:
 class ResourceTripDataProvider(TripDataProvider):
     """
     Read all brands json from resource packages.
+
+    With ``use_snapshot`` enabled the parsed triplets, index, resolver maps and group
+    codes are compiled into one pickled snapshot and reused until a resource file changes.
     """
 
-    def __init__(self, base_dir: Optional[Path | str] = None):
+    def __init__(
+            self,
+            base_dir: Optional[Path | str] = None,
+            use_snapshot: bool = True,
+            snapshot_path: Optional[Path | str] = None,
+    ):
         if base_dir is None:
             package_file = getattr(trip_resources, "__file__", None)
             if package_file is None:
@@ -45,6 +57,14 @@ class ResourceTripDataProvider(TripDataProvider):
         if not self._base_dir.is_dir():
             raise NotADirectoryError(f"Base directory does not exist: {self._base_dir}")
 
+        self._snapshot_store: Optional[CatalogSnapshotStore] = None
+        if use_snapshot:
+            if snapshot_path is None:
+                dir_key = hashlib.sha256(str(self._base_dir).encode("utf-8")).hexdigest()[:12]
+                snapshot_path = user_cache_dir() / f"catalog-{dir_key}.pickle"
+            self._snapshot_store = CatalogSnapshotStore(Path(snapshot_path))
+        self._snapshot: Optional[CatalogSnapshot] = None
+
     def _iter_brand_files(self) -> Iterator[Path]:
         """
         Iterate *.json files in the base directory.
@@ -70,7 +90,46 @@ class ResourceTripDataProvider(TripDataProvider):
                 cls._collect_triplets(nested_value, out)
             return
 
-    def load_triplets(self) -> Triplets:
+    def _filtered_groups_path(self) -> Path:
+        return self._base_dir.parent / "filtered_groups.json"
+
+    def _source_files(self) -> list[Path]:
+        """
+        Files the compiled snapshot depends on.
+        """
+        sources = list(self._iter_brand_files())
+        groups_path = self._filtered_groups_path()
+        if groups_path.exists():
+            sources.append(groups_path)
+        return sources
+
+    def _compiled(self) -> Optional[CatalogSnapshot]:
+        """
+        Load the snapshot once per provider, rebuilding it from the json files if stale.
+        """
+        if self._snapshot_store is None:
+            return None
+        if self._snapshot is not None:
+            return self._snapshot
+
+        sources = self._source_files()
+        snapshot = self._snapshot_store.load(sources)
+        if snapshot is None:
+            triplets = self._parse_triplets()
+            snapshot = CatalogSnapshot(
+                triplets=triplets,
+                trip_index=TripIndex(raw=build_trip_index(triplets.raw), catalog=triplets.catalog),
+                resolver=ModelBrandResolver(triplets.raw),
+                filtered_groups=self._parse_filtered_groups(),
+            )
+            self._snapshot_store.save(snapshot, sources)
+            logger.info("Catalog snapshot written to %s", self._snapshot_store.path)
+        else:
+            logger.info("Catalog loaded from snapshot %s", self._snapshot_store.path)
+        self._snapshot = snapshot
+        return snapshot
+
+    def _parse_triplets(self) -> Triplets:
         items: list[dict] = []
         for path in self._iter_brand_files():
             logger.info(f"Loading triplets from: {path.name}... ")
@@ -78,12 +137,34 @@ class ResourceTripDataProvider(TripDataProvider):
             self._collect_triplets(data, items)
         return Triplets(raw=items)
 
+    def load_triplets(self) -> Triplets:
+        snapshot = self._compiled()
+        if snapshot is not None:
+            return snapshot.triplets
+        return self._parse_triplets()
+
     def build_index(self, triplets: Triplets) -> TripIndex:
-        return TripIndex(raw=build_trip_index(triplets.raw))
+        snapshot = self._compiled()
+        if snapshot is not None and triplets is snapshot.triplets:
+            return snapshot.trip_index
+        return TripIndex(raw=build_trip_index(triplets.raw), catalog=triplets.catalog)
+
+    def build_resolver(self, triplets: Triplets) -> ModelBrandResolver:
+        """Return a resolver for ``triplets``, reusing the compiled one when possible."""
+        snapshot = self._compiled()
+        if snapshot is not None and triplets is snapshot.triplets:
+            return snapshot.resolver
+        return ModelBrandResolver(triplets.raw)
 
     def load_filtered_groups(self) -> dict[str, str]:
         """Load filtered_groups.json mapping model names to group codes."""
-        path = self._base_dir.parent / "filtered_groups.json"
+        snapshot = self._compiled()
+        if snapshot is not None:
+            return snapshot.filtered_groups
+        return self._parse_filtered_groups()
+
+    def _parse_filtered_groups(self) -> dict[str, str]:
+        path = self._filtered_groups_path()
         if not path.exists():
             logger.warning("filtered_groups.json not found at %s", path)
             return {}
@@ -0,0 +1,289 @@
+"""
+Headless batch processing: ``python -m app <files or directories> [options]``.
+
+The catalog (triplets, index, resolver, group codes) is loaded once in the parent
+process; worker processes inherit it on fork or read it from the catalog snapshot.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from app.core.enums import OutputFormats, OutputSplits, ProcessingEngines
+from app.settings import AppConfig, setup_logging
+
+# The catalog and pipeline modules load pandas and openpyxl; they are imported once there is
+# work to do, so --help and argument errors return immediately
+if TYPE_CHECKING:
+    from app.adapters.trip_data import PreloadedTripDataProvider
+    from app.pipelines import ExcelFilePipeline, FanOutEstimate
+
+logger = logging.getLogger("app.batch")
+
+OUTPUT_SUFFIX = "_processed"
+
+# Set once per worker process by _init_worker (inherited on fork)
+_worker_pipeline: Optional["ExcelFilePipeline"] = None
+
+
+@dataclass(frozen=True)
+class FileResult:
+    input_path: Path
+    output_path: Optional[Path]
+    rows_in: int = 0
+    rows_out: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def collect_inputs(paths: Iterable[Path], recursive: bool = False) -> list[Path]:
+    """
+    Expand directories to the ``.xlsx`` files inside them, skipping Excel lock files and
+    outputs (including the parts in split output folders).
+    """
+    found: list[Path] = []
+    for path in paths:
+        if path.is_dir():
+            pattern = "**/*.xlsx" if recursive else "*.xlsx"
+            found.extend(
+                p for p in sorted(path.glob(pattern))
+                if not p.name.startswith("~$")
+                and not p.stem.endswith(OUTPUT_SUFFIX)
+                and not p.parent.name.endswith(OUTPUT_SUFFIX)
+            )
+        elif path.suffix.lower() == ".xlsx" and path.exists():
+            found.append(path)
+        else:
+            raise FileNotFoundError(f"Not an .xlsx file or directory: {path}")
+    # Keep the first occurrence of files listed twice
+    return list(dict.fromkeys(p.resolve() for p in found))
+
+
+def output_path_for(input_path: Path, output_dir: Optional[Path], suffix: str = ".xlsx") -> Path:
+    return (output_dir or input_path.parent) / f"{input_path.stem}{OUTPUT_SUFFIX}{suffix}"
+
+
+def _make_pipeline(
+        cfg: AppConfig,
+        provider: "PreloadedTripDataProvider",
+        include_record_type: bool,
+) -> "ExcelFilePipeline":
+    from app.pipelines import ExcelFilePipeline
+
+    return ExcelFilePipeline(cfg, trip_provider=provider, include_record_type=include_record_type)
+
+
+def _init_worker(
+        cfg: AppConfig,
+        provider: "PreloadedTripDataProvider",
+        include_record_type: bool,
+        log_level: str,
+) -> None:
+    global _worker_pipeline
+    setup_logging(log_level)
+    _worker_pipeline = _make_pipeline(cfg, provider.preload(), include_record_type)
+
+
+def _process_one(pipeline: "ExcelFilePipeline", input_path: Path, output_path: Path) -> FileResult:
+    started = time.perf_counter()
+    file_logger = logging.getLogger(f"app.batch.{input_path.stem}")
+    try:
+        result = pipeline.run(input_path, file_logger, output_path=output_path)
+    except Exception as exc:
+        file_logger.exception("Failed to process %s", input_path)
+        return FileResult(input_path, None, seconds=time.perf_counter() - started, error=f"{type(exc).__name__}: {exc}")
+    return FileResult(
+        input_path,
+        result.output_path,
+        rows_in=result.report.rows_in,
+        rows_out=result.report.rows_out,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _process_in_worker(input_path: Path, output_path: Path) -> FileResult:
+    return _process_one(_worker_pipeline, input_path, output_path)
+
+
+def run_batch(
+        inputs: list[Path],
+        cfg: AppConfig,
+        output_dir: Optional[Path] = None,
+        jobs: int = 1,
+        include_record_type: bool = False,
+        log_level: str = "INFO",
+) -> list[FileResult]:
+    """Process ``inputs`` with ``jobs`` concurrent workbooks and return one result per file."""
+    from app.adapters.trip_data import PreloadedTripDataProvider, ResourceTripDataProvider
+
+    provider = PreloadedTripDataProvider(ResourceTripDataProvider(use_snapshot=cfg.use_catalog_snapshot))
+    started = time.perf_counter()
+    provider.preload()
+    logger.info("Catalog loaded in %.2fs", time.perf_counter() - started)
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = OutputFormats(cfg.output_format).suffix
+    targets = [(path, output_path_for(path, output_dir, suffix)) for path in inputs]
+    clashes = {out for _, out in targets if sum(1 for _, other in targets if other == out) > 1}
+    if clashes:
+        raise ValueError(f"Several inputs would be written to the same output: {sorted(map(str, clashes))}")
+    results: list[FileResult] = []
+
+    def done(result: FileResult) -> None:
+        results.append(result)
+        if result.error:
+            logger.error("[%s/%s] FAILED %s: %s", len(results), len(targets), result.input_path.name, result.error)
+        else:
+            logger.info(
+                "[%s/%s] %s: %s -> %s rows in %.2fs",
+                len(results), len(targets), result.input_path.name, result.rows_in, result.rows_out, result.seconds,
+            )
+
+    jobs = max(1, min(jobs, len(targets)))
+    if jobs == 1:
+        pipeline = _make_pipeline(cfg, provider, include_record_type)
+        for input_path, output_path in targets:
+            done(_process_one(pipeline, input_path, output_path))
+    else:
+        with ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=multiprocessing.get_context(),
+                initializer=_init_worker,
+                initargs=(cfg, provider, include_record_type, log_level),
+        ) as pool:
+            futures = [pool.submit(_process_in_worker, *target) for target in targets]
+            for future in as_completed(futures):
+                done(future.result())
+
+    order = {path: i for i, (path, _) in enumerate(targets)}
+    return sorted(results, key=lambda r: order[r.input_path])
+
+
+def dry_run_batch(inputs: list[Path], cfg: AppConfig, include_record_type: bool = False) -> list["FanOutEstimate"]:
+    """Estimate the output of every input one after another, sharing one catalog; nothing is written."""
+    from app.adapters.trip_data import PreloadedTripDataProvider, ResourceTripDataProvider
+
+    provider = PreloadedTripDataProvider(ResourceTripDataProvider(use_snapshot=cfg.use_catalog_snapshot)).preload()
+    pipeline = _make_pipeline(cfg, provider, include_record_type)
+    return [pipeline.dry_run(path, logging.getLogger(f"app.batch.{path.stem}")) for path in inputs]
+
+
+def summarize_dry_run(estimates: list["FanOutEstimate"]) -> str:
+    lines = []
+    for est in estimates:
+        line = f"{est.input_path}: {est.rows_in} rows in, {est.rows_out} out, " \
+               f"{est.unresolved_entries} of {est.compat_entries} compatibility entries unresolved"
+        if est.est_output_bytes is not None:
+            line += f", ~{est.est_output_bytes / 2 ** 20:.1f} MiB {est.output_format}, ~{est.est_seconds:.0f}s"
+        if est.exceeds_sheet_limit:
+            line += " (more rows than fit on an Excel sheet: use --split)"
+        lines.append(line)
+    lines.append(f"Total: {sum(e.rows_in for e in estimates)} rows in, {sum(e.rows_out for e in estimates)} out")
+    return "\n".join(lines)
+
+
+def summarize(results: list[FileResult], wall_seconds: float) -> str:
+    ok = [r for r in results if r.error is None]
+    rows_in = sum(r.rows_in for r in ok)
+    rows_out = sum(r.rows_out for r in ok)
+    lines = [
+        f"Files: {len(ok)} processed, {len(results) - len(ok)} failed, {wall_seconds:.2f}s wall",
+        f"Rows: {rows_in} in, {rows_out} out",
+    ]
+    if wall_seconds > 0:
+        lines.append(
+            f"Throughput: {rows_in / wall_seconds:.1f} input rows/s, {rows_out / wall_seconds:.1f} output rows/s, "
+            f"{len(ok) * 60 / wall_seconds:.1f} files/min"
+        )
+    lines.extend(f"FAILED {r.input_path}: {r.error}" for r in results if r.error)
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    defaults = AppConfig()
+    parser = argparse.ArgumentParser(prog="python -m app", description="Build mirrors for many workbooks")
+    parser.add_argument("paths", nargs="+", type=Path, help=".xlsx files or directories containing them")
+    parser.add_argument("-o", "--output-dir", type=Path, help="write outputs here instead of next to the inputs")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, multiprocessing.cpu_count()),
+                        help="workbooks processed concurrently (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="search directories recursively")
+    parser.add_argument("--sheet", default=defaults.sheet_name)
+    parser.add_argument("--engine", choices=[e.value for e in ProcessingEngines], default=defaults.processing_engine)
+    parser.add_argument("--format", choices=[f.value for f in OutputFormats], default=defaults.output_format,
+                        help="output writer; csv and parquet skip Excel entirely")
+    parser.add_argument("--chunk-rows", type=int, default=defaults.excel_chunk_rows,
+                        help="stream workbooks in chunks of this many rows (0 = in memory)")
+    parser.add_argument("--pipeline-depth", type=int, default=defaults.pipeline_depth,
+                        help="overlap reading, building and writing of streamed chunks, "
+                             "with up to this many chunks queued between stages (0 = one after another)")
+    parser.add_argument("--split", choices=[s.value for s in OutputSplits], default=defaults.output_split,
+                        help="write the output as several files in a <name>_processed folder with a manifest.json, "
+                             "split by row count or by brand")
+    parser.add_argument("--part-rows", type=int, default=defaults.output_part_rows,
+                        help="rows per output part with --split (0 = as many as fit on an Excel sheet)")
+    parser.add_argument("--part-writers", type=int, default=defaults.output_writers,
+                        help="processes writing output parts at once with --split (in-memory runs)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only predict output rows, unresolved models, size and time; write nothing")
+    parser.add_argument("--record-type", action="store_true", help="add the record type column")
+    parser.add_argument("--row-cache-mb", type=int, default=defaults.row_cache_mb,
+                        help="reuse rows built in earlier runs from an on-disk cache of this size (0 = off)")
+    parser.add_argument("--fuzzy-distance", type=int, default=defaults.fuzzy_model_distance,
+                        help="resolve compatibility models with up to this many typos (0 = exact only)")
+    parser.add_argument("--report", action="store_true", help="write a JSON run report next to each output")
+    parser.add_argument("--log-level", default="INFO")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    setup_logging(args.log_level)
+
+    try:
+        inputs = collect_inputs(args.paths, recursive=args.recursive)
+    except FileNotFoundError as exc:
+        logger.error("%s", exc)
+        return 2
+    if not inputs:
+        logger.error("No .xlsx files found")
+        return 2
+
+    cfg = replace(
+        AppConfig(),
+        sheet_name=args.sheet,
+        processing_engine=args.engine,
+        excel_chunk_rows=args.chunk_rows,
+        pipeline_depth=args.pipeline_depth,
+        output_format=args.format,
+        output_split=args.split,
+        output_part_rows=args.part_rows,
+        output_writers=args.part_writers,
+        write_run_report=args.report,
+        row_cache_mb=args.row_cache_mb,
+        fuzzy_model_distance=args.fuzzy_distance,
+    )
+    if args.dry_run:
+        print(summarize_dry_run(dry_run_batch(inputs, cfg, include_record_type=args.record_type)), file=sys.stdout)
+        return 0
+    started = time.perf_counter()
+    try:
+        results = run_batch(
+            inputs,
+            cfg,
+            output_dir=args.output_dir,
+            jobs=args.jobs,
+            include_record_type=args.record_type,
+            log_level=args.log_level,
+        )
+    except ValueError as exc:
+        logger.error("%s", exc)
+        return 2
+    print(summarize(results, time.perf_counter() - started), file=sys.stdout)
+    return 1 if any(r.error for r in results) else 0
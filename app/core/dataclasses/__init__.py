@@ -1,3 +1,4 @@
+from .trip_catalog import TripCatalog
 from .triplets import Triplets
 from .trip_index import TripIndex
 from .compatibility_map import CompatibilityMap
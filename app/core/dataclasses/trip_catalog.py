@@ -0,0 +1,64 @@
+import sys
+from typing import Optional, Sequence
+
+from app.settings import ALLOWED_LANGUAGES
+
+
+class TripCatalog:
+    """
+    Triplets numbered by stable integer IDs: the position of each triplet in the catalog.
+
+    Brand and model strings are interned in place, so equal names share one object across
+    triplets and the caches keyed on them compare by identity. ``pair_class`` and
+    ``models_class`` map an ID to the first ID with the same brands and models (or models
+    only) in every language; caches keyed on them share entries between duplicate triplets
+    exactly like keys made of the values. Triplet dicts map back to their ID by identity
+    (``id_of``); that map is rebuilt after unpickling.
+    """
+
+    __slots__ = ("trips", "models", "pair_class", "models_class", "_ids")
+
+    def __init__(self, trips: Sequence[dict]) -> None:
+        self.trips: tuple[dict, ...] = tuple(trips)
+        models: list[tuple[str, ...]] = []
+        pair_class: list[int] = []
+        models_class: list[int] = []
+        first_pair: dict[tuple, int] = {}
+        first_models: dict[tuple[str, ...], int] = {}
+        for trip_id, trip in enumerate(self.trips):
+            for lang in ALLOWED_LANGUAGES:
+                entry = trip[lang]
+                entry["brand"] = _intern(entry["brand"])
+                entry["model"] = _intern(entry["model"])
+            pair = tuple((trip[lang]["brand"], trip[lang]["model"]) for lang in ALLOWED_LANGUAGES)
+            trip_models = tuple(brand_model[1] for brand_model in pair)
+            models.append(trip_models)
+            pair_class.append(first_pair.setdefault(pair, trip_id))
+            models_class.append(first_models.setdefault(trip_models, trip_id))
+        # Per-language model names of every ID, aligned with ``ALLOWED_LANGUAGES``
+        self.models: tuple[tuple[str, ...], ...] = tuple(models)
+        self.pair_class: tuple[int, ...] = tuple(pair_class)
+        self.models_class: tuple[int, ...] = tuple(models_class)
+        self._ids = self._identity_map()
+
+    def _identity_map(self) -> dict[int, int]:
+        return {id(trip): trip_id for trip_id, trip in enumerate(self.trips)}
+
+    def __getstate__(self) -> tuple:
+        # Object identities do not survive pickling; the map is rebuilt on load
+        return self.trips, self.models, self.pair_class, self.models_class
+
+    def __setstate__(self, state: tuple) -> None:
+        self.trips, self.models, self.pair_class, self.models_class = state
+        self._ids = self._identity_map()
+
+    def __len__(self) -> int:
+        return len(self.trips)
+
+    def id_of(self, trip: dict) -> Optional[int]:
+        """ID of a triplet dict of this catalog, None for any other dict."""
+        return self._ids.get(id(trip))
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
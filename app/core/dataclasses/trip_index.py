@@ -1,10 +1,18 @@
 from dataclasses import dataclass
 
+from app.core.dataclasses.trip_catalog import TripCatalog
+
 
 @dataclass(frozen=True)
 class TripIndex:
-    raw: dict
+    """Lowercase (brand, model) pairs of every language combination mapped to triplet IDs of ``catalog``."""
+    raw: dict[tuple[str, str], int]
+    catalog: TripCatalog
 
-    def get_pair(self, brand: str, model: str) -> dict | None:
+    def get_pair_id(self, brand: str, model: str) -> int | None:
         key = (str(brand).lower(), str(model).lower())
         return self.raw.get(key)
+
+    def get_pair(self, brand: str, model: str) -> dict | None:
+        trip_id = self.raw.get((str(brand).lower(), str(model).lower()))
+        return None if trip_id is None else self.catalog.trips[trip_id]
@@ -1,7 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from app.core.dataclasses.trip_catalog import TripCatalog
 
 
 @dataclass(frozen=True)
 class Triplets:
     """Dataclass of original triplets data."""
     raw: list[dict]
+    # Integer IDs and interned strings of ``raw``, see ``TripCatalog``
+    catalog: TripCatalog = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "catalog", TripCatalog(self.raw))
@@ -1,2 +1,5 @@
 from .columns import ExcelColumns, CustomExcelColumns
-from .record_type_choices import RecordTypeChoices
\ No newline at end of file
+from .processing_engines import ProcessingEngines
+from .record_type_choices import RecordTypeChoices
+from .output_formats import OutputFormats
+from .output_splits import OutputSplits
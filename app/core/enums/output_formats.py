@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class OutputFormats(Enum):
+    XLSX = "xlsx"  # openpyxl (DataFrame.to_excel / write-only workbook)
+    XLSXWRITER = "xlsxwriter"  # xlsxwriter in constant-memory mode, same .xlsx output
+    CSV = "csv"  # UTF-8 CSV, header row first
+    PARQUET = "parquet"  # Apache Parquet, needs pyarrow
+
+    @property
+    def suffix(self) -> str:
+        return {OutputFormats.CSV: ".csv", OutputFormats.PARQUET: ".parquet"}.get(self, ".xlsx")
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class OutputSplits(Enum):
+    NONE = "none"  # one output file
+    ROWS = "rows"  # consecutive parts of at most ``output_part_rows`` rows
+    BRAND = "brand"  # one part per brand ("Марка" of the output row), split further by rows when large
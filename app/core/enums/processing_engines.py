@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class ProcessingEngines(Enum):
+    ROW = "row"  # one pd.Series per original/mirror row
+    COLUMNAR = "columnar"  # explode compatibility and fill columns in bulk
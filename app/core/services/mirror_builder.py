@@ -1,5 +1,7 @@
-from typing import Optional
+from dataclasses import dataclass
+from typing import Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
 from app.core.dataclasses import TripIndex
@@ -8,13 +10,28 @@ from app.core.enums import ExcelColumns, CustomExcelColumns, RecordTypeChoices
 from app.core.services.compat_utils import dedupe_models, same_pair, clear_fields
 from app.core.services.model_brand_resolver import ModelBrandResolver
 from app.settings import MIRROR_CLEAR_COLUMNS
+from app.utils.lru_memo import ProcessLocalCaches
 
 
-class MirrorBuilder:
+@dataclass(frozen=True)
+class MirrorTarget:
+    """A resolved compatibility entry: the triplet a mirror is built for and its group code."""
+    trip: dict
+    group_code: Optional[str]
+
+
+class MirrorBuilder(ProcessLocalCaches):
     """
     Creates mirror rows based on the original row and compatibility map.
     Like "Original" + 0..N "Mirror" rows.
+
+    Mirror plans (the targets of a compatibility list for a given source pair) are memoized
+    in an LRU cache, so rows sharing the same "Совместимость" text are resolved once.
     """
+    _local_caches = {
+        "_cached_plan": ("_build_plan", "_plan_cache_size"),
+        "_cached_models": ("_resolve_models", "_plan_cache_size"),
+    }
 
     def __init__(
             self,
@@ -23,12 +40,27 @@ class MirrorBuilder:
             resolver: ModelBrandResolver,
             include_record_type: bool = False,
             filtered_groups: Optional[dict[str, str]] = None,
+            plan_cache_size: Optional[int] = 4096,
     ) -> None:
         self._transformer = transformer
         self._trip_index = trip_index
         self._resolver = resolver
         self._include_record_type = include_record_type
         self._filtered_groups: dict[str, str] = filtered_groups or {}
+        # Group code of every triplet ID (see ``ModelBrandResolver.triplets``), from its English model
+        self._group_codes: tuple[Optional[str], ...] = tuple(
+            self._filtered_groups.get(trip["en"]["model"]) for trip in resolver.triplets
+        )
+        self._plan_cache_size = plan_cache_size
+        self._reset_local_caches()
+
+    @property
+    def transformer(self) -> RowTransformer:
+        return self._transformer
+
+    @property
+    def resolver(self) -> ModelBrandResolver:
+        return self._resolver
 
     def set_include_record_type(self, include: bool) -> None:
         """
@@ -39,6 +71,77 @@ class MirrorBuilder:
         """
         self._include_record_type = include
 
+    def _resolve_models(self, raw_compat: Optional[str]) -> tuple[tuple[str, Optional[int]], ...]:
+        return tuple((model, self._resolver.resolve_id(model, allow_base_fallback=False))
+                     for model in dedupe_models(raw_compat))
+
+    def resolved_models(self, raw_compat) -> tuple[tuple[str, Optional[int]], ...]:
+        """
+        The models of a compatibility list, deduped as the build does, with the triplet ID
+        each resolves to (None when it is not in the catalog).
+
+        Cached by the compatibility text and shared with the mirror plans, so counting
+        unresolved entries after a build does not resolve the models again.
+        """
+        return self._cached_models(None if raw_compat is None else str(raw_compat))
+
+    def _build_plan(self, raw_compat: Optional[str], current_brand: str, current_model: str) -> tuple[MirrorTarget, ...]:
+        targets: list[MirrorTarget] = []
+        for model, trip_id in self.resolved_models(raw_compat):
+            if trip_id is None:
+                continue
+            resolved_triplet = self._resolver.triplets[trip_id]
+            if same_pair(resolved_triplet["en"]["brand"], resolved_triplet["en"]["model"], current_brand, current_model):
+                continue
+            targets.append(MirrorTarget(trip=resolved_triplet, group_code=self._group_codes[trip_id]))
+        return tuple(targets)
+
+    def mirror_plan(self, current_brand, current_model, raw_compat) -> tuple[MirrorTarget, ...]:
+        """
+        Resolve the compatibility list of a row into the targets its mirrors are built for.
+
+        Cached by (raw compatibility text, source brand, source model); the source pair is
+        normalized the way ``same_pair`` compares it.
+        """
+        key_compat = None if raw_compat is None else str(raw_compat)
+        return self._cached_plan(
+            key_compat,
+            str(current_brand).strip().lower(),
+            str(current_model).strip().lower(),
+        )
+
+    def mirror_counts(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Number of mirrors every row of ``df`` yields, from the mirror plans alone.
+
+        ``df`` needs only the brand, model and compatibility columns. The plans stay in
+        the plan cache for a following build.
+        """
+        raw_compat = df.get(ExcelColumns.COMPATIBILITY.value)
+        if raw_compat is None:
+            return np.zeros(len(df), dtype=np.int64)
+        blank = np.full(len(df), "", dtype=object)
+        brands = df[ExcelColumns.BRAND.value].to_numpy(dtype=object) if ExcelColumns.BRAND.value in df else blank
+        models = df[ExcelColumns.MODEL.value].to_numpy(dtype=object) if ExcelColumns.MODEL.value in df else blank
+        return np.fromiter(
+            (len(self.mirror_plan(brand, model, compat))
+             for brand, model, compat in zip(brands, models, raw_compat.to_numpy(dtype=object))),
+            dtype=np.int64,
+            count=len(df),
+        )
+
+    def count_output_rows(self, df: pd.DataFrame) -> int:
+        """Number of rows building ``df`` yields: every input row plus its mirrors (see ``mirror_counts``)."""
+        return len(df) + int(self.mirror_counts(df).sum())
+
+    def plan_cache_info(self):
+        """Hits, misses, maxsize and current size of the mirror plan cache."""
+        return self._cached_plan.cache_info()
+
+    def clear_plan_cache(self) -> None:
+        self._cached_plan.cache_clear()
+        self._cached_models.cache_clear()
+
     def build_rows_for(self, row: pd.Series) -> list[pd.Series]:
         result: list[pd.Series] = []
 
@@ -59,18 +162,12 @@ class MirrorBuilder:
         result.append(orig_row)
 
         # Creating mirrors rows
-        for model in dedupe_models(raw_compat):
-            resolved_triplet = self._resolver.resolve(model, allow_base_fallback=False)
-            if not resolved_triplet:
-                continue
-
+        for target in self.mirror_plan(current_brand, current_model, raw_compat):
+            resolved_triplet = target.trip
             target_brand, target_model = resolved_triplet["en"].values()
             target_brand_ua, target_model_ua = resolved_triplet["ua"].values()
             target_brand_ru, target_model_ru = resolved_triplet["ru"].values()
 
-            if same_pair(target_brand, target_model, current_brand, current_model):
-                continue
-
             new_row = row.copy()
             # Update brand/model in all languages
             # English
@@ -87,10 +184,9 @@ class MirrorBuilder:
                 new_row[ExcelColumns.BAS_CATEGORY.value] = target_model
 
             # Set group name and code from filtered_groups.json
-            group_code = self._filtered_groups.get(target_model)
-            if group_code:
+            if target.group_code:
                 new_row[ExcelColumns.GROUP_NAME.value] = target_model
-                new_row[ExcelColumns.GROUP_CODE.value] = group_code
+                new_row[ExcelColumns.GROUP_CODE.value] = target.group_code
 
             if self._include_record_type:
                 new_row[CustomExcelColumns.RECORD_TYPE.value] = RecordTypeChoices.MIRROR.value
@@ -108,3 +204,183 @@ class MirrorBuilder:
             result.append(new_row)
 
         return result
+
+    def _plan_frame(self, values: dict[str, np.ndarray]) -> pd.DataFrame:
+        """
+        Explode the compatibility column into one row per mirror.
+
+        ``values`` maps input columns to their per-row values. Returns a frame with
+        ``pos`` (source row position), ``trip`` (target triplet) and ``group_code``,
+        ordered the same way ``build_rows_for`` emits mirrors.
+        """
+        columns = ["pos", "trip", "group_code"]
+        raw_compat = values.get(ExcelColumns.COMPATIBILITY.value)
+        if raw_compat is None or not len(raw_compat):
+            return pd.DataFrame(columns=columns)
+
+        n_rows = len(raw_compat)
+        brands = values.get(ExcelColumns.BRAND.value, np.full(n_rows, "", dtype=object))
+        models = values.get(ExcelColumns.MODEL.value, np.full(n_rows, "", dtype=object))
+        positions: list[int] = []
+        targets: list[MirrorTarget] = []
+        for pos, (brand, model, compat) in enumerate(zip(brands, models, raw_compat)):
+            plan = self.mirror_plan(brand, model, compat)
+            positions.extend([pos] * len(plan))
+            targets.extend(plan)
+
+        return pd.DataFrame({
+            "pos": np.array(positions, dtype=np.int64),
+            "trip": pd.Series([target.trip for target in targets], dtype=object),
+            "group_code": pd.Series([target.group_code for target in targets], dtype=object),
+        }, columns=columns)
+
+    def build_frame(self, df: pd.DataFrame, infer_types: bool = True) -> pd.DataFrame:
+        """
+        Column-wise equivalent of calling ``build_rows_for`` for every row of ``df``.
+
+        Originals and mirrors are expanded with a single ``take`` over the input values,
+        brand/model/group/article columns are filled in bulk and only the text columns
+        are transformed cell by cell. With ``infer_types=False`` the columns stay object
+        dtype so partial frames can be concatenated before inferring once.
+        """
+        if df.empty:
+            return df.copy()
+
+        # df.values mirrors the per-row Series that iterrows() hands to build_rows_for
+        base = df.values.astype(object, copy=False)
+        plan = self._plan_frame({col: base[:, i] for i, col in enumerate(df.columns)})
+        n_rows = len(df)
+        mirror_pos = plan["pos"].to_numpy(dtype=np.int64)
+        mirror_trips = plan["trip"].tolist()
+        mirror_group_codes = plan["group_code"].to_numpy(dtype=object)
+
+        # Each source row yields its original followed by its mirrors
+        positions = np.concatenate([np.arange(n_rows, dtype=np.int64), mirror_pos])
+        is_mirror = np.concatenate([np.zeros(n_rows, dtype=bool), np.ones(len(mirror_pos), dtype=bool)])
+        order = np.lexsort((is_mirror, positions))
+        positions = positions[order]
+        trip_by_row: list[Optional[dict]] = [None] * n_rows + mirror_trips
+        dst_pairs = [trip_by_row[i] for i in order]
+        mirror_idx = np.flatnonzero(is_mirror[order])
+        original_idx = np.flatnonzero(~is_mirror[order])
+
+        columns: dict = {col: base[positions, i] for i, col in enumerate(df.columns)}
+        n_out = len(positions)
+
+        def column(name) -> np.ndarray:
+            if name not in columns:
+                columns[name] = np.full(n_out, np.nan, dtype=object)
+            return columns[name]
+
+        current_brand = columns.get(ExcelColumns.BRAND.value, np.full(n_out, "", dtype=object)).copy()
+        current_model = columns.get(ExcelColumns.MODEL.value, np.full(n_out, "", dtype=object)).copy()
+
+        if self._include_record_type:
+            column(CustomExcelColumns.RECORD_TYPE.value)[original_idx] = RecordTypeChoices.ORIGINAL.value
+
+        group_on_first_mirror = False
+        if len(mirror_idx):
+            targets = [dst_pairs[i] for i in mirror_idx]
+
+            def fill(name: str, lang: str, key: str) -> None:
+                column(name)[mirror_idx] = [trip[lang][key] for trip in targets]
+
+            fill(ExcelColumns.BRAND.value, "en", "brand")
+            fill(ExcelColumns.MODEL.value, "en", "model")
+            fill(ExcelColumns.BRAND_CYRILLIC.value, "ru", "brand")
+            fill(ExcelColumns.MODEL_CYRILLIC.value, "ru", "model")
+            fill(ExcelColumns.BRAND_CYRILLIC_UA.value, "ua", "brand")
+            fill(ExcelColumns.MODEL_CYRILLIC_UA.value, "ua", "model")
+
+            target_models = np.array([trip["en"]["model"] for trip in targets], dtype=object)
+            if ExcelColumns.BAS_CATEGORY.value in columns:
+                columns[ExcelColumns.BAS_CATEGORY.value][mirror_idx] = target_models
+
+            group_codes = mirror_group_codes[order[mirror_idx] - n_rows]
+            has_group = np.array([bool(code) for code in group_codes], dtype=bool)
+            group_on_first_mirror = bool(has_group[0])
+            if has_group.any():
+                column(ExcelColumns.GROUP_NAME.value)[mirror_idx[has_group]] = target_models[has_group]
+                column(ExcelColumns.GROUP_CODE.value)[mirror_idx[has_group]] = group_codes[has_group]
+
+            if self._include_record_type:
+                column(CustomExcelColumns.RECORD_TYPE.value)[mirror_idx] = RecordTypeChoices.MIRROR.value
+
+            articles = columns[ExcelColumns.ARTICLE.value][mirror_idx] \
+                if ExcelColumns.ARTICLE.value in columns else None
+            column(ExcelColumns.NEW_ARTICLE.value)[mirror_idx] = articles
+            column(ExcelColumns.ARTICLE.value)[mirror_idx] = pd.NA
+
+            for field in MIRROR_CLEAR_COLUMNS:
+                if field in columns:
+                    columns[field][mirror_idx] = None
+
+        src_trip_by_pos: dict[int, Optional[dict]] = {}
+        src_trips: list[Optional[dict]] = []
+        for pos, brand, model in zip(positions.tolist(), current_brand, current_model):
+            if pos not in src_trip_by_pos:
+                src_trip_by_pos[pos] = self._transformer.get_src_trip(brand, model)
+            src_trips.append(src_trip_by_pos[pos])
+        self._transformer.apply_all_columns(columns, src_trips=src_trips, dst_pairs=dst_pairs)
+
+        output_columns = self._output_columns(df, columns, group_on_first_mirror)
+        result = pd.DataFrame(columns, index=df.index.take(positions), columns=output_columns)
+        return result.infer_objects() if infer_types else result
+
+    @staticmethod
+    def _assignment_order(group_on_first_mirror: bool = True) -> list[str]:
+        """
+        Columns ``build_rows_for`` may add to a row, in the order they are first assigned.
+        """
+        group_columns = [ExcelColumns.GROUP_NAME.value, ExcelColumns.GROUP_CODE.value]
+        return [
+            CustomExcelColumns.RECORD_TYPE.value,
+            ExcelColumns.BRAND.value,
+            ExcelColumns.MODEL.value,
+            ExcelColumns.BRAND_CYRILLIC.value,
+            ExcelColumns.MODEL_CYRILLIC.value,
+            ExcelColumns.BRAND_CYRILLIC_UA.value,
+            ExcelColumns.MODEL_CYRILLIC_UA.value,
+            *(group_columns if group_on_first_mirror else []),
+            ExcelColumns.NEW_ARTICLE.value,
+            ExcelColumns.ARTICLE.value,
+            *([] if group_on_first_mirror else group_columns),
+        ]
+
+    def _output_columns(self, df: pd.DataFrame, columns: dict, group_on_first_mirror: bool) -> list:
+        """
+        Column order of ``pd.DataFrame(list_of_rows)`` for the rows ``build_rows_for`` emits:
+        input columns first, then added columns in the order they are first assigned.
+        """
+        added = [name for name in columns if name not in df.columns]
+        if not added:
+            return list(df.columns)
+        return list(df.columns) + [name for name in self._assignment_order(group_on_first_mirror) if name in added]
+
+    def output_columns(self, input_columns: Sequence, df: pd.DataFrame) -> list:
+        """
+        Columns of the built frame for an input with ``input_columns``, from the mirror plans alone.
+
+        ``df`` holds the brand, model and compatibility columns of every input row (see
+        ``mirror_counts``). Used to fix the header of a chunked output before any row is
+        built, the same as building the whole input at once would give.
+        """
+        input_columns = list(input_columns)
+        if df.empty:
+            return input_columns
+        plan = self._plan_frame({col: df[col].to_numpy(dtype=object) for col in df.columns})
+        record_type = CustomExcelColumns.RECORD_TYPE.value
+        group_columns = {ExcelColumns.GROUP_NAME.value, ExcelColumns.GROUP_CODE.value}
+        added = {record_type} if self._include_record_type else set()
+        group_on_first_mirror = False
+        if len(plan):
+            # Mirrors are built in plan order, so the first entry is the first mirror
+            has_group = [bool(code) for code in plan["group_code"]]
+            group_on_first_mirror = has_group[0]
+            added.update(name for name in self._assignment_order() if name not in group_columns | {record_type})
+            if any(has_group):
+                added.update(group_columns)
+        return input_columns + [
+            name for name in self._assignment_order(group_on_first_mirror)
+            if name in added and name not in input_columns
+        ]
@@ -1,20 +1,41 @@
-from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence
+import copy
+import logging
 import re
+import sys
 
 from app.settings import ALLOWED_LANGUAGES
+from app.utils.ngram_index import NGramIndex
+from app.utils.brand_model_matcher import skeleton
+from app.utils.lru_memo import LruMemo, MemoInfo
 
+logger = logging.getLogger(__name__)
 
-@dataclass(frozen=True)
-class _TripRef:
-    trip: dict
-    brands_lower: set[str]
+# Each allowed edit needs this many characters of the (folded) model name, so short names
+# like "A4" or "X5" are never matched to a neighbouring model
+FUZZY_CHARS_PER_EDIT = 4
 
 
 class ModelBrandResolver:
-    def __init__(self, triplets_raw: list[dict]) -> None:
-        self._full_map: dict[str, list[_TripRef]] = {}
-        self._base_map: dict[str, list[_TripRef]] = {}
+    """
+    Resolves compatibility model names to catalog triplets.
+
+    Triplets are numbered by their position in ``triplets_raw`` (the ``TripCatalog`` IDs);
+    the lookup maps hold lists of IDs and the lowercase brands of each ID, with equal
+    brand sets shared between triplets.
+    """
+
+    def __init__(self, triplets_raw: Sequence[dict], fuzzy_max_distance: int = 0, fuzzy_memo_size: int = 4096) -> None:
+        self._trips: tuple[dict, ...] = tuple(triplets_raw)
+        self._brands_lower: list[frozenset[str]] = []
+        self._full_map: dict[str, list[int]] = {}
+        self._base_map: dict[str, list[int]] = {}
+        # Folded model names (see ``skeleton``) of every language, for approximate matching
+        self._skeleton_map: dict[str, list[int]] = {}
+        self._fuzzy_max_distance = max(0, fuzzy_max_distance)
+        self._fuzzy_memo_size = fuzzy_memo_size
+        self._fuzzy_index: Optional[NGramIndex] = None
+        self._fuzzy_memo = LruMemo(fuzzy_memo_size)
 
         def norm(s: str) -> str:
             return " ".join(str(s).strip().lower().split())
@@ -29,47 +50,125 @@ class ModelBrandResolver:
                 return None
             return base_key.lower()
 
-        for triplet in triplets_raw:
-            brands = {triplet["ua"]["brand"].lower(), triplet["ru"]["brand"].lower(), triplet["en"]["brand"].lower()}
-            ref = _TripRef(trip=triplet, brands_lower=brands)
+        brand_sets: dict[frozenset[str], frozenset[str]] = {}
+        for trip_id, triplet in enumerate(self._trips):
+            brands = frozenset(
+                sys.intern(triplet[lang]["brand"].lower()) for lang in ("ua", "ru", "en")
+            )
+            self._brands_lower.append(brand_sets.setdefault(brands, brands))
 
             for lang in ALLOWED_LANGUAGES:
                 model_value = triplet[lang]["model"]
                 if not model_value:
                     continue
-                key = norm(model_value)
-                self._full_map.setdefault(key, []).append(ref)
+                key = sys.intern(norm(model_value))
+                self._full_map.setdefault(key, []).append(trip_id)
+                folded = skeleton(key)
+                if folded:
+                    self._skeleton_map.setdefault(sys.intern(folded), []).append(trip_id)
 
                 base_key = base_token(model_value)
                 if base_key:
-                    self._base_map.setdefault(base_key, []).append(ref)
+                    self._base_map.setdefault(sys.intern(base_key), []).append(trip_id)
+
+    def __getstate__(self) -> dict:
+        # The approximate-match index is rebuilt on first use and the memo starts empty
+        state = self.__dict__.copy()
+        state["_fuzzy_index"] = None
+        del state["_fuzzy_memo"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._fuzzy_memo = LruMemo(self._fuzzy_memo_size)
+
+    def with_fuzzy_distance(self, max_distance: int) -> "ModelBrandResolver":
+        """
+        Resolver matching models with up to ``max_distance`` edits (0 disables it).
+
+        The lookup maps and the approximate-match index are shared with this resolver; the
+        distance and the memo are the new one's own, so each pipeline run can take its own
+        view of a shared resolver and gets its own hit/miss counts.
+        """
+        max_distance = max(0, max_distance)
+        if max_distance and self._fuzzy_index is None:
+            self._fuzzy_index = NGramIndex(self._skeleton_map)
+        view = copy.copy(self)
+        view._fuzzy_max_distance = max_distance
+        view._fuzzy_memo = LruMemo(self._fuzzy_memo_size)
+        return view
+
+    def fuzzy_info(self) -> MemoInfo:
+        """Hits, misses and size of the approximate-match memo."""
+        return self._fuzzy_memo.info()
+
+    @property
+    def triplets(self) -> tuple[dict, ...]:
+        """The triplets by ID."""
+        return self._trips
 
     def resolve(self, model_str: str, prefer_brand: Optional[str] = None, *, allow_base_fallback: bool = True,) -> Optional[dict]:
         """
         Resolve the model string to a triplet dictionary.
+
+        Tries the exact normalized name first, then (``allow_base_fallback``) its first token,
+        then, with a fuzzy distance set, the closest catalog model in any language.
         """
+        trip_id = self.resolve_id(model_str, prefer_brand, allow_base_fallback=allow_base_fallback)
+        return None if trip_id is None else self._trips[trip_id]
+
+    def resolve_id(self, model_str: str, prefer_brand: Optional[str] = None, *, allow_base_fallback: bool = True,) -> Optional[int]:
+        """Like ``resolve``, but returns the ID of the triplet."""
         if model_str is None:
             return None
 
-        def pick(candidates: list[_TripRef]) -> Optional[dict]:
+        def pick(candidates: list[int]) -> Optional[int]:
             if not candidates:
                 return None
             if prefer_brand:
                 pb_lower = prefer_brand.strip().lower()
-                for ref in candidates:
-                    if pb_lower in ref.brands_lower:
-                        return ref.trip
-            return candidates[0].trip
+                for trip_id in candidates:
+                    if pb_lower in self._brands_lower[trip_id]:
+                        return trip_id
+            return candidates[0]
 
         key_full = " ".join(str(model_str).strip().lower().split())
 
         resolved = pick(self._full_map.get(key_full, []))
-        if resolved or not allow_base_fallback:
+        if resolved is not None:
             return resolved
 
-        tokens = [token for token in re.split(r"[\s.\-_/]+", key_full) if token]
-        base = tokens[0] if tokens else None
-        if base:
-            return pick(self._base_map.get(base, []))
+        if allow_base_fallback:
+            tokens = [token for token in re.split(r"[\s.\-_/]+", key_full) if token]
+            base = tokens[0] if tokens else None
+            if base:
+                resolved = pick(self._base_map.get(base, []))
+                if resolved is not None:
+                    return resolved
+
+        if self._fuzzy_max_distance:
+            folded = skeleton(key_full)
+            key = (folded, self._fuzzy_max_distance)
+            return pick(self._fuzzy_memo.get_or_compute(key, lambda: self._fuzzy_candidates(folded, key_full)))
 
         return None
+
+    def _fuzzy_candidates(self, folded: str, model_str: str) -> list[int]:
+        """
+        Triplets of the catalog model closest to ``folded``; empty when none is close enough
+        or several different models are equally close.
+        """
+        max_distance = min(self._fuzzy_max_distance, len(folded) // FUZZY_CHARS_PER_EDIT)
+        if exact := self._skeleton_map.get(folded):
+            # Differs from a catalog model only by case, lookalike letters or separators
+            return exact
+        if max_distance == 0:
+            return []
+        if self._fuzzy_index is None:
+            self._fuzzy_index = NGramIndex(self._skeleton_map)
+        matches = self._fuzzy_index.search(folded, max_distance)
+        if not matches or (len(matches) > 1 and matches[1][0] == matches[0][0]):
+            return []
+        distance, match = matches[0]
+        logger.debug("Model %r matched %r at distance %s", model_str, match, distance)
+        return self._skeleton_map[match]
@@ -1,9 +1,11 @@
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Optional
+from typing import Optional, Sequence
 import re
+import numpy as np
 import pandas as pd
 
-from app.core.dataclasses import TripIndex, Triplets
+from app.core.dataclasses import TripCatalog, TripIndex, Triplets
 from app.core.enums import ExcelColumns
 from app.settings import (
     BRAND_MODEL_COLUMNS,
@@ -11,28 +13,15 @@ from app.settings import (
     KEYWORDS_MAX_LEN,
     ALLOWED_LANGUAGES
 )
-from app.utils.finder import (
-    pair_regex_both,
-    token_to_regex,
-)
-
-
-@lru_cache(maxsize=4096)
-def _compile_pair_patterns(
-        ua_brand: str, ua_model: str,
-        ru_brand: str, ru_model: str,
-        en_brand: str, en_model: str,
-):
-    return {
-        "ua": pair_regex_both(ua_brand, ua_model),
-        "ru": pair_regex_both(ru_brand, ru_model),
-        "en": pair_regex_both(en_brand, en_model),
-    }
+from app.utils.brand_model_matcher import BrandModelMatcher, FoldedText, fold, skeleton_pattern, text_key
+from app.utils.finder import token_to_regex
+from app.utils.lru_memo import LruMemo, MemoInfo, ProcessLocalCaches
 
 
 def _replace_pair_once(
         text: str,
-        patterns: dict,
+        matcher: BrandModelMatcher,
+        src_trip: dict,
         dst_brand: str,
         dst_model: str,
         force_brand_first: bool = True
@@ -40,21 +29,28 @@ def _replace_pair_once(
     if not text:
         return text
     for language in ALLOWED_LANGUAGES:
-        regex_brand_model, regex_model_brand = patterns[language]
-        match = regex_brand_model.search(text)
-        order = "bm"
-        if not match:
-            match = regex_model_brand.search(text)
-            order = "mb"
+        match = matcher.find_pair(text, src_trip[language]["brand"], src_trip[language]["model"])
         if not match:
             continue
-        sep = match.groupdict().get("sep") or " "
+        sep = match.sep or " "
         repl = f"{dst_brand}{sep}{dst_model}" if not (
-                order == "mb" and not force_brand_first) else f"{dst_model}{sep}{dst_brand}"
-        return text[:match.start()] + repl + text[match.end():]
+                match.order == "mb" and not force_brand_first) else f"{dst_model}{sep}{dst_brand}"
+        if text[match.start:match.end] == repl:
+            # Already spelled like the destination (e.g. an original row): nothing to rewrite
+            return text
+        return text[:match.start] + repl + text[match.end:]
     return text
 
 
+def _pair_key(trip: dict) -> tuple:
+    """Hashable identity of a triplet's brand/model values, used in memo keys."""
+    return tuple((trip[lang]["brand"], trip[lang]["model"]) for lang in ALLOWED_LANGUAGES)
+
+
+def _models_key(trip: dict) -> tuple:
+    return tuple(trip[lang]["model"] for lang in ALLOWED_LANGUAGES)
+
+
 @lru_cache(maxsize=4096)
 def _compile_model_regex(model_str: str) -> Optional[re.Pattern]:
     """Compile a regex to match a specific model name with word boundaries."""
@@ -64,12 +60,129 @@ def _compile_model_regex(model_str: str) -> Optional[re.Pattern]:
     return re.compile(pat, flags=re.IGNORECASE | re.UNICODE)
 
 
-class _KeywordNormalizer:
-    _CYRILLIC_RANGE = re.compile(r"[А-Яа-яЁёІіЇїЄєҐґ]")
+def model_regex_cache_info():
+    """Hit/miss counters of the model regex cache, shared by every transformer of this process."""
+    return _compile_model_regex.cache_info()
 
-    @staticmethod
-    def _contains_cyrillic(text: str) -> bool:
-        return bool(_KeywordNormalizer._CYRILLIC_RANGE.search(text))
+
+_CYRILLIC_RANGE = re.compile(r"[А-Яа-яЁёІіЇїЄєҐґ]")
+
+_KEYWORD_SEPARATOR = re.compile(r"\s*,\s*")
+
+# A keyword part split into the text before the source model, the language it matched in
+# and the text after it; parts without the model are kept as (part, None, "")
+_KeywordPart = tuple[str, Optional[str], str]
+
+
+@dataclass(frozen=True)
+class FastPathInfo:
+    """Cells each path looked at and how many of them the literal prefilter settled without a search."""
+    brand_model_cells: int
+    brand_model_skipped: int
+    keyword_cells: int
+    keyword_skipped: int
+
+
+@lru_cache(maxsize=65536)
+def _contains_cyrillic(text: str) -> bool:
+    return bool(_CYRILLIC_RANGE.search(text))
+
+
+@lru_cache(maxsize=65536)
+def _fold_part(part: str) -> Optional[FoldedText]:
+    return fold(part)
+
+
+@lru_cache(maxsize=16384)
+def _cell_key(text: str) -> Optional[str]:
+    return text_key(text)
+
+
+def _keyword_parts(raw_str: str) -> list[str]:
+    parts = (p.strip() for p in _KEYWORD_SEPARATOR.split(raw_str))
+    return [p for p in parts if p]
+
+
+class _KeywordMatcher:
+    """
+    Finds a source triplet's model in keyword parts, in whichever language it is spelled.
+
+    Latin parts try the languages EN first, parts with Cyrillic start with the cell's
+    Cyrillic language; the first language whose model occurs wins. Models are looked up as
+    ``skeleton_pattern`` literals in the folded part; the ``_compile_model_regex`` search is
+    only used for models and parts the skeleton form is not exact for. Languages spelling
+    the model the same way share one search.
+    """
+
+    def __init__(self, models: tuple[str, ...]) -> None:
+        self._models = {lang: model.strip() or None for lang, model in zip(ALLOWED_LANGUAGES, models)}
+        self._patterns = {lang: skeleton_pattern(model) if model else None for lang, model in self._models.items()}
+        keys = [pattern.key if pattern else None for lang, pattern in self._patterns.items() if self._models[lang]]
+        # Keys one of which the folded cell contains if any of its parts matches; None if a model has no pattern
+        self.keys: Optional[tuple[str, ...]] = tuple(dict.fromkeys(keys)) if None not in keys else None
+        self._orders = {
+            lang: (lang,) + tuple(other for other in ALLOWED_LANGUAGES if other != lang)
+            for lang in ALLOWED_LANGUAGES
+        }
+
+    def prepare(self) -> None:
+        """Compile the regexes of the models that have no skeleton pattern."""
+        for lang, model in self._models.items():
+            if model is not None and self._patterns[lang] is None:
+                _compile_model_regex(model)
+
+    def _search(self, part: str, folded: Optional[FoldedText], lang: str) -> Optional[tuple[int, int]]:
+        pattern = self._patterns[lang]
+        if pattern is not None and folded is not None:
+            return folded.search(pattern)
+        match = _compile_model_regex(self._models[lang]).search(part)
+        return match.span() if match else None
+
+    def split(self, part: str, cyrillic_lang: str) -> _KeywordPart:
+        folded = _fold_part(part)
+        searched: dict[str, Optional[tuple[int, int]]] = {}
+        for lang in self._orders[cyrillic_lang if _contains_cyrillic(part) else "en"]:
+            model = self._models[lang]
+            if model is None:
+                continue
+            if model not in searched:
+                searched[model] = self._search(part, folded, lang)
+            span = searched[model]
+            if span:
+                return part[:span[0]], lang, part[span[1]:]
+        return part, None, ""
+
+
+@lru_cache(maxsize=4096)
+def _keyword_matcher(models: tuple[str, ...]) -> _KeywordMatcher:
+    """Matcher for the model names of one source triplet, aligned with ``ALLOWED_LANGUAGES``."""
+    return _KeywordMatcher(models)
+
+
+class _KeywordNormalizer(ProcessLocalCaches):
+    _local_caches = {"_split_parts": ("_split_parts_uncached", "_parts_cache_size")}
+
+    def __init__(
+            self,
+            memo: Optional[LruMemo] = None,
+            parts_cache_size: int = 1024,
+            catalog: Optional[TripCatalog] = None,
+    ) -> None:
+        self._memo = memo
+        self._catalog = catalog
+        self.cells = 0
+        self.skipped = 0
+        self._parts_cache_size = parts_cache_size
+        self._reset_local_caches()
+
+    def _models_id(self, trip: dict):
+        """Cache key of a triplet's models: its ``models_class`` ID, or the models of a dict from elsewhere."""
+        trip_id = self._catalog.id_of(trip) if self._catalog is not None else None
+        return _models_key(trip) if trip_id is None else self._catalog.models_class[trip_id]
+
+    def _models(self, trip: dict) -> tuple[str, ...]:
+        trip_id = self._catalog.id_of(trip) if self._catalog is not None else None
+        return _models_key(trip) if trip_id is None else self._catalog.models[trip_id]
 
     @staticmethod
     def _truncate_join(parts: list[str], limit: int, sep: str = ", ") -> str:
@@ -83,11 +196,10 @@ class _KeywordNormalizer:
             total += add
         return sep.join(out)
 
-    def normalize_cell(
+    def normalize_text(
             self,
-            row: pd.Series,
+            raw,
             *,
-            column: str,
             src_trip: dict,
             dst_trip: dict,
             cyrillic_lang: str,
@@ -95,45 +207,104 @@ class _KeywordNormalizer:
             deduplicate: bool = True,
             drop_unchanged: bool = KEYWORDS_DROP_UNCHANGED,
             max_len: int = KEYWORDS_MAX_LEN,
-    ) -> pd.Series:
-        if column not in row.index:
-            return row
-
-        raw = row.get(column)
+    ):
+        """Normalize a single keywords cell value; empty values are returned as is."""
         if raw is None or (isinstance(raw, float) and pd.isna(raw)):
-            return row
+            return raw
 
         raw_str = str(raw).strip()
         if not raw_str:
-            return row
+            return raw
+
+        self.cells += 1
+        if self._cannot_match(raw_str, src_trip):
+            # No part holds the source model, so the result does not depend on the triplets
+            self.skipped += 1
+            parts = tuple((p, None, "") for p in _keyword_parts(raw_str))
+            key = ("keywords", raw_str, None, None, None, sep_out, deduplicate, drop_unchanged, max_len)
+
+            def compute() -> str:
+                return self._join(parts, dst_trip, sep_out, deduplicate, drop_unchanged, max_len)
+        else:
+            key = ("keywords", raw_str, self._models_id(src_trip), self._models_id(dst_trip),
+                   cyrillic_lang, sep_out, deduplicate, drop_unchanged, max_len)
+
+            def compute() -> str:
+                parts = self._split_parts(raw_str, self._models(src_trip), cyrillic_lang)
+                return self._join(parts, dst_trip, sep_out, deduplicate, drop_unchanged, max_len)
+
+        if self._memo is None:
+            return compute()
+        return self._memo.get_or_compute(key, compute)
+
+    def _cannot_match(self, raw_str: str, src_trip: dict) -> bool:
+        """True if the folded cell contains none of the source models, so no part can match."""
+        keys = _keyword_matcher(self._models(src_trip)).keys
+        if keys is None:
+            return False
+        folded = _cell_key(raw_str)
+        return folded is not None and not any(key in folded for key in keys)
+
+    def normalize_values(
+            self,
+            values: np.ndarray,
+            positions: Sequence[int],
+            *,
+            src_trips: Sequence[Optional[dict]],
+            dst_trips: Sequence[Optional[dict]],
+            cyrillic_lang: str,
+    ) -> None:
+        """
+        Normalize ``values[i]`` in place for every ``i`` in ``positions``, like ``normalize_text``.
+
+        Values repeated with the same source and destination models are normalized once
+        per call.
+        """
+        done: dict[tuple, str] = {}
+        for i in positions:
+            raw = values[i]
+            if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+                continue
+            raw_str = str(raw).strip()
+            if not raw_str:
+                continue
+            src_trip = src_trips[i]
+            dst_trip = dst_trips[i] or src_trip
+            key = (raw_str, self._models_id(src_trip), self._models_id(dst_trip))
+            result = done.get(key)
+            if result is None:
+                result = done[key] = self.normalize_text(
+                    raw_str, src_trip=src_trip, dst_trip=dst_trip, cyrillic_lang=cyrillic_lang,
+                )
+            values[i] = result
+
+    @staticmethod
+    def _split_parts_uncached(raw_str: str, models: tuple[str, ...], cyrillic_lang: str) -> tuple[_KeywordPart, ...]:
+        """
+        Split a keywords cell into parts and locate the source ``models`` in each.
+
+        Independent of the destination, so the original and every mirror of a row share
+        the cached result.
+        """
+        matcher = _keyword_matcher(models)
+        return tuple(matcher.split(p, cyrillic_lang) for p in _keyword_parts(raw_str))
 
-        parts = [p.strip() for p in re.split(r"\s*,\s*", raw_str) if p.strip()]
+    def _join(
+            self,
+            parts: Sequence[_KeywordPart],
+            dst_trip: dict,
+            sep_out: str,
+            deduplicate: bool,
+            drop_unchanged: bool,
+            max_len: int,
+    ) -> str:
         out, seen = [], set()
 
-        for p in parts:
-            new_p = p
-            changed = False
-
-            # Determine preferred language order based on the text:
-            # - All-Latin text → try EN first (avoids lookalike Cyrillic matches)
-            # - Has Cyrillic → try cyrillic_lang first
-            # Use the MATCHED language for replacement so model names
-            # stay in their original script.
-            if self._contains_cyrillic(p):
-                lang_order = [cyrillic_lang] + [l for l in ALLOWED_LANGUAGES if l != cyrillic_lang]
-            else:
-                lang_order = ["en"] + [l for l in ALLOWED_LANGUAGES if l != "en"]
-
-            for lang in lang_order:
-                src_model_str = src_trip[lang]["model"]
-                rx = _compile_model_regex(src_model_str)
-                if rx:
-                    m = rx.search(p)
-                    if m:
-                        dst_model_str = dst_trip[lang]["model"]
-                        new_p = p[:m.start()] + dst_model_str + p[m.end():]
-                        changed = True
-                        break
+        # The model is replaced in the language it matched in, so it keeps its script
+        # (see ``_KeywordMatcher`` for the order languages are tried in)
+        for head, lang, tail in parts:
+            changed = lang is not None
+            new_p = head + dst_trip[lang]["model"] + tail if changed else head
 
             if drop_unchanged and not changed:
                 continue
@@ -146,40 +317,130 @@ class _KeywordNormalizer:
 
             out.append(new_p)
 
-        row[column] = self._truncate_join(out, max_len, sep=sep_out)
+        return self._truncate_join(out, max_len, sep=sep_out)
+
+    def normalize_cell(
+            self,
+            row: pd.Series,
+            *,
+            column: str,
+            src_trip: dict,
+            dst_trip: dict,
+            cyrillic_lang: str,
+            sep_out: str = ", ",
+            deduplicate: bool = True,
+            drop_unchanged: bool = KEYWORDS_DROP_UNCHANGED,
+            max_len: int = KEYWORDS_MAX_LEN,
+    ) -> pd.Series:
+        if column not in row.index:
+            return row
+
+        row[column] = self.normalize_text(
+            row.get(column),
+            src_trip=src_trip,
+            dst_trip=dst_trip,
+            cyrillic_lang=cyrillic_lang,
+            sep_out=sep_out,
+            deduplicate=deduplicate,
+            drop_unchanged=drop_unchanged,
+            max_len=max_len,
+        )
         return row
 
 
 class RowTransformer:
-    def __init__(self, trip_index: TripIndex, triplets: Triplets) -> None:
+    """
+    Rewrites brand/model mentions and keywords of a row for its destination pair.
+
+    Cell results are memoized in a bounded LRU keyed by the cell text and the source and
+    destination values, shared by the brand/model and keyword paths; repeated titles and
+    descriptions become dictionary lookups.
+    """
+
+    def __init__(self, trip_index: TripIndex, triplets: Triplets, memo_size: int = 16384) -> None:
         self._trip_index = trip_index
         self._triplets = triplets
-        self._kw = _KeywordNormalizer()
+        self._catalog = triplets.catalog
+        self._memo = LruMemo(maxsize=memo_size)
+        self._kw = _KeywordNormalizer(memo=self._memo, catalog=self._catalog)
+        self._matcher = BrandModelMatcher(triplets.raw)
+        # Skeleton keys of every source pair (see ``_cannot_match``), by ``_pair_id``
+        self._required_keys: dict = {}
+        self._cells = 0
+        self._skipped = 0
+
+    def memo_info(self) -> MemoInfo:
+        """Hits, misses, size and approximate memory of the cell memo."""
+        return self._memo.info()
+
+    def clear_memo(self) -> None:
+        self._memo.clear()
+
+    def fast_path_info(self) -> FastPathInfo:
+        """Cells looked at and cells the literal prefilter ruled out, for brand/model and keyword columns."""
+        return FastPathInfo(
+            brand_model_cells=self._cells,
+            brand_model_skipped=self._skipped,
+            keyword_cells=self._kw.cells,
+            keyword_skipped=self._kw.skipped,
+        )
+
+    def prepare(self, trip: dict) -> None:
+        """
+        Compile the brand/model and keyword patterns of a source triplet ahead of the first
+        row that needs them. The compiled patterns are shared by every transformer in the process.
+        """
+        for lang in ALLOWED_LANGUAGES:
+            self._matcher.prepare(trip[lang]["brand"], trip[lang]["model"])
+        _keyword_matcher(_models_key(trip)).prepare()
 
     def _get_src_trip(self, src_brand: str, src_model: str) -> dict | None:
         return self._trip_index.get_pair(src_brand, src_model)
 
-    def _replace_brand_model_in_col(
+    def _pair_id(self, trip: dict):
+        """Memo key of a triplet's brands and models: its ``pair_class`` ID, or the values of a dict from elsewhere."""
+        trip_id = self._catalog.id_of(trip)
+        return _pair_key(trip) if trip_id is None else self._catalog.pair_class[trip_id]
+
+    def _cannot_match(self, text: str, src_trip: dict) -> bool:
+        """
+        True if the folded text contains no spelling of the source pair in any language,
+        so ``_replace_pair_once`` would return it unchanged.
+        """
+        pair_id = self._pair_id(src_trip)
+        if pair_id not in self._required_keys:
+            self._required_keys[pair_id] = self._pair_required_keys(src_trip)
+        keys = self._required_keys[pair_id]
+        if keys is None:
+            return False
+        folded = _cell_key(text)
+        return folded is not None and not any(key in folded for key in keys)
+
+    def _pair_required_keys(self, src_trip: dict) -> Optional[tuple[str, ...]]:
+        keys: list[str] = []
+        for lang in ALLOWED_LANGUAGES:
+            lang_keys = self._matcher.required_keys(src_trip[lang]["brand"], src_trip[lang]["model"])
+            if lang_keys is None:
+                return None
+            keys.extend(lang_keys)
+        return tuple(dict.fromkeys(keys))
+
+    def get_src_trip(self, src_brand: str, src_model: str) -> dict | None:
+        """Public lookup of the source triplet used by column-wise callers."""
+        return self._get_src_trip(src_brand, src_model)
+
+    def replace_brand_model_text(
             self,
-            row: pd.Series,
+            txt,
             *,
-            column: str,
             src_trip: dict,
             dst_pair: Optional[dict],
             dst_lang: str,
             force_brand_first: bool = True,
-    ) -> pd.Series:
-        if column not in row:
-            return row
-        txt = row.get(column)
+    ) -> str:
+        """Replace the source brand/model pair in a single cell value."""
         txt = "" if pd.isna(txt) else str(txt)
 
-        patterns = _compile_pair_patterns(
-            src_trip["ua"]["brand"], src_trip["ua"]["model"],
-            src_trip["ru"]["brand"], src_trip["ru"]["model"],
-            src_trip["en"]["brand"], src_trip["en"]["model"],
-        )
-
         if dst_pair:
             dst_brand = dst_pair[dst_lang]["brand"]
             dst_model = dst_pair[dst_lang]["model"]
@@ -187,7 +448,37 @@ class RowTransformer:
             dst_brand = src_trip[dst_lang]["brand"]
             dst_model = src_trip[dst_lang]["model"]
 
-        row[column] = _replace_pair_once(txt, patterns, dst_brand, dst_model, force_brand_first)
+        if not txt:
+            return txt
+        self._cells += 1
+        if self._cannot_match(txt, src_trip):
+            self._skipped += 1
+            return txt
+        key = ("brand_model", txt, self._pair_id(src_trip), dst_brand, dst_model, force_brand_first)
+        return self._memo.get_or_compute(
+            key,
+            lambda: _replace_pair_once(txt, self._matcher, src_trip, dst_brand, dst_model, force_brand_first),
+        )
+
+    def _replace_brand_model_in_col(
+            self,
+            row: pd.Series,
+            *,
+            column: str,
+            src_trip: dict,
+            dst_pair: Optional[dict],
+            dst_lang: str,
+            force_brand_first: bool = True,
+    ) -> pd.Series:
+        if column not in row:
+            return row
+        row[column] = self.replace_brand_model_text(
+            row.get(column),
+            src_trip=src_trip,
+            dst_pair=dst_pair,
+            dst_lang=dst_lang,
+            force_brand_first=force_brand_first,
+        )
         return row
 
     def apply_all(
@@ -233,3 +524,49 @@ class RowTransformer:
             )
 
         return row
+
+    def apply_all_columns(
+            self,
+            columns: dict[str, np.ndarray],
+            *,
+            src_trips: Sequence[Optional[dict]],
+            dst_pairs: Sequence[Optional[dict]],
+    ) -> None:
+        """
+        Column-wise counterpart of ``apply_all``.
+
+        ``columns`` maps column names to object arrays that are updated in place;
+        ``src_trips`` and ``dst_pairs`` are aligned with the array positions.
+        Rows without a source triplet are left untouched, exactly like ``apply_all``.
+        """
+        positions = [i for i, trip in enumerate(src_trips) if trip]
+        if not positions:
+            return
+
+        for col, lang in BRAND_MODEL_COLUMNS:
+            values = columns.get(col)
+            if values is None:
+                continue
+            for i in positions:
+                values[i] = self.replace_brand_model_text(
+                    values[i],
+                    src_trip=src_trips[i],
+                    dst_pair=dst_pairs[i],
+                    dst_lang=lang,
+                    force_brand_first=True,
+                )
+
+        for col, cyrillic_lang in (
+                (ExcelColumns.KEYWORDS_RU.value, "ru"),
+                (ExcelColumns.KEYWORDS_UA.value, "ua"),
+        ):
+            values = columns.get(col)
+            if values is None:
+                continue
+            self._kw.normalize_values(
+                values,
+                positions,
+                src_trips=src_trips,
+                dst_trips=dst_pairs,
+                cyrillic_lang=cyrillic_lang,
+            )
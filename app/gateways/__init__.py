@@ -1,3 +1,3 @@
 from .compatibility_provider import CompatibilityProvider
-from .excel import ExcelGateway
+from .excel import ExcelGateway, ExcelChunkWriter, StreamingExcelGateway
 from .trip_data_prodiver import TripDataProvider
@@ -1,4 +1,4 @@
-from typing import Protocol
+from typing import ContextManager, Iterator, Optional, Protocol, Sequence
 from pandas import DataFrame
 
 
@@ -10,3 +10,36 @@ class ExcelGateway(Protocol):
     def write(self, df: DataFrame, path: str, sheet: str) -> None:
         """Writes a DataFrame to an Excel file."""
         pass
+
+    @property
+    def output_suffix(self) -> str:
+        """File suffix of the written outputs, e.g. ".xlsx" or ".csv"."""
+        pass
+
+
+class ExcelChunkWriter(ContextManager, Protocol):
+    def append(self, df: DataFrame) -> None:
+        """Appends DataFrame rows to the output."""
+        pass
+
+    def close(self) -> None:
+        """Finishes the output; closing twice is a no-op."""
+        pass
+
+
+class StreamingExcelGateway(ExcelGateway, Protocol):
+    def iter_read(self, path: str, sheet: str, chunk_rows: int) -> Iterator[DataFrame]:
+        """Reads an Excel sheet lazily in DataFrame chunks."""
+        pass
+
+    def count_rows(self, path: str, sheet: str) -> Optional[int]:
+        """Returns the number of data rows in a sheet if it can be known cheaply, else None."""
+        pass
+
+    def read_columns(self, path: str, sheet: str, columns: Sequence[str]) -> DataFrame:
+        """Reads only the named columns of an Excel sheet."""
+        pass
+
+    def open_writer(self, path: str, sheet: str, columns: Optional[Sequence] = None) -> ExcelChunkWriter:
+        """Opens a writer that appends DataFrame chunks to an Excel file."""
+        pass
@@ -22,7 +22,7 @@ def main() -> None:
     setup_logging("DEBUG")
 
     with Timer("Triplets: load + index"):
-        trip_provider: TripDataProvider = ResourceTripDataProvider()
+        trip_provider: TripDataProvider = ResourceTripDataProvider(use_snapshot=cfg.use_catalog_snapshot)
         triplets = trip_provider.load_triplets()
         logger.debug("Triplets types: %s", Counter(type(x).__name__ for x in triplets.raw))
         trip_index = trip_provider.build_index(triplets)
@@ -33,7 +33,7 @@ def main() -> None:
         logger.info(f"Input rows: {len(df)}")
 
     transformer = RowTransformer(trip_index=trip_index, triplets=triplets)
-    resolver = ModelBrandResolver(triplets.raw)
+    resolver = trip_provider.build_resolver(triplets) if hasattr(trip_provider, 'build_resolver') else ModelBrandResolver(triplets.raw)
     filtered_groups = trip_provider.load_filtered_groups() if hasattr(trip_provider, 'load_filtered_groups') else {}
     # Set include_record_type=True to add RECORD_TYPE column to distinguish original vs mirror rows
     builder = MirrorBuilder(
@@ -43,7 +43,7 @@ def main() -> None:
         include_record_type=False,
         filtered_groups=filtered_groups,
     )
-    processor = DataFrameProcessor(builder=builder)
+    processor = DataFrameProcessor(builder=builder, engine=cfg.processing_engine)
 
     with Timer("Process: build originals + mirrors"):
         result_df = processor.process(df)
@@ -1,2 +1,5 @@
+from .progress import OperationCancelled, ProgressContext
 from .data_frame_processor import DataFrameProcessor
 from .excel_file_pipeline import ExcelFilePipeline
+from .run_report import FanOutEstimate, PipelineResult, RunReport
+from .catalog_warm_up import warm_up_catalog
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from app.core.services import RowTransformer
+from app.gateways import TripDataProvider
+from app.pipelines.progress import ProgressContext
+
+
+def warm_up_catalog(provider: TripDataProvider, context: Optional[ProgressContext] = None) -> int:
+    """
+    Load the catalog from ``provider`` and compile the patterns of every triplet; returns
+    the number of triplets.
+
+    With a ``PreloadedTripDataProvider`` the loaded catalog is kept for later runs, and the
+    compiled patterns live in process-wide caches, so a pipeline run started afterwards in
+    this process skips both. Progress and cancellation go through ``context`` per triplet.
+    """
+    context = context or ProgressContext()
+    triplets = provider.load_triplets()
+    trip_index = provider.build_index(triplets)
+    if hasattr(provider, "build_resolver"):
+        provider.build_resolver(triplets)
+    if hasattr(provider, "load_filtered_groups"):
+        provider.load_filtered_groups()
+
+    transformer = RowTransformer(trip_index=trip_index, triplets=triplets)
+    total = len(triplets.raw)
+    for done, trip in enumerate(triplets.raw, 1):
+        transformer.prepare(trip)
+        context.report(done, total)
+    return total
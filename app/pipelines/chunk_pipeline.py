@@ -0,0 +1,132 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+from app.pipelines.progress import ProgressContext
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# Seconds between stop/cancellation checks while a stage waits on a full or empty queue
+_POLL_INTERVAL = 0.1
+
+# Put after the last chunk
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage has failed or the run was cancelled."""
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    while True:
+        if stop.is_set():
+            raise _Stopped
+        try:
+            q.put(item, timeout=_POLL_INTERVAL)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: queue.Queue, stop: threading.Event, check: Callable[[], None] = lambda: None):
+    while True:
+        if stop.is_set():
+            raise _Stopped
+        try:
+            return q.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            check()
+
+
+@contextmanager
+def closing_iterator(iterator: Iterator[T]) -> Iterator[Iterator[T]]:
+    """
+    Close ``iterator`` on leaving the block if it can be closed (generators can), so a
+    reader that was not run to the end releases its file right away.
+    """
+    try:
+        yield iterator
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def run_chunk_pipeline(
+        chunks: Iterator[T],
+        build: Callable[[T], U],
+        write: Callable[[U], None],
+        depth: int,
+        context: ProgressContext,
+) -> None:
+    """
+    Read, build and write chunks concurrently: ``chunks`` is consumed by a reader thread,
+    ``build`` runs in the calling thread and ``write`` in a writer thread.
+
+    The stages are joined by FIFO queues of at most ``depth`` chunks, so a stage that
+    runs ahead blocks instead of piling chunks up in memory, and chunks are written in
+    the order they were read. The first error of any stage stops the others and is raised
+    here once they have finished their current chunk; so is ``OperationCancelled``.
+    ``chunks`` is closed by the reader thread when it stops, read to the end or not.
+    """
+    if depth < 1:
+        raise ValueError(f"depth must be >= 1, got {depth}")
+    read_queue: queue.Queue = queue.Queue(maxsize=depth)
+    write_queue: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def fail(error: BaseException) -> None:
+        errors.append(error)
+        stop.set()
+
+    def read_all() -> None:
+        try:
+            with closing_iterator(chunks):
+                for chunk in chunks:
+                    _put(read_queue, chunk, stop)
+            _put(read_queue, _DONE, stop)
+        except _Stopped:
+            pass
+        except BaseException as exc:
+            fail(exc)
+
+    def write_all() -> None:
+        try:
+            while True:
+                built = _get(write_queue, stop)
+                if built is _DONE:
+                    return
+                write(built)
+        except _Stopped:
+            pass
+        except BaseException as exc:
+            fail(exc)
+
+    reader = threading.Thread(target=read_all, name="chunk-reader", daemon=True)
+    writer = threading.Thread(target=write_all, name="chunk-writer", daemon=True)
+    reader.start()
+    writer.start()
+    try:
+        while True:
+            chunk = _get(read_queue, stop, context.check)
+            if chunk is _DONE:
+                break
+            _put(write_queue, build(chunk), stop)
+        _put(write_queue, _DONE, stop)
+        while writer.is_alive():
+            writer.join(_POLL_INTERVAL)
+            context.check()
+    except _Stopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        stop.set()
+        reader.join()
+        writer.join()
+    if errors:
+        raise errors[0]
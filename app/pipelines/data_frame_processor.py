@@ -1,23 +1,215 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+from app.core.enums import ProcessingEngines
 from app.core.services.mirror_builder import MirrorBuilder
+from app.pipelines.progress import OperationCancelled, ProgressContext
+from app.pipelines.row_result_cache import RowResultCache
+
+# Shards per worker: more shards even out rows with large fan-out
+_SHARDS_PER_WORKER = 4
+
+# Rows per columnar batch when a progress context is given: the cancellation granularity
+_COLUMNAR_BATCH_ROWS = 500
+
+# Seconds between cancellation checks while waiting for a shard
+_POLL_INTERVAL = 0.1
+
+# Rows a frame needs before worker processes are started for it: below that, starting
+# them and shipping the builder costs more than the build itself
+_MIN_PARALLEL_ROWS = 5000
+
+# Set once per worker process by _init_worker (inherited on fork, unpickled once on spawn)
+_worker_processor: Optional["DataFrameProcessor"] = None
+_worker_context: Optional[ProgressContext] = None
+
+
+def _init_worker(builder: MirrorBuilder, engine: str, cancel_event) -> None:
+    global _worker_processor, _worker_context
+    _worker_processor = DataFrameProcessor(builder=builder, engine=engine)
+    _worker_context = ProgressContext(cancel_event=cancel_event)
+
+
+def _build_shard(shard: DataFrame) -> Optional[DataFrame]:
+    # Stops between rows (batches for the columnar engine) once the run is cancelled
+    return _worker_processor._build(shard, infer_types=False, context=_worker_context)
 
 
 class DataFrameProcessor:
-    def __init__(self, builder: MirrorBuilder) -> None:
+    def __init__(
+            self,
+            builder: MirrorBuilder,
+            engine: str = ProcessingEngines.ROW.value,
+            workers: int = 1,
+            min_shard_rows: int = 200,
+            min_parallel_rows: int = _MIN_PARALLEL_ROWS,
+            row_cache: Optional[RowResultCache] = None,
+    ) -> None:
         self._builder = builder
+        self._engine = ProcessingEngines(engine)
+        self._workers = max(1, int(workers))
+        self._min_shard_rows = max(1, int(min_shard_rows))
+        self._min_parallel_rows = max(1, int(min_parallel_rows))
+        self._row_cache = row_cache
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cancel_event = None
+        self._sharded = False
+
+    @property
+    def sharded(self) -> bool:
+        """True once rows were built in worker processes, whose caches this process does not see."""
+        return self._sharded
+
+    def _build(
+            self,
+            df: DataFrame,
+            infer_types: bool = True,
+            context: Optional[ProgressContext] = None,
+    ) -> Optional[DataFrame]:
+        if self._engine is ProcessingEngines.COLUMNAR:
+            if context is None or df.empty:
+                return self._builder.build_frame(df, infer_types=infer_types)
+            return self._build_batches(df, infer_types, context)
 
-    def process(self, df: DataFrame) -> DataFrame:
         all_rows: list[pd.Series] = []
-        for _, row in df.iterrows():
+        for done, (_, row) in enumerate(df.iterrows()):
+            if context is not None:
+                context.report(done, len(df))
             built = self._builder.build_rows_for(row)
             all_rows.extend(built)
 
         if not all_rows:
+            return None
+        return pd.DataFrame(all_rows) if infer_types else pd.DataFrame(all_rows, dtype=object)
+
+    def _build_batches(self, df: DataFrame, infer_types: bool, context: ProgressContext) -> DataFrame:
+        """Columnar build in row batches, checking for cancellation between them."""
+        built = []
+        for start in range(0, len(df), _COLUMNAR_BATCH_ROWS):
+            context.report(start, len(df))
+            built.append(self._builder.build_frame(df.iloc[start:start + _COLUMNAR_BATCH_ROWS], infer_types=False))
+        context.report(len(df), len(df))
+        result = pd.concat(built, sort=False)
+        return result.infer_objects() if infer_types else result
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            mp_context = multiprocessing.get_context()
+            self._cancel_event = mp_context.Event()
+            # The builder (catalog, TripIndex, resolver) travels once per worker via initargs
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(self._builder, self._engine.value, self._cancel_event),
+            )
+        return self._pool
+
+    def _build_parallel(
+            self,
+            df: DataFrame,
+            context: Optional[ProgressContext] = None,
+            infer_types: bool = True,
+    ) -> Optional[DataFrame]:
+        """
+        Build shards in worker processes and reassemble them in the original row order.
+
+        Shards come back as object frames and types are inferred once on the whole
+        result, exactly as ``pd.DataFrame(all_rows)`` does in a single process.
+        On cancellation pending shards are dropped, running ones stop at their next row
+        and the pool is abandoned.
+        """
+        n_shards = min(self._workers * _SHARDS_PER_WORKER, math.ceil(len(df) / self._min_shard_rows))
+        bounds = np.linspace(0, len(df), n_shards + 1, dtype=np.int64)
+        shards = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+        pool = self._ensure_pool()
+        self._sharded = True
+        futures = [pool.submit(_build_shard, shard) for shard in shards]
+        built = []
+        done_rows = 0
+        try:
+            for shard, future in zip(shards, futures):
+                if context is not None:
+                    while not wait([future], timeout=_POLL_INTERVAL).done:
+                        context.check()
+                part = future.result()
+                if part is not None:
+                    built.append(part)
+                done_rows += len(shard)
+                if context is not None:
+                    context.report(done_rows, len(df))
+        except OperationCancelled:
+            self._cancel_event.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            raise
+
+        if not built:
+            return None
+        result = pd.concat(built, sort=False)
+        return result.infer_objects() if infer_types else result
+
+    def _build_any(
+            self,
+            df: DataFrame,
+            context: Optional[ProgressContext] = None,
+            infer_types: bool = True,
+    ) -> Optional[DataFrame]:
+        # A running pool (streamed chunks) is reused for any frame worth two shards
+        large = self._pool is not None or len(df) >= self._min_parallel_rows
+        if self._workers > 1 and large and len(df) >= 2 * self._min_shard_rows:
+            return self._build_parallel(df, context, infer_types)
+        return self._build(df, infer_types, context)
+
+    def _build_cached(self, df: DataFrame, context: Optional[ProgressContext] = None) -> DataFrame:
+        """Build only the rows the row cache has no entry for and assemble the rest from it."""
+        cache = self._row_cache
+        keys = cache.row_keys(df)
+        found = cache.lookup(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            miss_df = df.iloc[missing]
+            built = self._build_any(miss_df, context, infer_types=False)
+            miss_keys = [keys[i] for i in missing]
+            entries = cache.split(miss_df, built)
+            cache.store(miss_keys, entries)
+            found.update(zip(miss_keys, entries))
+        return cache.assemble(df, [found[key] for key in keys]).infer_objects()
+
+    def process(self, df: DataFrame, context: Optional[ProgressContext] = None) -> DataFrame:
+        """
+        Build originals and mirrors for ``df``.
+
+        With a ``context`` the build reports progress and stops with ``OperationCancelled``
+        shortly after cancellation is requested.
+        """
+        if self._row_cache is not None and len(df) and df.index.is_unique:
+            result_df = self._build_cached(df, context)
+        else:
+            result_df = self._build_any(df, context)
+
+        if result_df is None:
             return df.copy()
 
-        result_df = pd.DataFrame(all_rows)
         ordered_cols = [c for c in df.columns if c in result_df.columns] + \
                        [c for c in result_df.columns if c not in df.columns]
         return result_df[ordered_cols]
+
+    def close(self) -> None:
+        """Shut down worker processes, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "DataFrameProcessor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,18 +1,45 @@
 import logging
 import tempfile
+import time
+from collections import Counter
+from dataclasses import asdict
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+from pandas import DataFrame, concat
 
 from app.settings import AppConfig
+from app.core.enums import ExcelColumns, OutputSplits
 from app.core.services import (
     RowTransformer,
     MirrorBuilder,
     ModelBrandResolver,
 )
 from app.pipelines import DataFrameProcessor
-from app.gateways import TripDataProvider, ExcelGateway
+from app.pipelines.chunk_pipeline import closing_iterator, run_chunk_pipeline
+from app.pipelines.output_partitions import (
+    DEFAULT_PART_ROWS,
+    OutputPart,
+    PartitionedChunkWriter,
+    remove_previous_parts,
+    write_manifest,
+    write_parts,
+)
+from app.pipelines.progress import ProgressContext
+from app.pipelines.row_result_cache import RowResultCache, catalog_version
+from app.pipelines.run_report import CacheStats, FanOutEstimate, PipelineResult, RunMetrics
+from app.core.dataclasses import Triplets
+from app.gateways import TripDataProvider, ExcelGateway, StreamingExcelGateway
 from app.adapters.trip_data import ResourceTripDataProvider
 from app.adapters.excel import PandasExcelGateway
+from app.adapters.row_cache import SqliteRowCache
+from app.utils.cache_dir import user_cache_dir
+
+# Input rows a dry run builds and writes to estimate output size and run time
+DRY_RUN_SAMPLE_ROWS = 200
+
+# Unresolved compatibility names kept in a dry run estimate
+_UNRESOLVED_SAMPLE = 50
 
 
 class ExcelFilePipeline:
@@ -28,51 +55,515 @@ class ExcelFilePipeline:
         excel_gateway: Optional[ExcelGateway] = None,
         trip_provider: Optional[TripDataProvider] = None,
         include_record_type: bool = False,
+        engine: Optional[str] = None,
     ) -> None:
         self._cfg = cfg or AppConfig()
-        self._excel: ExcelGateway = excel_gateway or PandasExcelGateway()
-        self._trip_provider: TripDataProvider = trip_provider or ResourceTripDataProvider()
+        self._excel: ExcelGateway = excel_gateway or PandasExcelGateway(output_format=self._cfg.output_format)
+        self._trip_provider: TripDataProvider = trip_provider or ResourceTripDataProvider(
+            use_snapshot=self._cfg.use_catalog_snapshot,
+        )
         self._include_record_type = include_record_type
+        self._engine = engine or self._cfg.processing_engine
+
+    @property
+    def output_suffix(self) -> str:
+        """Suffix of the files this pipeline writes; ".xlsx" unless the gateway says otherwise."""
+        return getattr(self._excel, "output_suffix", ".xlsx")
+
+    def process_file(
+        self,
+        input_path: Path,
+        logger: logging.Logger,
+        context: Optional[ProgressContext] = None,
+        output_path: Optional[Path] = None,
+    ) -> Path:
+        return self.run(input_path, logger, context, output_path).output_path
 
-    def process_file(self, input_path: Path, logger: logging.Logger) -> Path:
+    def run(
+        self,
+        input_path: Path,
+        logger: logging.Logger,
+        context: Optional[ProgressContext] = None,
+        output_path: Optional[Path] = None,
+    ) -> PipelineResult:
+        """
+        Process ``input_path`` and return the output path with the run report and, unless the
+        workbook was streamed, the built rows.
+
+        The output goes to ``output_path`` or, by default, to ``<stem>_processed.xlsx`` in the
+        system temp directory (with the gateway's ``output_suffix`` for other output formats).
+        With ``output_split`` the parts go into a folder of that name without the suffix,
+        next to a ``manifest.json`` listing them; the manifest is the returned output path.
+        An unsplit in-memory run whose rows do not fit on one Excel sheet fails before the
+        build.
+
+        The report is also written next to the output as JSON when ``write_run_report`` is set.
+        With a ``context`` every stage reports progress into it and the run stops with
+        ``OperationCancelled`` soon after ``context.cancel()``.
+        """
+        context = context or ProgressContext()
         if not input_path.exists():
             raise FileNotFoundError(f"Input file does not exist: {input_path}")
         if input_path.suffix.lower() != ".xlsx":
             raise ValueError("Only .xlsx files are supported")
+        split, part_rows = self._split_parts()
+        if split is not OutputSplits.NONE and self.output_suffix == ".xlsx" and part_rows > DEFAULT_PART_ROWS:
+            raise ValueError(f"output_part_rows must be at most {DEFAULT_PART_ROWS} for Excel output")
+
+        metrics = RunMetrics()
+
+        # Load trip data, build index and the mirror builder
+        context.set_span(0, 5)
+        triplets, filtered_groups, builder = self._load_builder(metrics)
+        transformer = builder.transformer
+        resolver = builder.resolver
+        row_cache = None
+        if self._cfg.row_cache_mb > 0:
+            with metrics.stage("setup"):
+                row_cache = RowResultCache(
+                    SqliteRowCache(user_cache_dir() / "row-cache.sqlite3", self._cfg.row_cache_mb * 2 ** 20),
+                    catalog_version(triplets, filtered_groups),
+                    self._include_record_type,
+                    fuzzy_distance=self._cfg.fuzzy_model_distance,
+                )
+        processor = DataFrameProcessor(
+            builder=builder,
+            engine=self._engine,
+            workers=self._cfg.workers,
+            min_parallel_rows=self._cfg.min_parallel_rows,
+            row_cache=row_cache,
+        )
+
+        # Write to a temporary output file
+        if output_path is None:
+            tmp_dir = Path(tempfile.gettempdir())
+            out_name = f"{input_path.stem}_processed{self.output_suffix}"
+            out_path = tmp_dir / out_name
+        else:
+            out_path = Path(output_path)
+        # Folder of the parts when the output is split
+        parts_dir = out_path.with_suffix("") if split is not OutputSplits.NONE else None
+        if parts_dir is not None:
+            remove_previous_parts(parts_dir)
+
+        streaming = self._cfg.excel_chunk_rows > 0 and hasattr(self._excel, "iter_read")
+        result_df = None
+        parts: list[OutputPart] = []
+        row_cache_stats: Optional[CacheStats] = None
+        try:
+            with processor:
+                if streaming:
+                    parts = self._process_streaming(
+                        input_path, parts_dir or out_path, processor, builder, metrics, context, logger,
+                    )
+                else:
+                    result_df, parts = self._process_in_memory(
+                        input_path, parts_dir or out_path, processor, builder, metrics, context, logger,
+                    )
+            if self._cfg.workers > 1 and not processor.sharded:
+                logger.info(
+                    "Built in this process: workers start for at least %s rows (min_parallel_rows)",
+                    self._cfg.min_parallel_rows,
+                )
+            if row_cache is not None:
+                row_cache_stats = row_cache.stats(evictions=row_cache.evict())
+        finally:
+            if row_cache is not None:
+                row_cache.close()
+        context.set_span(100, 100)
+        if parts_dir is not None:
+            out_path = write_manifest(
+                parts_dir,
+                parts,
+                input_path=input_path,
+                split=split,
+                output_format=self._cfg.output_format,
+                sheet=self._cfg.sheet_name,
+            )
+            logger.info("Output split by %s into %s parts: %s", split.value, len(parts), parts_dir)
+
+        plan_cache = builder.plan_cache_info()
+        memo = transformer.memo_info()
+        fast_path = transformer.fast_path_info()
+        caches = {
+            "mirror_plan": CacheStats(
+                hits=plan_cache.hits,
+                misses=plan_cache.misses,
+                evictions=max(0, plan_cache.misses - plan_cache.currsize),
+                size=plan_cache.currsize,
+                maxsize=plan_cache.maxsize,
+            ),
+            "cell_memo": CacheStats(
+                hits=memo.hits,
+                misses=memo.misses,
+                evictions=memo.evictions,
+                size=memo.size,
+                maxsize=memo.maxsize,
+            ),
+        }
+        if self._cfg.fuzzy_model_distance > 0:
+            fuzzy = resolver.fuzzy_info()
+            caches["fuzzy_model"] = CacheStats(
+                hits=fuzzy.hits,
+                misses=fuzzy.misses,
+                evictions=fuzzy.evictions,
+                size=fuzzy.size,
+                maxsize=fuzzy.maxsize,
+            )
+        if row_cache_stats is not None:
+            caches["row_cache"] = row_cache_stats
+        report = metrics.report(
+            input_path=input_path,
+            output_path=out_path,
+            engine=self._engine,
+            workers=self._cfg.workers,
+            streaming=streaming,
+            pipeline_depth=self._cfg.pipeline_depth if streaming else 0,
+            output_format=self._cfg.output_format,
+            caches=caches,
+            caches_parent_only=processor.sharded,
+            fast_path=asdict(fast_path),
+            parts=[part.path for part in parts],
+        )
+        for stage in report.stages:
+            logger.info("Stage %s: %.2fs wall, %.2fs CPU", stage.name, stage.wall_s, stage.cpu_s)
+        if report.output_bytes is not None:
+            logger.info("Output: %s, %.1f MiB", self._cfg.output_format, report.output_bytes / 2 ** 20)
+        logger.info(
+            "Unresolved compatibility entries: %s of %s (%s distinct)",
+            report.unresolved_entries, report.compat_entries, report.unresolved_distinct,
+        )
+        logger.info(
+            "Mirror plan cache: %.1f%% hit rate; cell memo: %.1f%% hit rate, ~%.1f MiB",
+            report.caches["mirror_plan"].hit_rate * 100, memo.hit_rate * 100, memo.approx_bytes / 2 ** 20,
+        )
+        logger.info(
+            "Literal prefilter: skipped %s of %s brand/model cells and %s of %s keyword cells",
+            fast_path.brand_model_skipped, fast_path.brand_model_cells,
+            fast_path.keyword_skipped, fast_path.keyword_cells,
+        )
+        if row_cache_stats is not None:
+            logger.info(
+                "Row cache: %s of %s input rows reused (%.1f%%)",
+                row_cache_stats.hits, row_cache_stats.hits + row_cache_stats.misses, row_cache_stats.hit_rate * 100,
+            )
 
-        # Load trip data and build index
-        triplets = self._trip_provider.load_triplets()
-        trip_index = self._trip_provider.build_index(triplets)
+        report_path = None
+        if self._cfg.write_run_report:
+            report_path = report.write_json(out_path.with_name(f"{input_path.stem}_report.json"))
+            logger.info("Run report written to %s", report_path)
+        return PipelineResult(
+            output_path=out_path,
+            report=report,
+            report_path=report_path,
+            frame=result_df,
+            parts=tuple(part.path for part in parts),
+        )
+
+    def dry_run(
+        self,
+        input_path: Path,
+        logger: logging.Logger,
+        context: Optional[ProgressContext] = None,
+        sample_rows: int = DRY_RUN_SAMPLE_ROWS,
+    ) -> FanOutEstimate:
+        """
+        Predict what ``run`` would produce for ``input_path`` without building it.
+
+        Only the brand, model and compatibility columns are read; the mirror plans of every
+        distinct (compatibility, brand, model) are resolved as the build would, which gives
+        the exact output row count and unresolved models. Output size and run time are
+        extrapolated from building and writing the first ``sample_rows`` input rows in this
+        process (0 skips the sample and leaves both estimates None).
+        """
+        context = context or ProgressContext()
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input file does not exist: {input_path}")
+        if input_path.suffix.lower() != ".xlsx":
+            raise ValueError("Only .xlsx files are supported")
+        started = time.perf_counter()
+        metrics = RunMetrics()
 
+        context.set_span(0, 10)
+        _, _, builder = self._load_builder(metrics)
+
+        logger.info("Dry run, reading brand, model and compatibility columns: %s", input_path)
+        context.set_span(10, 50)
+        with metrics.stage("read") as read_stage:
+            df = self._read_plan_columns(input_path)
+
+        context.set_span(50, 70)
+        with metrics.stage("plan"):
+            mirrors = builder.mirror_counts(df)
+        rows_out = len(df) + int(mirrors.sum())
+
+        compat_counts: Counter = Counter()
+        if ExcelColumns.COMPATIBILITY.value in df.columns:
+            compat = df[ExcelColumns.COMPATIBILITY.value]
+            compat_counts.update(compat[compat.notna()].map(str))
+        compat_entries = 0
+        unresolved: Counter = Counter()
+        with metrics.stage("resolve"):
+            for text, rows in compat_counts.items():
+                models = builder.resolved_models(text)
+                compat_entries += rows * len(models)
+                for model, trip_id in models:
+                    if trip_id is None:
+                        unresolved[model] += rows
+
+        est_bytes = est_seconds = None
+        sampled = 0
+        context.set_span(70, 100)
+        if sample_rows > 0 and len(df):
+            sampled, est_bytes, est_seconds = self._sample_cost(input_path, builder, sample_rows, rows_out, context)
+            est_seconds += read_stage.wall_s
+
+        estimate = FanOutEstimate(
+            input_path=str(input_path),
+            rows_in=len(df),
+            rows_out=rows_out,
+            mirrors_per_row={int(k): int(v) for k, v in Counter(mirrors.tolist()).items()},
+            distinct_compat=len(compat_counts),
+            compat_entries=compat_entries,
+            unresolved_entries=sum(unresolved.values()),
+            unresolved_models=[model for model, _ in unresolved.most_common(_UNRESOLVED_SAMPLE)],
+            unresolved_distinct=len(unresolved),
+            output_format=self._cfg.output_format,
+            exceeds_sheet_limit=self.output_suffix == ".xlsx" and rows_out > DEFAULT_PART_ROWS,
+            sample_rows=sampled,
+            est_output_bytes=est_bytes,
+            est_seconds=est_seconds,
+            wall_s=time.perf_counter() - started,
+        )
+        context.set_span(100, 100)
+        logger.info(
+            "Dry run: %s input rows -> %s output rows; %s of %s compatibility entries unresolved (%s distinct)",
+            estimate.rows_in, estimate.rows_out,
+            estimate.unresolved_entries, estimate.compat_entries, estimate.unresolved_distinct,
+        )
+        if est_bytes is not None:
+            logger.info("Estimated output: %.1f MiB %s, ~%.0fs in one process", est_bytes / 2 ** 20,
+                        self._cfg.output_format, est_seconds)
+        return estimate
+
+    def _sample_cost(
+        self,
+        input_path: Path,
+        builder: MirrorBuilder,
+        sample_rows: int,
+        rows_out: int,
+        context: ProgressContext,
+    ) -> tuple[int, int, float]:
+        """
+        Build and write the first ``sample_rows`` input rows and scale their output size and
+        build/write time to ``rows_out`` rows: (input rows sampled, bytes, seconds).
+
+        The size of an empty output (header, styles, container) is measured separately so it
+        is only counted once.
+        """
+        if hasattr(self._excel, "iter_read"):
+            sample = next(iter(self._excel.iter_read(str(input_path), self._cfg.sheet_name, sample_rows)))
+        else:
+            sample = self._excel.read(str(input_path), self._cfg.sheet_name).head(sample_rows)
+        started = time.perf_counter()
+        with DataFrameProcessor(builder=builder, engine=self._engine) as processor:
+            built = processor.process(sample, context)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            empty_path = Path(tmp_dir) / f"empty{self.output_suffix}"
+            self._excel.write(built.iloc[:0], str(empty_path), sheet=self._cfg.sheet_name)
+            sample_path = Path(tmp_dir) / f"sample{self.output_suffix}"
+            written = time.perf_counter()
+            self._excel.write(built, str(sample_path), sheet=self._cfg.sheet_name)
+            finished = time.perf_counter()
+            overhead = empty_path.stat().st_size
+            per_row_bytes = (sample_path.stat().st_size - overhead) / max(1, len(built))
+        per_row_seconds = ((written - started) + (finished - written)) / max(1, len(built))
+        return len(sample), int(overhead + per_row_bytes * rows_out), per_row_seconds * rows_out
+
+    def _load_builder(self, metrics: RunMetrics) -> tuple[Triplets, dict[str, str], MirrorBuilder]:
+        """Load the catalog (triplets, index, resolver, group codes) and set up the mirror builder."""
+        with metrics.stage("load_catalog"):
+            triplets = self._trip_provider.load_triplets()
+            trip_index = self._trip_provider.build_index(triplets)
+            resolver = self._trip_provider.build_resolver(triplets) if hasattr(self._trip_provider, 'build_resolver') else ModelBrandResolver(triplets.raw)
+            filtered_groups = self._trip_provider.load_filtered_groups() if hasattr(self._trip_provider, 'load_filtered_groups') else {}
+            # The provider (and the GUI session) share one resolver: each run takes its own view
+            resolver = resolver.with_fuzzy_distance(self._cfg.fuzzy_model_distance)
+
+        with metrics.stage("setup"):
+            transformer = RowTransformer(trip_index=trip_index, triplets=triplets)
+            builder = MirrorBuilder(
+                transformer=transformer,
+                trip_index=trip_index,
+                resolver=resolver,
+                include_record_type=self._include_record_type,
+                filtered_groups=filtered_groups,
+            )
+        return triplets, filtered_groups, builder
+
+    def _read_plan_columns(self, input_path: Path) -> DataFrame:
+        """The brand, model and compatibility columns of the sheet, all the mirror plans need."""
+        columns = [ExcelColumns.BRAND.value, ExcelColumns.MODEL.value, ExcelColumns.COMPATIBILITY.value]
+        if hasattr(self._excel, "read_columns"):
+            return self._excel.read_columns(str(input_path), self._cfg.sheet_name, columns)
+        if self._cfg.excel_chunk_rows > 0 and hasattr(self._excel, "iter_read"):
+            # Streamed runs keep their memory bound: only these columns of every chunk are kept
+            chunks = self._excel.iter_read(str(input_path), self._cfg.sheet_name, self._cfg.excel_chunk_rows)
+        else:
+            chunks = [self._excel.read(str(input_path), self._cfg.sheet_name)]
+        return concat([chunk[[column for column in columns if column in chunk.columns]] for chunk in chunks])
+
+    def _check_sheet_limit(self, builder: MirrorBuilder, df: DataFrame, metrics: RunMetrics) -> None:
+        """Fail before the build when an unsplit Excel output would not fit on one sheet."""
+        if self._cfg.output_split != OutputSplits.NONE.value or self.output_suffix != ".xlsx":
+            return
+        with metrics.stage("count_rows"):
+            rows = builder.count_output_rows(df)
+        if rows > DEFAULT_PART_ROWS:
+            raise ValueError(
+                f"The output would have {rows} rows, more than the {DEFAULT_PART_ROWS} that fit on an Excel "
+                f"sheet; split it by rows or brand, or write csv/parquet"
+            )
+
+    def _split_parts(self) -> tuple[OutputSplits, int]:
+        return OutputSplits(self._cfg.output_split), self._cfg.output_part_rows or DEFAULT_PART_ROWS
+
+    def _process_in_memory(
+        self,
+        input_path: Path,
+        out_path: Path,
+        processor: DataFrameProcessor,
+        builder: MirrorBuilder,
+        metrics: RunMetrics,
+        context: ProgressContext,
+        logger: logging.Logger,
+    ) -> tuple[DataFrame, list[OutputPart]]:
+        """
+        Read the whole sheet, build all rows, write the result at once and return it with
+        the parts written (none unless the output is split; ``out_path`` is then their folder).
+        """
         # Read Excel input
         logger.info("Reading input Excel: %s", input_path)
-        df = self._excel.read(str(input_path), self._cfg.sheet_name)
+        context.set_span(5, 15)
+        with metrics.stage("read"):
+            df = self._excel.read(str(input_path), self._cfg.sheet_name)
         logger.info("Input rows: %s", len(df))
-
-        # Build processor
-        transformer = RowTransformer(trip_index=trip_index, triplets=triplets)
-        resolver = ModelBrandResolver(triplets.raw)
-        filtered_groups = self._trip_provider.load_filtered_groups() if hasattr(self._trip_provider, 'load_filtered_groups') else {}
-        builder = MirrorBuilder(
-            transformer=transformer,
-            trip_index=trip_index,
-            resolver=resolver,
-            include_record_type=self._include_record_type,
-            filtered_groups=filtered_groups,
-        )
-        processor = DataFrameProcessor(builder=builder)
+        self._check_sheet_limit(builder, df, metrics)
 
         # Process rows
-        logger.info("Building originals and mirrors…")
-        result_df = processor.process(df)
+        logger.info("Building originals and mirrors (%s engine, %s workers)…", self._engine, self._cfg.workers)
+        context.set_span(15, 90)
+        with metrics.stage("build"):
+            result_df = processor.process(df, context)
+        metrics.record_rows(df, result_df, builder.resolved_models)
         logger.info("Output rows: %s", len(result_df))
 
-        # Write to a temporary output file
-        tmp_dir = Path(tempfile.gettempdir())
-        out_name = f"{input_path.stem}_processed.xlsx"
-        out_path = tmp_dir / out_name
         logger.info("Writing output Excel: %s", out_path)
-        self._excel.write(result_df, str(out_path), sheet=self._cfg.sheet_name)
-        return out_path
+        context.set_span(90, 100)
+        split, part_rows = self._split_parts()
+        with metrics.stage("write"):
+            if split is OutputSplits.NONE:
+                self._excel.write(result_df, str(out_path), sheet=self._cfg.sheet_name)
+                return result_df, []
+            parts = write_parts(
+                self._excel,
+                result_df,
+                out_path,
+                split,
+                part_rows,
+                self._cfg.sheet_name,
+                workers=self._cfg.output_writers,
+                context=context,
+            )
+        return result_df, parts
+
+    def _process_streaming(
+        self,
+        input_path: Path,
+        out_path: Path,
+        processor: DataFrameProcessor,
+        builder: MirrorBuilder,
+        metrics: RunMetrics,
+        context: ProgressContext,
+        logger: logging.Logger,
+    ) -> list[OutputPart]:
+        """
+        Read, build and write chunk by chunk so memory stays bounded by the chunk size.
+
+        With ``pipeline_depth`` the next chunks are read and the previous ones written while
+        a chunk is built (see ``run_chunk_pipeline``). Progress is measured against the row
+        count the sheet declares, when it has one. A split output rotates through parts in
+        the ``out_path`` folder as they fill up (see ``PartitionedChunkWriter``); they are
+        returned, or none for an unsplit output.
+        """
+        gateway: StreamingExcelGateway = self._excel  # type: ignore[assignment]
+        chunk_rows = self._cfg.excel_chunk_rows
+        logger.info("Streaming input Excel: %s (chunks of %s rows)", input_path, chunk_rows)
+        logger.info("Writing output Excel: %s", out_path)
+
+        total_rows = gateway.count_rows(str(input_path), self._cfg.sheet_name) \
+            if hasattr(gateway, "count_rows") else None
+        context.set_span(5, 5)
+        chunks = gateway.iter_read(str(input_path), self._cfg.sheet_name, chunk_rows)
+        # Closed on any exit, so the input workbook is not held open until garbage collection
+        with closing_iterator(chunks):
+            with metrics.stage("read"):
+                chunk = next(chunks, None)
+            columns = []
+            if chunk is not None:
+                # The header depends on which rows get mirrors, so plan the whole sheet first;
+                # the plans stay cached for the build
+                with metrics.stage("read"):
+                    plan_df = self._read_plan_columns(input_path)
+                with metrics.stage("plan"):
+                    columns = builder.output_columns(chunk.columns, plan_df)
+
+            pipelined = chunk is not None and self._cfg.pipeline_depth > 0
+
+            def build(input_chunk: DataFrame) -> DataFrame:
+                if total_rows:
+                    context.set_span(
+                        5 + 95 * min(metrics.rows_in, total_rows) / total_rows,
+                        5 + 95 * min(metrics.rows_in + len(input_chunk), total_rows) / total_rows,
+                    )
+                with metrics.stage("build", thread_cpu=pipelined):
+                    result_chunk = processor.process(input_chunk, context)
+                metrics.record_rows(input_chunk, result_chunk, builder.resolved_models)
+                logger.info("Processed rows: %s (output rows: %s)", metrics.rows_in, metrics.rows_out)
+                return result_chunk
+
+            split, part_rows = self._split_parts()
+            if split is OutputSplits.NONE:
+                output = gateway.open_writer(str(out_path), self._cfg.sheet_name, columns=columns)
+            else:
+                output = PartitionedChunkWriter(
+                    gateway, out_path, split, part_rows, self._cfg.sheet_name, columns=columns,
+                )
+            with output as writer:
+                def write(result_chunk: DataFrame) -> None:
+                    with metrics.stage("write", thread_cpu=pipelined):
+                        writer.append(result_chunk)
+
+                if pipelined:
+                    def read_all(first: DataFrame) -> Iterator[DataFrame]:
+                        yield first
+                        while True:
+                            with metrics.stage("read", thread_cpu=True):
+                                following = next(chunks, None)
+                            if following is None:
+                                return
+                            yield following
 
+                    logger.info("Pipelined read/build/write, up to %s chunks between stages", self._cfg.pipeline_depth)
+                    run_chunk_pipeline(read_all(chunk), build, write, self._cfg.pipeline_depth, context)
+                else:
+                    while chunk is not None:
+                        write(build(chunk))
+                        with metrics.stage("read"):
+                            chunk = next(chunks, None)
+                with metrics.stage("write"):
+                    writer.close()
 
+        logger.info("Input rows: %s", metrics.rows_in)
+        logger.info("Output rows: %s", metrics.rows_out)
+        return output.parts if split is not OutputSplits.NONE else []
@@ -0,0 +1,280 @@
+import json
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+from pandas import DataFrame
+
+from app.adapters.excel.writers import EXCEL_MAX_ROWS
+from app.core.enums import ExcelColumns, OutputSplits
+from app.gateways import ExcelChunkWriter, StreamingExcelGateway
+from app.pipelines.progress import OperationCancelled, ProgressContext
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+# Data rows of one part by default: a full worksheet under its header row
+DEFAULT_PART_ROWS = EXCEL_MAX_ROWS - 1
+
+# Seconds between cancellation checks while waiting for a part
+_POLL_INTERVAL = 0.1
+
+_UNSAFE_NAME = re.compile(r"[^\w\-]+")
+
+
+@dataclass(frozen=True)
+class OutputPart:
+    path: Path
+    rows: int
+    # Brand of the rows for brand splits, None for row splits
+    brand: Optional[str] = None
+
+
+class _PartNames:
+    """
+    File names of the parts: ``part-001`` for row splits, the brand made file-name safe
+    for brand splits with ``-2``, ``-3``... for the further parts of a large brand.
+    """
+
+    def __init__(self, directory: Path, suffix: str) -> None:
+        self._directory = directory
+        self._suffix = suffix
+        self._stems: dict[Optional[str], str] = {}
+
+    def path(self, brand: Optional[str], index: int) -> Path:
+        if brand is None:
+            return self._directory / f"part-{index:03d}{self._suffix}"
+        stem = self._stems.get(brand)
+        if stem is None:
+            base = _UNSAFE_NAME.sub("_", brand).strip("_") or "no-brand"
+            stem, n = base, 1
+            taken = {s.casefold() for s in self._stems.values()}
+            while stem.casefold() in taken:
+                n += 1
+                stem = f"{base}_{n}"
+            self._stems[brand] = stem
+        return self._directory / (f"{stem}{self._suffix}" if index == 1 else f"{stem}-{index}{self._suffix}")
+
+
+def _brand_key(value) -> str:
+    return "" if value is None or value != value else str(value).strip()
+
+
+def split_frame(df: DataFrame, split: OutputSplits, max_rows: int) -> list[tuple[Optional[str], DataFrame]]:
+    """
+    Cut ``df`` into (brand, rows) parts of at most ``max_rows`` rows, in output order.
+
+    Brand splits keep brands in the order they first appear and the rows of each brand in
+    their original order; row splits cut ``df`` into consecutive slices.
+    """
+    if max_rows < 1:
+        raise ValueError(f"max_rows must be >= 1, got {max_rows}")
+    groups: list[tuple[Optional[str], DataFrame]] = [(None, df)]
+    if split is OutputSplits.BRAND and ExcelColumns.BRAND.value in df.columns and len(df):
+        keys = df[ExcelColumns.BRAND.value].map(_brand_key)
+        groups = list(df.groupby(keys, sort=False))
+    parts = []
+    for brand, rows in groups:
+        for start in range(0, max(len(rows), 1), max_rows):
+            parts.append((brand, rows.iloc[start:start + max_rows]))
+    return parts
+
+
+def _write_part(gateway, df: DataFrame, path: str, sheet: str) -> None:
+    gateway.write(df, path, sheet=sheet)
+
+
+def write_parts(
+        gateway,
+        df: DataFrame,
+        directory: Path,
+        split: OutputSplits,
+        max_rows: int,
+        sheet: str,
+        workers: int = 1,
+        context: Optional[ProgressContext] = None,
+) -> list[OutputPart]:
+    """
+    Write ``df`` as parts (see ``split_frame``) into ``directory`` through ``gateway.write``.
+
+    With ``workers > 1`` the parts are written by that many processes at once; the
+    gateway is pickled to them. Progress is reported per finished part.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    names = _PartNames(directory, gateway.output_suffix)
+    counts: dict[Optional[str], int] = {}
+    planned = []
+    for brand, rows in split_frame(df, split, max_rows):
+        counts[brand] = counts.get(brand, 0) + 1
+        planned.append((OutputPart(path=names.path(brand, counts[brand]), rows=len(rows), brand=brand), rows))
+
+    workers = min(max(1, workers), len(planned))
+    if workers == 1:
+        for done, (part, rows) in enumerate(planned):
+            if context is not None:
+                context.report(done, len(planned))
+            _write_part(gateway, rows, str(part.path), sheet)
+        return [part for part, _ in planned]
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context())
+    try:
+        futures = [pool.submit(_write_part, gateway, rows, str(part.path), sheet) for part, rows in planned]
+        for done, future in enumerate(futures, 1):
+            if context is not None:
+                while not wait([future], timeout=_POLL_INTERVAL).done:
+                    context.check()
+            future.result()
+            if context is not None:
+                context.report(done, len(planned))
+    except BaseException as exc:
+        # A cancelled run does not wait for the parts being written
+        pool.shutdown(wait=not isinstance(exc, OperationCancelled), cancel_futures=True)
+        raise
+    pool.shutdown()
+    return [part for part, _ in planned]
+
+
+class PartitionedChunkWriter:
+    """
+    Chunk writer that spreads streamed chunks over parts, opening the next file of a
+    brand (or the next ``part-NNN``) when the current one holds ``max_rows`` rows.
+
+    Brand splits keep one writer per brand open until ``close``. ``parts`` lists the
+    written files grouped by brand in order of first appearance. When the ``with`` block
+    raises, the open parts are discarded and the finished ones removed.
+    """
+
+    def __init__(
+            self,
+            gateway: StreamingExcelGateway,
+            directory: Path,
+            split: OutputSplits,
+            max_rows: int,
+            sheet: str,
+            columns: Optional[Sequence] = None,
+    ) -> None:
+        if max_rows < 1:
+            raise ValueError(f"max_rows must be >= 1, got {max_rows}")
+        directory.mkdir(parents=True, exist_ok=True)
+        self._gateway = gateway
+        self._names = _PartNames(directory, gateway.output_suffix)
+        self._split = split
+        self._max_rows = max_rows
+        self._sheet = sheet
+        self._columns = list(columns) if columns is not None else None
+        # Open writer, rows written and part number of the current part of every brand
+        self._current: dict[Optional[str], tuple[ExcelChunkWriter, int, int]] = {}
+        self._finished: list[OutputPart] = []
+        self._order: dict[Optional[str], int] = {}
+        self._closed = False
+
+    @property
+    def parts(self) -> list[OutputPart]:
+        return sorted(self._finished, key=lambda part: self._order[part.brand])
+
+    def _finish(self, brand: Optional[str]) -> None:
+        writer, rows, index = self._current.pop(brand)
+        writer.close()
+        self._finished.append(OutputPart(path=self._names.path(brand, index), rows=rows, brand=brand))
+
+    def append(self, df: DataFrame) -> None:
+        if self._columns is None:
+            self._columns = list(df.columns)
+        for brand, rows in split_frame(df, self._split, self._max_rows):
+            self._order.setdefault(brand, len(self._order))
+            while len(rows):
+                writer, written, index = self._current.get(brand, (None, self._max_rows, 0))
+                if written >= self._max_rows:
+                    if writer is not None:
+                        self._finish(brand)
+                    index += 1
+                    path = self._names.path(brand, index)
+                    writer = self._gateway.open_writer(str(path), self._sheet, columns=self._columns)
+                    writer.__enter__()
+                    written = 0
+                    self._current[brand] = (writer, written, index)
+                take = rows.iloc[:self._max_rows - written]
+                writer.append(take)
+                self._current[brand] = (writer, written + len(take), index)
+                rows = rows.iloc[len(take):]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if not self._current and not self._finished:
+            # Nothing was appended: one empty part with the header
+            self._order.setdefault(None, 0)
+            path = self._names.path(None, 1)
+            with self._gateway.open_writer(str(path), self._sheet, columns=self._columns or []):
+                pass
+            self._finished.append(OutputPart(path=path, rows=0))
+        for brand in list(self._current):
+            self._finish(brand)
+
+    def __enter__(self) -> "PartitionedChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        if self._closed:
+            return
+        self._closed = True
+        for writer, _, _ in self._current.values():
+            writer.__exit__(exc_type, exc_value, traceback)
+        self._current.clear()
+        for part in self._finished:
+            part.path.unlink(missing_ok=True)
+
+
+def remove_previous_parts(directory: Path) -> None:
+    """
+    Remove the parts listed in the manifest of an earlier output in ``directory`` and the
+    manifest itself, so none of them is taken for a part of the next output. Files the
+    manifest does not list are left alone.
+    """
+    manifest = directory / MANIFEST_NAME
+    try:
+        previous = json.loads(manifest.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError):
+        previous = {}
+    for entry in previous.get("parts", []):
+        name = entry.get("file")
+        # Only plain file names: a manifest never points outside its folder
+        if isinstance(name, str) and name and Path(name).name == name:
+            (directory / name).unlink(missing_ok=True)
+    manifest.unlink(missing_ok=True)
+
+
+def write_manifest(
+        directory: Path,
+        parts: Sequence[OutputPart],
+        *,
+        input_path: Path,
+        split: OutputSplits,
+        output_format: str,
+        sheet: str,
+) -> Path:
+    """Write ``manifest.json`` listing ``parts`` (file names relative to ``directory``) and return its path."""
+    manifest = {
+        "format": MANIFEST_FORMAT_VERSION,
+        "input": str(input_path),
+        "split": split.value,
+        "output_format": output_format,
+        "sheet": sheet,
+        "rows": sum(part.rows for part in parts),
+        "parts": [
+            {"file": part.path.name, "rows": part.rows, "brand": part.brand}
+            for part in parts
+        ],
+    }
+    path = directory / MANIFEST_NAME
+    path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
@@ -0,0 +1,60 @@
+import threading
+from typing import Callable, Optional
+
+
+class OperationCancelled(Exception):
+    """Raised inside a pipeline run once cancellation has been requested."""
+
+
+class ProgressContext:
+    """
+    Cooperative cancellation and progress reporting for one pipeline run.
+
+    The pipeline assigns each stage a span of the overall percentage with ``set_span`` and
+    stages report ``(done, total)`` inside it. Every report is also a cancellation point:
+    after ``cancel()`` (safe to call from another thread) the next ``check``/``report``
+    raises ``OperationCancelled``. ``on_progress`` receives whole percentages and is
+    only called when the value changes. ``cancel_event`` shares cancellation with other
+    contexts, e.g. a ``multiprocessing`` event seen by worker processes.
+    """
+
+    def __init__(
+            self,
+            on_progress: Optional[Callable[[int], None]] = None,
+            cancel_event=None,
+    ) -> None:
+        self._on_progress = on_progress
+        self._cancel_event = cancel_event if cancel_event is not None else threading.Event()
+        self._span = (0.0, 100.0)
+        self._percent = -1
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check(self) -> None:
+        if self._cancel_event.is_set():
+            raise OperationCancelled("Processing cancelled")
+
+    def set_span(self, start: float, end: float) -> None:
+        """Map the following ``report`` calls onto ``start``..``end`` percent."""
+        self.check()
+        self._span = (start, end)
+        self._emit(start)
+
+    def report(self, done: int, total: Optional[int]) -> None:
+        self.check()
+        if not total:
+            return
+        start, end = self._span
+        self._emit(start + (end - start) * min(done, total) / total)
+
+    def _emit(self, value: float) -> None:
+        percent = int(max(0.0, min(100.0, value)))
+        if percent != self._percent:
+            self._percent = percent
+            if self._on_progress is not None:
+                self._on_progress(percent)
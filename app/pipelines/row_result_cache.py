@@ -0,0 +1,165 @@
+import hashlib
+import json
+import pickle
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from app.adapters.row_cache.sqlite_row_cache import SqliteRowCache
+from app.core.dataclasses import Triplets
+from app.core.enums import ExcelColumns, CustomExcelColumns
+from app.core.services.mirror_builder import MirrorBuilder
+from app.pipelines.run_report import CacheStats
+from app.settings import BRAND_MODEL_COLUMNS, KEYWORDS_DROP_UNCHANGED, KEYWORDS_MAX_LEN, MIRROR_CLEAR_COLUMNS
+
+# Bump when the builder's output for the same input and catalog changes, or the entry layout does
+ROW_CACHE_FORMAT_VERSION = 1
+
+_GROUP_COLUMNS = (ExcelColumns.GROUP_NAME.value, ExcelColumns.GROUP_CODE.value)
+
+# Built rows of one input row: their columns, values, the columns the builder added to them
+# (beyond the input header) and whether the first mirror got a group code (None without mirrors)
+_Entry = tuple[tuple, list[tuple], tuple, Optional[bool]]
+
+
+def catalog_version(triplets: Triplets, filtered_groups: dict[str, str]) -> str:
+    """Content hash of everything the builder reads from the catalog."""
+    payload = json.dumps([triplets.raw, filtered_groups], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _missing(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+class RowResultCache:
+    """
+    Reuses the built original and mirror rows of input rows seen in earlier runs.
+
+    Rows are keyed by a hash of their cells and the input header within a namespace made of
+    the catalog version, the builder options and the transformation settings, so any of
+    those changing starts from an empty cache. Only rows without an entry go through the
+    builder; the result is assembled to match a full build.
+    """
+
+    def __init__(
+            self,
+            store: SqliteRowCache,
+            catalog: str,
+            include_record_type: bool,
+            fuzzy_distance: int = 0,
+    ) -> None:
+        self._store = store
+        settings = (
+            ROW_CACHE_FORMAT_VERSION,
+            catalog,
+            include_record_type,
+            fuzzy_distance,
+            KEYWORDS_DROP_UNCHANGED,
+            KEYWORDS_MAX_LEN,
+            BRAND_MODEL_COLUMNS,
+            MIRROR_CLEAR_COLUMNS,
+        )
+        self._namespace = hashlib.sha256(repr(settings).encode("utf-8")).digest()
+        self.hits = 0
+        self.misses = 0
+
+    def row_keys(self, df: DataFrame) -> list[bytes]:
+        header = hashlib.blake2b(self._namespace + pickle.dumps(tuple(df.columns), protocol=4), digest_size=16).digest()
+        return [
+            hashlib.blake2b(header + pickle.dumps(row, protocol=4), digest_size=16).digest()
+            for row in df.itertuples(index=False, name=None)
+        ]
+
+    def lookup(self, keys: list[bytes]) -> dict[bytes, _Entry]:
+        found = {key: pickle.loads(value) for key, value in self._store.get_many(keys).items()}
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def split(self, df: DataFrame, built: DataFrame) -> list[_Entry]:
+        """
+        Cut the object frame ``built`` for ``df`` into one entry per input row.
+
+        Built rows carry the index label of their source row and come in input order.
+        """
+        source = df.index.get_indexer(built.index)
+        bounds = np.searchsorted(source, np.arange(len(df) + 1))
+        values = built.to_numpy(dtype=object)
+        input_columns = set(df.columns)
+        extras = [i for i, column in enumerate(built.columns) if column not in input_columns]
+        # Group columns missing from the input are added on the first mirror with a group code
+        group_added = ExcelColumns.GROUP_CODE.value not in input_columns
+        group_code = built.columns.get_loc(ExcelColumns.GROUP_CODE.value) \
+            if group_added and ExcelColumns.GROUP_CODE.value in built.columns else None
+
+        entries: list[_Entry] = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            block = values[start:stop]
+            has_mirrors = stop - start > 1
+            added = []
+            for i in extras:
+                column = built.columns[i]
+                if column == CustomExcelColumns.RECORD_TYPE.value:
+                    present = not _missing(block[0, i])
+                elif column in _GROUP_COLUMNS:
+                    present = any(not _missing(value) for value in block[1:, i])
+                else:
+                    present = has_mirrors
+                if present:
+                    added.append(i)
+            keep = [i for i, column in enumerate(built.columns) if column in input_columns] + added
+            first_mirror_group = None
+            if has_mirrors and group_added:
+                first_mirror_group = group_code is not None and not _missing(block[1, group_code])
+            entries.append((
+                tuple(built.columns[keep]),
+                [tuple(row) for row in block[:, keep]],
+                tuple(built.columns[added]),
+                first_mirror_group,
+            ))
+        return entries
+
+    def store(self, keys: list[bytes], entries: list[_Entry]) -> None:
+        self._store.put_many({key: pickle.dumps(entry, protocol=4) for key, entry in zip(keys, entries)})
+
+    @staticmethod
+    def assemble(df: DataFrame, entries: list[_Entry]) -> DataFrame:
+        """
+        Object frame of all built rows, with the columns in the order a full build emits them.
+        """
+        added = {column for entry in entries for column in entry[2]}
+        group_on_first_mirror = next((entry[3] for entry in entries if entry[3] is not None), True)
+        columns = list(df.columns) + [
+            column for column in MirrorBuilder._assignment_order(group_on_first_mirror) if column in added
+        ]
+        position = {column: i for i, column in enumerate(columns)}
+
+        counts = np.array([len(entry[1]) for entry in entries], dtype=np.int64)
+        out = np.full((int(counts.sum()), len(columns)), np.nan, dtype=object)
+        row = 0
+        for entry_columns, rows, _, _ in entries:
+            target = [position[column] for column in entry_columns]
+            block = np.empty((len(rows), len(target)), dtype=object)
+            block[:] = rows
+            out[row:row + len(rows), target] = block
+            row += len(rows)
+        return DataFrame(out, index=df.index.repeat(counts), columns=columns)
+
+    def evict(self) -> int:
+        return self._store.evict()
+
+    def stats(self, evictions: int = 0) -> CacheStats:
+        """Row hits/misses of this run; size and budget are in bytes."""
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=evictions,
+            size=self._store.size_bytes(),
+            maxsize=self._store.max_bytes,
+        )
+
+    def close(self) -> None:
+        self._store.close()
@@ -0,0 +1,263 @@
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
+
+import pandas as pd
+
+from app.core.enums import ExcelColumns
+from app.core.services.row_transformer import model_regex_cache_info
+from app.utils.brand_model_matcher import pair_pattern_cache_info
+
+# Unresolved compatibility names kept in the report; the count covers all of them
+_UNRESOLVED_SAMPLE = 50
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    calls: int = 0
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: Optional[int]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class RunReport:
+    """Metrics of one ``ExcelFilePipeline`` run."""
+    input_path: str
+    output_path: str
+    engine: str
+    workers: int
+    streaming: bool
+    # > 0 when the streamed stages overlapped: their wall times add up to more than the run
+    pipeline_depth: int
+    output_format: str
+    # Size of the output, all parts together when it was split
+    output_bytes: Optional[int]
+    # Files the output was split into; 0 when it was written as one file
+    output_parts: int
+    rows_in: int
+    rows_out: int
+    wall_s: float
+    stages: list[StageMetrics]
+    mirrors_per_row: dict[int, int]
+    compat_entries: int
+    unresolved_entries: int
+    unresolved_models: list[str]
+    unresolved_distinct: int
+    caches: dict[str, CacheStats]
+    # True when rows were built in worker processes: ``caches`` then count the parent process only
+    caches_parent_only: bool
+    # Cells looked at and cells the literal prefilter ruled out (see ``FastPathInfo``)
+    fast_path: dict[str, int]
+    peak_rss_bytes: Optional[int]
+    peak_rss_children_bytes: Optional[int]
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["mirrors_per_row"] = {str(k): v for k, v in sorted(self.mirrors_per_row.items())}
+        for name, stats in self.caches.items():
+            data["caches"][name]["hit_rate"] = round(stats.hit_rate, 4)
+        return data
+
+    def write_json(self, path: Path | str) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+@dataclass(frozen=True)
+class PipelineResult:
+    output_path: Path
+    report: RunReport
+    report_path: Optional[Path] = None
+    # Output rows of an in-memory run; None when the workbook was streamed
+    frame: Optional[pd.DataFrame] = field(default=None, repr=False, compare=False)
+    # Files of a split output, in manifest order; ``output_path`` is then the manifest
+    parts: tuple[Path, ...] = ()
+
+
+@dataclass(frozen=True)
+class FanOutEstimate:
+    """Prediction of ``ExcelFilePipeline.dry_run`` for a full run of the same input."""
+    input_path: str
+    rows_in: int
+    # Exact: the mirror plans the build would use, without building the rows
+    rows_out: int
+    mirrors_per_row: dict[int, int]
+    distinct_compat: int
+    compat_entries: int
+    unresolved_entries: int
+    unresolved_models: list[str]
+    unresolved_distinct: int
+    output_format: str
+    # True when an unsplit Excel output would not fit on one sheet
+    exceeds_sheet_limit: bool
+    # Input rows built and written to measure size and speed; the estimates scale them up
+    sample_rows: int
+    est_output_bytes: Optional[int]
+    # Seconds of a run in one process, catalog load excluded
+    est_seconds: Optional[float]
+    wall_s: float
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["mirrors_per_row"] = {str(k): v for k, v in sorted(self.mirrors_per_row.items())}
+        return data
+
+
+def _peak_rss() -> tuple[Optional[int], Optional[int]]:
+    """Peak resident set size of this process and of its (finished) children, in bytes."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return own, children or None
+
+
+def _module_caches() -> dict:
+    return {
+        "model_regex": model_regex_cache_info(),
+        "pair_regex": pair_pattern_cache_info(),
+    }
+
+
+class RunMetrics:
+    """
+    Collects stage timings and row statistics while a pipeline runs.
+
+    Stages may be entered several times (e.g. once per streamed chunk); their times add up.
+    Module-level regex caches outlive a run, so their statistics are reported as deltas.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self._stages: dict[str, StageMetrics] = {}
+        self._module_caches_before = _module_caches()
+        self.rows_in = 0
+        self.rows_out = 0
+        self.mirrors_per_row: Counter = Counter()
+        self.compat_entries = 0
+        self.unresolved_entries = 0
+        self.unresolved_models: Counter = Counter()
+
+    @contextmanager
+    def stage(self, name: str, thread_cpu: bool = False) -> Iterator[StageMetrics]:
+        """
+        Time a stage. CPU time is the whole process's, or only the calling thread's with
+        ``thread_cpu`` (for stages that run concurrently with others).
+        """
+        metrics = self._stages.setdefault(name, StageMetrics(name))
+        cpu_clock = time.thread_time if thread_cpu else time.process_time
+        wall_start, cpu_start = time.perf_counter(), cpu_clock()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_s += time.perf_counter() - wall_start
+            metrics.cpu_s += cpu_clock() - cpu_start
+            metrics.calls += 1
+
+    def record_rows(
+            self,
+            df_in: pd.DataFrame,
+            df_out: pd.DataFrame,
+            resolved_models: Callable[[str], Sequence[tuple[str, Optional[int]]]],
+    ) -> None:
+        """
+        Count rows, mirrors per input row and unresolved compatibility entries of one batch.
+
+        Built rows keep the index label of their source row, which is how mirrors are
+        attributed back to the input. ``resolved_models`` is the builder's (see
+        ``MirrorBuilder.resolved_models``), so the models are not resolved a second time.
+        """
+        self.rows_in += len(df_in)
+        self.rows_out += len(df_out)
+        if df_in.index.is_unique:
+            per_row = df_out.index.value_counts().reindex(df_in.index, fill_value=1) - 1
+            self.mirrors_per_row.update({int(k): int(v) for k, v in per_row.value_counts().items()})
+
+        column = ExcelColumns.COMPATIBILITY.value
+        if column not in df_in.columns:
+            return
+        compat = df_in[column]
+        for value in compat[compat.notna()].tolist():
+            for model, trip_id in resolved_models(value):
+                self.compat_entries += 1
+                if trip_id is None:
+                    self.unresolved_entries += 1
+                    self.unresolved_models[model] += 1
+
+    def report(
+            self,
+            *,
+            input_path: Path,
+            output_path: Path,
+            engine: str,
+            workers: int,
+            streaming: bool,
+            pipeline_depth: int,
+            output_format: str,
+            caches: dict[str, CacheStats],
+            caches_parent_only: bool = False,
+            fast_path: Optional[dict[str, int]] = None,
+            parts: Sequence[Path] = (),
+    ) -> RunReport:
+        all_caches = dict(caches)
+        for name, after in _module_caches().items():
+            before = self._module_caches_before[name]
+            misses = after.misses - before.misses
+            all_caches[name] = CacheStats(
+                hits=after.hits - before.hits,
+                misses=misses,
+                evictions=max(0, misses - (after.currsize - before.currsize)),
+                size=after.currsize,
+                maxsize=after.maxsize,
+            )
+        peak_rss, peak_rss_children = _peak_rss()
+        written = list(parts) or [output_path]
+        return RunReport(
+            input_path=str(input_path),
+            output_path=str(output_path),
+            engine=engine,
+            workers=workers,
+            streaming=streaming,
+            pipeline_depth=pipeline_depth,
+            output_format=output_format,
+            output_bytes=sum(path.stat().st_size for path in written) if all(path.exists() for path in written) else None,
+            output_parts=len(parts),
+            rows_in=self.rows_in,
+            rows_out=self.rows_out,
+            wall_s=time.perf_counter() - self._started,
+            stages=list(self._stages.values()),
+            mirrors_per_row=dict(self.mirrors_per_row),
+            compat_entries=self.compat_entries,
+            unresolved_entries=self.unresolved_entries,
+            unresolved_models=[model for model, _ in self.unresolved_models.most_common(_UNRESOLVED_SAMPLE)],
+            unresolved_distinct=len(self.unresolved_models),
+            caches=all_caches,
+            caches_parent_only=caches_parent_only,
+            fast_path=dict(fast_path or {}),
+            peak_rss_bytes=peak_rss,
+            peak_rss_children_bytes=peak_rss_children,
+        )
@@ -1,3 +1,10 @@
-from .config import *
-from .constants import *
-from .logging import *
+from .config import AppConfig
+from .constants import (
+    ALLOWED_LANGUAGES,
+    BRAND_MODEL_COLUMNS,
+    KEYWORDS_ALLOW_BASE_FALLBACK,
+    KEYWORDS_DROP_UNCHANGED,
+    KEYWORDS_MAX_LEN,
+    MIRROR_CLEAR_COLUMNS,
+)
+from .logging import setup_logging
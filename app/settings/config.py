@@ -8,3 +8,42 @@ class AppConfig:
 
     # True, if you want to use resources json files
     use_resource_triplets: bool = True
+
+    # Reuse a compiled pickle of the resource catalog between runs (rebuilt when resources change)
+    use_catalog_snapshot: bool = True
+
+    # Mirror expansion engine: "row" (per-row Series) or "columnar" (bulk column fill)
+    processing_engine: str = "row"
+
+    # > 0 streams the workbook: read, build mirrors and write this many input rows at a time
+    excel_chunk_rows: int = 0
+
+    # > 0 overlaps reading, building and writing of streamed chunks; at most this many chunks wait between stages
+    pipeline_depth: int = 0
+
+    # Worker processes for the mirror build stage; 1 keeps everything in the current process
+    workers: int = 1
+
+    # Rows a sheet (or streamed chunk) needs before the workers are started; smaller ones are built in this process
+    min_parallel_rows: int = 5000
+
+    # Write the run report (stage timings, row counts, cache stats) as JSON next to the output
+    write_run_report: bool = False
+
+    # > 0 keeps built rows in an on-disk cache of this many MiB so unchanged rows are not rebuilt
+    row_cache_mb: int = 0
+
+    # > 0 resolves compatibility models with up to this many typos to the closest catalog model
+    fuzzy_model_distance: int = 0
+
+    # Output writer: "xlsx" (openpyxl), "xlsxwriter" (constant-memory .xlsx), "csv" or "parquet"
+    output_format: str = "xlsx"
+
+    # Split the output into workbooks in a "<name>_processed" folder: "none", "rows" or "brand"
+    output_split: str = "none"
+
+    # Data rows per output part when split; 0 fills each part up to the Excel sheet limit
+    output_part_rows: int = 0
+
+    # Processes writing output parts at once (in-memory runs); 1 writes them one after another
+    output_writers: int = 1
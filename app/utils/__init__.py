@@ -6,4 +6,7 @@ from .finder import (
     normalize_keywords_by_script
 )
 
-from .timer import Timer
\ No newline at end of file
+from .timer import Timer
+from .cache_dir import user_cache_dir
+from .lru_memo import LruMemo, MemoInfo, ProcessLocalCaches
+from .ngram_index import NGramIndex, bounded_levenshtein
@@ -0,0 +1,304 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from app.settings import ALLOWED_LANGUAGES
+from app.utils.finder import _SIMILAR, pair_regex_both
+from app.utils.lru_memo import ProcessLocalCaches
+
+# Characters ``token_to_regex`` treats as optional separators: ``[\s.\-_]``
+_SEPARATORS = frozenset(".-_") | frozenset(chr(code) for code in range(0x3001) if chr(code).isspace())
+
+# Lowercase Cyrillic lookalikes folded onto their Latin twin, separators dropped
+_FOLD_TABLE: dict[int, Optional[str]] = {ord(cyr.lower()): lat.lower() for lat, cyr in _SIMILAR}
+_FOLD_TABLE.update({ord(sep): None for sep in _SEPARATORS})
+
+# Characters ``re.IGNORECASE`` matches against Latin/Cyrillic letters that ``str.lower`` does not fold
+# the same way (dotless i, long s, dotted capital I, old Cyrillic letter forms). Cells with them use regexes.
+_UNFOLDABLE = re.compile("[İıſᲀ-ᲈ]")
+
+# Brand/model strings the skeleton form is exact for: ASCII and basic Cyrillic
+_INDEXABLE = re.compile(r"[\x00-\x7fЀ-ӿ]*")
+
+_NON_SEPARATOR = re.compile(r"[^\s.\-_]")
+
+
+def skeleton(text: str) -> str:
+    """
+    Fold case and Latin/Cyrillic lookalikes and drop separators, e.g. ``"Х5 Е70" -> "x5e70"``.
+    """
+    return text.lower().translate(_FOLD_TABLE)
+
+
+@dataclass(frozen=True)
+class PairMatch:
+    """A brand/model occurrence in the original (unfolded) text."""
+    start: int
+    end: int
+    order: str  # "bm" - brand first, "mb" - model first
+    sep: Optional[str]
+
+
+class SkeletonPattern:
+    """
+    Literal form of a ``token_to_regex`` pattern: the skeleton of its tokens plus the
+    skeleton indexes after which the text may hold separators (where the tokens had
+    separators, and between tokens).
+    """
+
+    __slots__ = ("key", "joins", "split")
+
+    def __init__(self, key: str, joins: frozenset[int], split: int) -> None:
+        self.key = key
+        self.joins = joins
+        # Skeleton index where the second token starts; the length of the key for one token
+        self.split = split
+
+
+@lru_cache(maxsize=8192)
+def skeleton_pattern(*tokens: str) -> Optional[SkeletonPattern]:
+    r"""
+    Skeleton pattern of ``tokens`` spelled one after another, None if the skeleton form is
+    not exact for them.
+
+    Matching it in a ``FoldedText`` gives the span of the ``(?<!\w)`` + ``token_to_regex``
+    patterns (joined by ``[\s.\-_]*`` for two tokens) + ``(?!\w)`` regex.
+    """
+    key = ""
+    joins: set[int] = set()
+    split = 0
+    for token in tokens:
+        # A leading/trailing separator lets the regex match start or stop inside the separators
+        if not token or not _INDEXABLE.fullmatch(token) or token[0] in _SEPARATORS or token[-1] in _SEPARATORS:
+            return None
+        if key:
+            joins.add(len(key) - 1)
+            split = split or len(key)
+        for ch in token:
+            if ch in _SEPARATORS:
+                joins.add(len(key) - 1)
+            else:
+                key += skeleton(ch)
+    return SkeletonPattern(key, frozenset(joins), split or len(key))
+
+
+@lru_cache(maxsize=4096)
+def _pair_patterns(brand: str, model: str) -> tuple[re.Pattern, re.Pattern]:
+    return pair_regex_both(brand, model)
+
+
+def pair_pattern_cache_info():
+    """Hit/miss counters of the brand/model pair regex cache of this process."""
+    return _pair_patterns.cache_info()
+
+
+@lru_cache(maxsize=4096)
+def _pair_keys(brand: str, model: str) -> Optional[tuple[SkeletonPattern, SkeletonPattern]]:
+    """Skeleton patterns of the "brand model" and "model brand" spellings, None if not exact."""
+    brand_model = skeleton_pattern(brand, model)
+    if brand_model is None:
+        return None
+    return brand_model, skeleton_pattern(model, brand)
+
+
+def _is_word(ch: str) -> bool:
+    # ``\w`` of ``re`` for str patterns
+    return ch.isalnum() or ch == "_"
+
+
+class FoldedText:
+    """
+    A text folded by ``skeleton`` once, with the map from skeleton indexes back to the
+    text; ``SkeletonPattern`` matches are found with ``str.find`` and mapped back.
+    """
+
+    __slots__ = ("text", "folded", "_offsets")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.folded = skeleton(text)
+        self._offsets: Optional[list[int]] = None
+
+    def offset(self, skeleton_index: int) -> int:
+        if self._offsets is None:
+            self._offsets = [m.start() for m in _NON_SEPARATOR.finditer(self.text)]
+        return self._offsets[skeleton_index]
+
+    def match_at(self, pattern: SkeletonPattern, skeleton_start: int) -> Optional[tuple[int, int]]:
+        """Text span of ``pattern`` found at ``skeleton_start`` of the folded text, if the regex would match there."""
+        offset = self.offset
+        last = skeleton_start + len(pattern.key) - 1
+        previous = offset(skeleton_start)
+        for index in range(skeleton_start + 1, last + 1):
+            current = offset(index)
+            # Separators in the text are allowed only where the pattern had them
+            if current - previous > 1 and index - 1 - skeleton_start not in pattern.joins:
+                return None
+            previous = current
+        start, end = offset(skeleton_start), previous + 1
+        text = self.text
+        if (start and _is_word(text[start - 1])) or (end < len(text) and _is_word(text[end])):
+            return None
+        return start, end
+
+    def search(self, pattern: SkeletonPattern) -> Optional[tuple[int, int]]:
+        """Text span of the leftmost match of ``pattern``, like a ``re.search`` of its regex."""
+        skeleton_start = self.folded.find(pattern.key)
+        while skeleton_start >= 0:
+            span = self.match_at(pattern, skeleton_start)
+            if span is not None:
+                return span
+            skeleton_start = self.folded.find(pattern.key, skeleton_start + 1)
+        return None
+
+    def between(self, pattern: SkeletonPattern, skeleton_start: int) -> str:
+        """Separators of the text between the two tokens of ``pattern`` matched at ``skeleton_start``."""
+        split = skeleton_start + pattern.split
+        return self.text[self.offset(split - 1) + 1:self.offset(split)]
+
+
+def text_key(text: str) -> Optional[str]:
+    """Skeleton of a text for ``SkeletonPattern.key`` containment checks, None if it cannot be folded exactly."""
+    if _UNFOLDABLE.search(text):
+        return None
+    return skeleton(text)
+
+
+def fold(text: str) -> Optional[FoldedText]:
+    """``FoldedText`` of ``text``, None if it cannot be folded exactly."""
+    if _UNFOLDABLE.search(text):
+        return None
+    return FoldedText(text)
+
+
+class _Automaton:
+    """Aho-Corasick automaton over skeleton strings."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._out: list[tuple[str, ...]] = [()]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                state = nxt
+            if pattern not in self._out[state]:
+                self._out[state] += (pattern,)
+
+        # Breadth-first failure links; outputs of the failure state are merged in
+        self._fail: list[int] = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> dict[str, list[int]]:
+        """Map every pattern found in ``text`` to the start indexes of its occurrences."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: dict[str, list[int]] = {}
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for pattern in out[state]:
+                    hits.setdefault(pattern, []).append(i - len(pattern) + 1)
+        return hits
+
+
+class _CellScan(FoldedText):
+    """A folded cell plus the skeleton occurrences of every catalog spelling in it."""
+
+    __slots__ = ("hits",)
+
+    def __init__(self, text: str, automaton: _Automaton) -> None:
+        super().__init__(text)
+        self.hits = automaton.scan(self.folded)
+
+
+class BrandModelMatcher(ProcessLocalCaches):
+    """
+    Catalog-wide brand/model detector.
+
+    Every "brand model" and "model brand" spelling of the catalog is folded to a skeleton
+    (case, Latin/Cyrillic lookalikes and separators removed) and loaded into one Aho-Corasick
+    automaton. A cell is folded and scanned once; the scan is memoized, so the original row
+    and all of its mirrors share it. Candidate spans are mapped back to the text and checked
+    for the separators and word boundaries the ``pair_regex_both`` patterns allow, which keeps
+    results identical to a regex ``search``; the regexes are only compiled for cells and
+    names the skeleton form is not exact for.
+    """
+    _local_caches = {"scan": ("_scan", "_cache_size")}
+
+    def __init__(self, triplets_raw: Iterable[dict], cache_size: int = 4096) -> None:
+        patterns: set[str] = set()
+        for triplet in triplets_raw:
+            for lang in ALLOWED_LANGUAGES:
+                keys = _pair_keys(triplet[lang]["brand"], triplet[lang]["model"])
+                if keys is not None:
+                    patterns.update(pattern.key for pattern in keys)
+        self._patterns = frozenset(patterns)
+        self._automaton = _Automaton(sorted(patterns))
+        self._cache_size = cache_size
+        self._reset_local_caches()
+
+    @staticmethod
+    def prepare(brand: str, model: str) -> None:
+        """Build the patterns of a brand/model pair now instead of on its first ``find_pair``."""
+        if _pair_keys(brand, model) is None:
+            _pair_patterns(brand, model)
+
+    @staticmethod
+    def required_keys(brand: str, model: str) -> Optional[tuple[str, str]]:
+        """
+        Skeleton keys one of which ``text_key(text)`` contains whenever ``find_pair`` finds
+        the pair in ``text``; None if the pair has no such keys.
+        """
+        keys = _pair_keys(brand, model)
+        return None if keys is None else (keys[0].key, keys[1].key)
+
+    def _scan(self, text: str) -> Optional[_CellScan]:
+        if _UNFOLDABLE.search(text):
+            return None
+        return _CellScan(text, self._automaton)
+
+    def find_pair(self, text: str, brand: str, model: str) -> Optional[PairMatch]:
+        """
+        Find the leftmost "brand model" occurrence, or else the leftmost "model brand" one,
+        with the same semantics as ``pair_regex_both(brand, model)`` searches.
+        """
+        keys = _pair_keys(brand, model)
+        cell = self.scan(text) if keys is not None and keys[0].key in self._patterns else None
+
+        if cell is None:
+            regex_brand_model, regex_model_brand = _pair_patterns(brand, model)
+            match = regex_brand_model.search(text)
+            order = "bm"
+            if not match:
+                match = regex_model_brand.search(text)
+                order = "mb"
+            if not match:
+                return None
+            return PairMatch(start=match.start(), end=match.end(), order=order, sep=match.group("sep"))
+
+        for order, pattern in zip(("bm", "mb"), keys):
+            for skeleton_start in cell.hits.get(pattern.key, ()):
+                span = cell.match_at(pattern, skeleton_start)
+                if span is not None:
+                    return PairMatch(
+                        start=span[0], end=span[1], order=order, sep=cell.between(pattern, skeleton_start),
+                    )
+        return None
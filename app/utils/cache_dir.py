@@ -0,0 +1,18 @@
+import os
+import sys
+from pathlib import Path
+
+_APP_DIR_NAME = "PartMirror"
+
+
+def user_cache_dir() -> Path:
+    """
+    Per-user cache directory for files the app can rebuild on demand.
+    """
+    if sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    elif sys.platform.startswith("win"):
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / _APP_DIR_NAME
@@ -1,4 +1,4 @@
-import re, json, math
+import re, json, math, sys
 from typing import Optional
 
 from app.settings import ALLOWED_LANGUAGES
@@ -41,15 +41,16 @@ def load_triplets(path: str):
         return json.load(f)
 
 
-def build_trip_index(triplets) -> dict:
+def build_trip_index(triplets) -> dict[tuple[str, str], int]:
+    """Map lowercase (brand, model) of every language combination to the triplet's position; later triplets win."""
     idx = {}
     langs = ALLOWED_LANGUAGES
-    for t in triplets:
-        for bl in langs:
-            b = t[bl]["brand"].lower()
-            for ml in langs:
-                m = t[ml]["model"].lower()
-                idx[(b, m)] = t
+    for trip_id, t in enumerate(triplets):
+        brands = [sys.intern(t[bl]["brand"].lower()) for bl in langs]
+        models = [sys.intern(t[ml]["model"].lower()) for ml in langs]
+        for b in brands:
+            for m in models:
+                idx[(b, m)] = trip_id
     return idx
 
 
@@ -0,0 +1,112 @@
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, ClassVar, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class MemoInfo:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+    approx_bytes: int
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _sizeof(value) -> int:
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(_sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LruMemo:
+    """
+    Bounded least-recently-used memo with hit/miss counters.
+
+    Unlike ``functools.lru_cache`` it is keyed explicitly, so callers can build keys from
+    unhashable arguments, and it tracks an approximate size of the stored keys and values.
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self._maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], V]) -> V:
+        try:
+            value = self._data[key]
+        except KeyError:
+            pass
+        else:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute()
+        self._data[key] = value
+        self._bytes += _sizeof(key) + _sizeof(value)
+        if len(self._data) > self._maxsize:
+            old_key, old_value = self._data.popitem(last=False)
+            self._bytes -= _sizeof(old_key) + _sizeof(old_value)
+            self.evictions += 1
+        return value
+
+    def info(self) -> MemoInfo:
+        return MemoInfo(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._data),
+            maxsize=self._maxsize,
+            approx_bytes=self._bytes,
+            evictions=self.evictions,
+        )
+
+    def clear(self, reset_stats: bool = True) -> None:
+        self._data.clear()
+        self._bytes = 0
+        if reset_stats:
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ProcessLocalCaches:
+    """
+    Mixin for objects that memoize their own methods with ``functools.lru_cache``.
+
+    ``_local_caches`` maps each cache attribute to the method it wraps and the attribute
+    holding its ``maxsize``. The caches are process-local: they are left out when the object
+    is pickled and a worker process starts with empty ones.
+    """
+    _local_caches: ClassVar[dict[str, tuple[str, str]]] = {}
+
+    def _reset_local_caches(self) -> None:
+        """(Re)create every cache empty, e.g. after a cache size changed."""
+        for name, (method, maxsize) in self._local_caches.items():
+            setattr(self, name, lru_cache(maxsize=getattr(self, maxsize))(getattr(self, method)))
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in self._local_caches:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._reset_local_caches()
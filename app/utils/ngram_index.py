@@ -0,0 +1,86 @@
+from collections import Counter
+from typing import Iterable, Optional
+
+# Marks the start and end of a word so its first and last characters form bigrams of their own
+_PAD = "\x00"
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between ``a`` and ``b``, or None once it is known to exceed ``max_distance``.
+
+    Only the diagonal band of width ``2 * max_distance + 1`` is computed.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    too_far = max_distance + 1
+    previous = [j if j <= max_distance else too_far for j in range(len(b) + 1)]
+    for i, ch_a in enumerate(a, 1):
+        lo = max(1, i - max_distance)
+        hi = min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        best = current[0]
+        for j in range(lo, hi + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch_a != b[j - 1]))
+            if value < too_far:
+                current[j] = value
+                best = min(best, value)
+        if best > max_distance:
+            return None
+        previous = current
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else None
+
+
+def _bigrams(word: str) -> set[str]:
+    padded = f"{_PAD}{word}{_PAD}"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class NGramIndex:
+    """
+    Finds the stored words within a given edit distance of a query through a bigram inverted index.
+
+    One edit changes at most two bigrams of the (padded) word, so a word within ``k`` edits
+    shares at least ``len(bigrams) - 2 * k`` distinct bigrams with the query. Only words
+    passing that count and the length difference are compared with the exact, banded
+    edit distance.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self._words = list(dict.fromkeys(words))
+        self._postings: dict[str, list[int]] = {}
+        self._by_length: dict[int, list[int]] = {}
+        for i, word in enumerate(self._words):
+            self._by_length.setdefault(len(word), []).append(i)
+            for gram in _bigrams(word):
+                self._postings.setdefault(gram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """``(distance, word)`` of all stored words within ``max_distance``, closest first."""
+        grams = _bigrams(word)
+        required = len(grams) - 2 * max_distance
+        if required > 0:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+            candidates = [i for i, count in shared.items() if count >= required]
+        else:
+            candidates = [
+                i
+                for length in range(len(word) - max_distance, len(word) + max_distance + 1)
+                for i in self._by_length.get(length, ())
+            ]
+        found = []
+        for i in candidates:
+            distance = bounded_levenshtein(word, self._words[i], max_distance)
+            if distance is not None:
+                found.append((distance, self._words[i]))
+        found.sort()
+        return found
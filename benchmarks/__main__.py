@@ -0,0 +1,75 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from app.core.enums import ProcessingEngines
+from app.settings import setup_logging
+from benchmarks.startup import run_startup
+from benchmarks.suite import compare, print_table, run_suite
+from benchmarks.workload import WorkloadSpec
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = WorkloadSpec()
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Stage-level PartMirror benchmarks")
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--fanout", type=float, default=defaults.fanout)
+    parser.add_argument("--description-len", type=int, default=defaults.description_len)
+    parser.add_argument("--cyrillic-ratio", type=float, default=defaults.cyrillic_ratio)
+    parser.add_argument("--unresolved-ratio", type=float, default=defaults.unresolved_ratio)
+    parser.add_argument("--repeat-ratio", type=float, default=defaults.repeat_ratio)
+    parser.add_argument("--keyword-parts", type=int, default=defaults.keyword_parts)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--engine", choices=[e.value for e in ProcessingEngines], default=ProcessingEngines.ROW.value)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--startup", action="store_true",
+                        help="time the cold start of the CLI and GUI entry points instead of the pipeline stages")
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed median slowdown vs baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    setup_logging("WARNING")
+
+    if args.startup:
+        results = run_startup(repeat=args.repeat)
+    else:
+        spec = WorkloadSpec(
+            rows=args.rows,
+            fanout=args.fanout,
+            description_len=args.description_len,
+            cyrillic_ratio=args.cyrillic_ratio,
+            unresolved_ratio=args.unresolved_ratio,
+            repeat_ratio=args.repeat_ratio,
+            keyword_parts=args.keyword_parts,
+            seed=args.seed,
+        )
+        results = run_suite(spec, engine=args.engine, repeat=args.repeat, workers=args.workers)
+    print_table(results)
+    for stage, loaded in results.get("modules", {}).items():
+        print(f"{stage}: loads {', '.join(loaded) or 'no heavy modules'}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        try:
+            regressions = compare(results, baseline, tolerance=args.tolerance)
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+import importlib.util
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.suite import RESULTS_FORMAT_VERSION, StageResult, _environment
+
+logger = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules whose presence after start-up means the heavy part of the import graph was loaded
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "app.pipelines", "app.core.services")
+
+# Probes run in a fresh interpreter each; every one ends by printing the heavy modules it loaded
+_REPORT = f"import sys, json; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+_PROBES = {
+    "interpreter": "",
+    "import_cli": "import app.cli",
+    "import_gui": "import gui.main",
+    # Window constructed, shown and painted once; the catalog warm-up is left out
+    "gui_first_window": (
+        "from PySide6 import QtWidgets\n"
+        "from gui.main import SessionCatalog\n"
+        "from gui.windows.main_window import MainWindow\n"
+        "app = QtWidgets.QApplication([])\n"
+        "win = MainWindow(SessionCatalog().process_excel)\n"
+        "win.show()\n"
+        "app.processEvents()\n"
+    ),
+}
+_GUI_PROBES = ("import_gui", "gui_first_window")
+
+
+def _run_probe(code: str) -> tuple[float, float, list[str]]:
+    """Wall and CPU seconds of a fresh interpreter running ``code``, and the heavy modules it loaded."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    cpu_before = os.times()
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", f"{code}\n{_REPORT}"],
+        cwd=_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - started
+    cpu_after = os.times()
+    cpu = (cpu_after.children_user - cpu_before.children_user) + (cpu_after.children_system - cpu_before.children_system)
+    return wall, cpu, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_startup(repeat: int = 5) -> dict:
+    """
+    Time the cold start of the entry points, each run in a new interpreter.
+
+    Stages: bare interpreter, ``import app.cli``, ``import gui.main`` and the GUI's first
+    shown window (offscreen). The GUI stages are skipped without PySide6. The result has
+    the layout of ``run_suite`` plus ``modules``: the heavy modules each stage loaded.
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat must be >= 1, got {repeat}")
+    has_qt = importlib.util.find_spec("PySide6") is not None
+    stages: list[StageResult] = []
+    modules: dict[str, list[str]] = {}
+    for name, code in _PROBES.items():
+        if name in _GUI_PROBES and not has_qt:
+            logger.warning("Skipping %s: PySide6 is not installed", name)
+            continue
+        stage = StageResult(name)
+        for _ in range(repeat):
+            wall, cpu, loaded = _run_probe(code)
+            stage.wall.append(wall)
+            stage.cpu.append(cpu)
+        logger.info("%-16s median %.3fs", stage.name, statistics.median(stage.wall))
+        stages.append(stage)
+        modules[name] = loaded
+
+    return {
+        "format": RESULTS_FORMAT_VERSION,
+        "environment": _environment(),
+        "workload": {"benchmark": "startup"},
+        "options": {"repeat": repeat},
+        "stages": [s.as_dict() for s in stages],
+        "modules": modules,
+    }
@@ -0,0 +1,204 @@
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+from app.adapters.excel import PandasExcelGateway
+from app.adapters.trip_data import ResourceTripDataProvider
+from app.core.enums import OutputFormats, ProcessingEngines
+from app.core.services import MirrorBuilder, RowTransformer
+from app.pipelines import DataFrameProcessor
+from benchmarks.workload import WorkloadSpec, generate_workbook
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FORMAT_VERSION = 1
+_SHEET = "TDSheet"
+
+
+@dataclass
+class StageResult:
+    name: str
+    wall: list[float] = field(default_factory=list)
+    cpu: list[float] = field(default_factory=list)
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "wall_s": {"min": min(self.wall), "median": statistics.median(self.wall), "runs": self.wall},
+            "cpu_s": {"min": min(self.cpu), "median": statistics.median(self.cpu), "runs": self.cpu},
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+        }
+
+
+def _measure(stage: StageResult, repeat: int, fn: Callable[[], object]) -> object:
+    """Run ``fn`` ``repeat`` times, recording wall and CPU seconds; return the last result."""
+    result = None
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = fn()
+        stage.wall.append(time.perf_counter() - wall_start)
+        stage.cpu.append(time.process_time() - cpu_start)
+    logger.info("%-16s median %.3fs", stage.name, statistics.median(stage.wall))
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(
+        spec: WorkloadSpec,
+        engine: str = ProcessingEngines.ROW.value,
+        repeat: int = 3,
+        workers: int = 1,
+        workdir: Optional[Path] = None,
+) -> dict:
+    """
+    Generate a workbook for ``spec`` and time every pipeline stage separately.
+
+    Stages: triplet load (json parse and warm snapshot), index build, builder setup
+    (transformer, resolver, matcher), Excel read, mirror build and Excel write. Every
+    repetition of mirror build uses a fresh builder, so in-process caches start cold.
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat must be >= 1, got {repeat}")
+
+    with tempfile.TemporaryDirectory(prefix="partmirror-bench-", dir=workdir) as tmp:
+        tmp_dir = Path(tmp)
+        stages: list[StageResult] = []
+
+        def stage(name: str) -> StageResult:
+            stages.append(StageResult(name))
+            return stages[-1]
+
+        parsing = ResourceTripDataProvider(use_snapshot=False)
+        triplets = _measure(stage("triplets_load"), repeat, parsing.load_triplets)
+
+        snapshot_path = tmp_dir / "catalog.pickle"
+        ResourceTripDataProvider(snapshot_path=snapshot_path).load_triplets()  # write the snapshot once
+        _measure(
+            stage("snapshot_load"), repeat,
+            lambda: ResourceTripDataProvider(snapshot_path=snapshot_path).load_triplets(),
+        )
+
+        trip_index = _measure(stage("index_build"), repeat, lambda: parsing.build_index(triplets))
+        filtered_groups = parsing.load_filtered_groups()
+
+        def make_builder() -> MirrorBuilder:
+            return MirrorBuilder(
+                transformer=RowTransformer(trip_index=trip_index, triplets=triplets),
+                trip_index=trip_index,
+                resolver=parsing.build_resolver(triplets),
+                include_record_type=False,
+                filtered_groups=filtered_groups,
+            )
+
+        _measure(stage("builder_setup"), repeat, make_builder)
+
+        input_path = generate_workbook(spec, triplets.raw, tmp_dir / "input.xlsx", _SHEET)
+        gateway = PandasExcelGateway()
+        read_stage = stage("excel_read")
+        df = _measure(read_stage, repeat, lambda: gateway.read(str(input_path), _SHEET))
+        read_stage.rows_in = read_stage.rows_out = len(df)
+
+        def build() -> pd.DataFrame:
+            with DataFrameProcessor(make_builder(), engine=engine, workers=workers) as processor:
+                return processor.process(df)
+
+        build_stage = stage("mirror_build")
+        result_df = _measure(build_stage, repeat, build)
+        build_stage.rows_in, build_stage.rows_out = len(df), len(result_df)
+
+        write_stage = stage("excel_write")
+        output_path = tmp_dir / "output.xlsx"
+        _measure(write_stage, repeat, lambda: gateway.write(result_df, str(output_path), sheet=_SHEET))
+        write_stage.rows_in = write_stage.rows_out = len(result_df)
+
+        # The same output through the other writer backends
+        for output_format in OutputFormats:
+            if output_format is OutputFormats.XLSX:
+                continue
+            writer = PandasExcelGateway(output_format=output_format.value)
+            output_path = tmp_dir / f"output_{output_format.value}{output_format.suffix}"
+            try:
+                writer.write(result_df.iloc[:0], str(output_path), sheet=_SHEET)
+            except ImportError as exc:
+                logger.warning("Skipping the %s writer: %s", output_format.value, exc)
+                continue
+            format_stage = stage(f"write_{output_format.value}")
+            _measure(format_stage, repeat, lambda: writer.write(result_df, str(output_path), sheet=_SHEET))
+            format_stage.rows_in = format_stage.rows_out = len(result_df)
+
+    return {
+        "format": RESULTS_FORMAT_VERSION,
+        "environment": _environment(),
+        "workload": spec.as_dict(),
+        "options": {"engine": engine, "repeat": repeat, "workers": workers},
+        "stages": [s.as_dict() for s in stages],
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15) -> list[str]:
+    """
+    Stages whose median wall time grew by more than ``tolerance`` over ``baseline``.
+
+    Results from a different workload or engine are not comparable and raise ValueError.
+    """
+    for key in ("workload", "options"):
+        if {k: v for k, v in current[key].items() if k != "repeat"} != \
+                {k: v for k, v in baseline[key].items() if k != "repeat"}:
+            raise ValueError(f"Baseline {key} differs from the current run; results are not comparable")
+
+    base_by_name = {s["name"]: s for s in baseline["stages"]}
+    regressions = []
+    for stage in current["stages"]:
+        base = base_by_name.get(stage["name"])
+        if base is None:
+            continue
+        now, before = stage["wall_s"]["median"], base["wall_s"]["median"]
+        if before > 0 and now > before * (1 + tolerance):
+            regressions.append(f"{stage['name']}: {before:.3f}s -> {now:.3f}s (+{(now / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results: dict, stream=sys.stdout) -> None:
+    print(f"{'stage':<16}{'median s':>10}{'min s':>10}{'cpu s':>10}{'rows out':>10}", file=stream)
+    for stage in results["stages"]:
+        rows_out = "" if stage["rows_out"] is None else stage["rows_out"]
+        print(
+            f"{stage['name']:<16}{stage['wall_s']['median']:>10.3f}{stage['wall_s']['min']:>10.3f}"
+            f"{stage['cpu_s']['median']:>10.3f}{rows_out:>10}",
+            file=stream,
+        )
@@ -0,0 +1,131 @@
+import random
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import pandas as pd
+
+from app.core.enums import ExcelColumns
+from app.settings import BRAND_MODEL_COLUMNS, MIRROR_CLEAR_COLUMNS
+
+_FILLER_EN = "Original part, checked before shipping, fits the listed vehicles. "
+_FILLER_UA = "Оригінальна деталь, перевірена перед відправкою, підходить до вказаних авто. "
+_KEYWORD_STEMS = ("реле", "датчик", "rele", "sensor", "фильтр", "кнопка")
+
+
+@dataclass(frozen=True)
+class WorkloadSpec:
+    """
+    Shape of a synthetic workbook.
+
+    rows            - input rows
+    fanout          - mean number of compatible models per row (mirrors before dedupe/filtering)
+    description_len - approximate length of the description columns, in characters
+    cyrillic_ratio  - share of text cells that spell brand/model in Cyrillic
+    unresolved_ratio - share of compatibility entries that are not in the catalog
+    repeat_ratio    - share of rows copying the title/compatibility of an earlier row
+    keyword_parts   - comma-separated parts per keyword cell, besides the article
+    seed            - random seed, the same spec always produces the same workbook
+    """
+    rows: int = 1000
+    fanout: float = 4.0
+    description_len: int = 600
+    cyrillic_ratio: float = 0.5
+    unresolved_ratio: float = 0.1
+    repeat_ratio: float = 0.3
+    keyword_parts: int = len(_KEYWORD_STEMS)
+    seed: int = 1
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _columns() -> list[str]:
+    columns = [
+        "Код_BAS",
+        ExcelColumns.ARTICLE.value,
+        ExcelColumns.NEW_ARTICLE.value,
+        ExcelColumns.BAS_CATEGORY.value,
+        ExcelColumns.BRAND.value,
+        ExcelColumns.MODEL.value,
+        ExcelColumns.GROUP_CODE.value,
+        ExcelColumns.GROUP_NAME.value,
+        ExcelColumns.KEYWORDS_RU.value,
+        ExcelColumns.KEYWORDS_UA.value,
+        *(col for col, _ in BRAND_MODEL_COLUMNS),
+        ExcelColumns.BRAND_CYRILLIC.value,
+        ExcelColumns.MODEL_CYRILLIC.value,
+        ExcelColumns.BRAND_CYRILLIC_UA.value,
+        ExcelColumns.MODEL_CYRILLIC_UA.value,
+    ]
+    return columns + [col for col in MIRROR_CLEAR_COLUMNS if col not in columns]
+
+
+def generate_frame(spec: WorkloadSpec, triplets_raw: list[dict]) -> pd.DataFrame:
+    """Build a synthetic input sheet from catalog triplets."""
+    if not triplets_raw:
+        raise ValueError("Cannot generate a workload from an empty catalog")
+
+    rnd = random.Random(spec.seed)
+    columns = _columns()
+    rows: list[dict] = []
+
+    for i in range(spec.rows):
+        trip = rnd.choice(triplets_raw)
+        row: dict = {col: None for col in columns}
+        row["Код_BAS"] = f"НФ-{i:08d}"
+        row[ExcelColumns.ARTICLE.value] = f"WL{i:06d}"
+        row[ExcelColumns.BRAND.value] = trip["en"]["brand"]
+        row[ExcelColumns.MODEL.value] = trip["en"]["model"]
+        row[ExcelColumns.BAS_CATEGORY.value] = trip["en"]["model"]
+        row[ExcelColumns.BRAND_CYRILLIC.value] = trip["ru"]["brand"]
+        row[ExcelColumns.MODEL_CYRILLIC.value] = trip["ru"]["model"]
+        row[ExcelColumns.BRAND_CYRILLIC_UA.value] = trip["ua"]["brand"]
+        row[ExcelColumns.MODEL_CYRILLIC_UA.value] = trip["ua"]["model"]
+        row["Цена_продажи"] = rnd.randint(50, 5000)
+        row["Поставщик"] = "Synthetic"
+
+        if rows and rnd.random() < spec.repeat_ratio:
+            source = rnd.choice(rows)
+            for col in (*(c for c, _ in BRAND_MODEL_COLUMNS), ExcelColumns.COMPATIBILITY.value,
+                        ExcelColumns.KEYWORDS_RU.value, ExcelColumns.KEYWORDS_UA.value,
+                        ExcelColumns.BRAND.value, ExcelColumns.MODEL.value):
+                row[col] = source[col]
+            rows.append(row)
+            continue
+
+        for col, _ in BRAND_MODEL_COLUMNS:
+            lang = "ru" if rnd.random() < spec.cyrillic_ratio else "en"
+            pair = f"{trip[lang]['brand']} {trip[lang]['model']}"
+            if col.startswith("Описание"):
+                filler = _FILLER_UA if lang == "ru" else _FILLER_EN
+                body = (filler * (spec.description_len // len(filler) + 1))[:spec.description_len]
+                row[col] = f"{rnd.choice(_KEYWORD_STEMS)} {pair}. {body}"
+            else:
+                row[col] = f"{rnd.choice(_KEYWORD_STEMS)} {pair} {row[ExcelColumns.ARTICLE.value]}"
+
+        keywords = [row[ExcelColumns.ARTICLE.value]]
+        for k in range(spec.keyword_parts):
+            lang = "ru" if rnd.random() < spec.cyrillic_ratio else "en"
+            round_no, stem = divmod(k, len(_KEYWORD_STEMS))
+            suffix = f" {round_no}" if round_no else ""
+            keywords.append(f"{_KEYWORD_STEMS[stem]} {trip[lang]['model']}{suffix}")
+        row[ExcelColumns.KEYWORDS_RU.value] = ", ".join(keywords)
+        row[ExcelColumns.KEYWORDS_UA.value] = ", ".join(reversed(keywords))
+
+        n_compat = min(len(triplets_raw), max(0, round(rnd.gauss(spec.fanout, spec.fanout / 2))))
+        compat = []
+        for other in rnd.sample(triplets_raw, n_compat):
+            if rnd.random() < spec.unresolved_ratio:
+                compat.append(f"Unknown {rnd.randint(0, 10 ** 6)}")
+            else:
+                compat.append(other[rnd.choice(("en", "ru", "ua"))]["model"])
+        row[ExcelColumns.COMPATIBILITY.value] = ", ".join(compat) if compat else None
+        rows.append(row)
+
+    return pd.DataFrame(rows, columns=columns)
+
+
+def generate_workbook(spec: WorkloadSpec, triplets_raw: list[dict], path: Path, sheet: str) -> Path:
+    """Write the synthetic sheet to ``path`` and return it."""
+    generate_frame(spec, triplets_raw).to_excel(path, index=False, sheet_name=sheet)
+    return path
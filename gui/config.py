@@ -6,3 +6,15 @@ branding.
 
 APP_ORG: str = "WLP"
 APP_NAME: str = "PartMirror"
+
+# Lines kept in the log view; older ones are discarded as new ones arrive
+LOG_VIEW_MAX_LINES: int = 5000
+
+# How often queued log records are flushed to the log view
+LOG_FLUSH_INTERVAL_MS: int = 100
+
+# Also write the full log to this file name in the user cache directory (empty = off),
+# rotated at LOG_FILE_MAX_BYTES with LOG_FILE_BACKUPS old files kept
+LOG_FILE_NAME: str = ""
+LOG_FILE_MAX_BYTES: int = 5 * 2 ** 20
+LOG_FILE_BACKUPS: int = 3
@@ -1,23 +1,64 @@
 import logging
+import threading
+from collections import deque
+
 from PySide6 import QtCore
 
 
 class QtLogHandler(logging.Handler, QtCore.QObject):
-    """A logging handler that emits log lines via a Qt signal.
+    """A logging handler that delivers log lines to the GUI in batches via a Qt signal.
 
     Subclasses both QObject and logging.Handler so that ``sig_message`` is a
     real Qt signal you can connect to.
+
+    Records are formatted on the logging thread and queued; a timer in the thread that created
+    the handler flushes the queue every ``flush_interval_ms`` as one newline-joined
+    ``sig_message``. At most ``max_pending`` lines wait between flushes: older ones are dropped
+    and replaced by a note with their count, so a flood of records costs bounded memory and
+    one UI update per interval.
     """
 
     sig_message = QtCore.Signal(str)
 
-    def __init__(self) -> None:
+    def __init__(self, flush_interval_ms: int = 100, max_pending: int = 10000) -> None:
         logging.Handler.__init__(self)
         QtCore.QObject.__init__(self)
+        self._pending: deque[str] = deque(maxlen=max(1, max_pending))
+        self._dropped = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
 
     def emit(self, record: logging.LogRecord) -> None:  # type: ignore[override]
         try:
             msg = self.format(record)
         except (Exception,):
             msg = record.getMessage()
-        self.sig_message.emit(msg)
+        with self._pending_lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(msg)
+
+    def flush(self) -> None:  # type: ignore[override]
+        """Emit the queued lines now; call from the thread that owns the handler."""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            lines.insert(0, f"… {dropped} earlier log lines not shown")
+        self.sig_message.emit("\n".join(lines))
+
+    def close(self) -> None:  # type: ignore[override]
+        # logging.shutdown closes the handler again at exit, after Qt has deleted the timer
+        if self._closed:
+            return
+        self._closed = True
+        self._timer.stop()
+        self.flush()
+        logging.Handler.close(self)
@@ -10,36 +10,115 @@ Optional (macOS app bundle):
 """
 
 import logging
+import logging.handlers
+import multiprocessing
 import sys
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from gui.windows.main_window import MainWindow
-from gui.config import APP_ORG, APP_NAME
-from app.pipelines import ExcelFilePipeline
+from gui.config import APP_ORG, APP_NAME, LOG_FILE_BACKUPS, LOG_FILE_MAX_BYTES, LOG_FILE_NAME
+from app.settings import AppConfig
 
+# The pipeline modules pull in pandas and openpyxl; they are imported on first use (normally by
+# the catalog warm-up thread) so the window is shown before they load.
+if TYPE_CHECKING:
+    from app.adapters.trip_data import PreloadedTripDataProvider
+    from app.gateways import TripDataProvider
+    from app.pipelines import FanOutEstimate, PipelineResult, ProgressContext
 
-def process_excel(input_path: Path, logger: logging.Logger) -> Path:
-    pipeline = ExcelFilePipeline()
-    return pipeline.process_file(input_path, logger)
+
+def process_excel(
+        input_path: Path,
+        logger: logging.Logger,
+        workers: int = 1,
+        output_format: str = AppConfig.output_format,
+        output_split: str = AppConfig.output_split,
+        context: Optional["ProgressContext"] = None,
+        trip_provider: Optional["TripDataProvider"] = None,
+) -> "PipelineResult":
+    from app.pipelines import ExcelFilePipeline
+
+    # The worker processes of the build also write the parts of a split output
+    cfg = AppConfig(workers=workers, output_format=output_format, output_split=output_split, output_writers=workers)
+    pipeline = ExcelFilePipeline(cfg, trip_provider=trip_provider)
+    return pipeline.run(input_path, logger, context=context)
+
+
+def estimate_excel(
+        input_path: Path,
+        logger: logging.Logger,
+        output_format: str = AppConfig.output_format,
+        context: Optional["ProgressContext"] = None,
+        trip_provider: Optional["TripDataProvider"] = None,
+) -> "FanOutEstimate":
+    from app.pipelines import ExcelFilePipeline
+
+    pipeline = ExcelFilePipeline(AppConfig(output_format=output_format), trip_provider=trip_provider)
+    return pipeline.dry_run(input_path, logger, context=context)
+
+
+class SessionCatalog:
+    """
+    The catalog shared by every run of one GUI session.
+
+    The provider is created on first use, by ``warm_up`` in the background at start-up or by
+    the first run, and then reused, so only the first of them loads the catalog.
+    """
+
+    def __init__(self) -> None:
+        self._provider: Optional["PreloadedTripDataProvider"] = None
+        self._lock = threading.Lock()
+
+    def provider(self) -> "PreloadedTripDataProvider":
+        with self._lock:
+            if self._provider is None:
+                from app.adapters.trip_data import PreloadedTripDataProvider, ResourceTripDataProvider
+
+                self._provider = PreloadedTripDataProvider(
+                    ResourceTripDataProvider(use_snapshot=AppConfig.use_catalog_snapshot),
+                )
+            return self._provider
+
+    def warm_up(self, context: Optional["ProgressContext"] = None) -> int:
+        """Load the catalog and compile its patterns; see ``app.pipelines.warm_up_catalog``."""
+        from app.pipelines import warm_up_catalog
+
+        return warm_up_catalog(self.provider(), context)
+
+    def process_excel(self, input_path: Path, logger: logging.Logger, **options) -> "PipelineResult":
+        return process_excel(input_path, logger, trip_provider=self.provider(), **options)
+
+    def estimate_excel(self, input_path: Path, logger: logging.Logger, **options) -> "FanOutEstimate":
+        return estimate_excel(input_path, logger, trip_provider=self.provider(), **options)
 
 
 # Application identifiers configured via gui/config.py
 
 
 def _configure_root_logging() -> None:
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE_NAME:
+        from app.utils.cache_dir import user_cache_dir
+
+        log_path = user_cache_dir() / LOG_FILE_NAME
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8",
+        ))
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-        ],
+        handlers=handlers,
         force=True,
     )
 
 
 def main(argv: Optional[list[str]] = None) -> int:
+    # Worker processes of a frozen (PyInstaller) app re-enter here
+    multiprocessing.freeze_support()
     _configure_root_logging()
     argv = argv if argv is not None else sys.argv
 
@@ -49,7 +128,9 @@ def main(argv: Optional[list[str]] = None) -> int:
     app = QtWidgets.QApplication(argv)
     app.setFont(QtGui.QFont())
 
-    win = MainWindow(process_excel)
+    # One catalog for the whole session: loaded in the background at start-up, reused by every run
+    catalog = SessionCatalog()
+    win = MainWindow(catalog.process_excel, catalog.warm_up, catalog.estimate_excel)
     win.show()
     return app.exec()
 
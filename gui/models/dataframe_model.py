@@ -1,26 +1,117 @@
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import pandas as pd
 from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
 
+# Rows handed to the view per fetchMore call
+FETCH_BATCH_ROWS = 500
+
+
+def _cell_text(value: Any) -> str:
+    return "" if pd.isna(value) else str(value)
+
 
 class DataFrameModel(QAbstractTableModel):
-    """Qt table model backed by a pandas DataFrame (read-only)."""
+    """Qt table model backed by a pandas DataFrame or a stream of DataFrame chunks (read-only).
+
+    Rows are exposed in batches through ``canFetchMore``/``fetchMore`` as the view scrolls, and
+    chunks are only pulled from the stream when the loaded rows run out. Cell texts are converted
+    once per column and kept in per-column caches, so repaints do not touch the frame.
+    """
 
-    def __init__(self, df: Optional[pd.DataFrame] = None) -> None:
+    def __init__(self, df: Optional[pd.DataFrame] = None, batch_rows: int = FETCH_BATCH_ROWS) -> None:
         super().__init__()
-        self._df = df if df is not None else pd.DataFrame()
+        self._batch_rows = max(1, batch_rows)
+        self._columns: list = []
+        # Loaded source frames, the row offset each one starts at and their total row count
+        self._chunks: list[pd.DataFrame] = []
+        self._offsets: list[int] = []
+        self._source_rows = 0
+        self._pending: Optional[Iterator[pd.DataFrame]] = None
+        # Rows exposed to the view and the texts converted so far, per column
+        self._visible_rows = 0
+        self._texts: list[list[str]] = []
+        if df is not None:
+            self.set_dataframe(df)
 
     def set_dataframe(self, df: pd.DataFrame) -> None:
         self.beginResetModel()
-        self._df = df
+        self._reset(list(df.columns))
+        self._append_chunk(df)
+        self._visible_rows = min(self._batch_rows, self._source_rows)
+        self.endResetModel()
+
+    def set_chunks(self, chunks: Iterable[pd.DataFrame]) -> None:
+        """Show frames from ``chunks`` (all with the same columns), reading them as the view scrolls."""
+        iterator = iter(chunks)
+        first = next(iterator, None)
+        self.beginResetModel()
+        self._reset(list(first.columns) if first is not None else [])
+        if first is not None:
+            self._append_chunk(first)
+            self._pending = iterator
+        self._visible_rows = min(self._batch_rows, self._source_rows)
         self.endResetModel()
 
+    def _reset(self, columns: list) -> None:
+        self._close_pending()
+        self._columns = columns
+        self._chunks = []
+        self._offsets = []
+        self._source_rows = 0
+        self._visible_rows = 0
+        self._texts = [[] for _ in columns]
+
+    def _append_chunk(self, df: pd.DataFrame) -> None:
+        if len(df):
+            self._chunks.append(df)
+            self._offsets.append(self._source_rows)
+            self._source_rows += len(df)
+
+    def _close_pending(self) -> None:
+        if self._pending is not None and hasattr(self._pending, "close"):
+            self._pending.close()
+        self._pending = None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:  # type: ignore[override]
+        if parent.isValid():
+            return False
+        return self._visible_rows < self._source_rows or self._pending is not None
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:  # type: ignore[override]
+        if parent.isValid():
+            return
+        while self._visible_rows + self._batch_rows > self._source_rows and self._pending is not None:
+            chunk = next(self._pending, None)
+            if chunk is None:
+                self._close_pending()
+            else:
+                self._append_chunk(chunk)
+        count = min(self._batch_rows, self._source_rows - self._visible_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visible_rows, self._visible_rows + count - 1)
+        self._visible_rows += count
+        self.endInsertRows()
+
     def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
-        return 0 if parent.isValid() else int(len(self._df))
+        return 0 if parent.isValid() else self._visible_rows
 
     def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
-        return 0 if parent.isValid() else int(len(self._df.columns))
+        return 0 if parent.isValid() else len(self._columns)
+
+    def _column_texts(self, column: int, rows: int) -> list[str]:
+        """Texts of the first ``rows`` cells of ``column``, converting the missing ones in bulk."""
+        texts = self._texts[column]
+        for chunk, offset in zip(self._chunks, self._offsets):
+            if len(texts) >= rows:
+                break
+            stop = offset + len(chunk)
+            if stop <= len(texts):
+                continue
+            values = chunk.iloc[len(texts) - offset:min(rows, stop) - offset, column].tolist()
+            texts.extend(_cell_text(value) for value in values)
+        return texts
 
     def data(self, index: QModelIndex, role: int = int(Qt.ItemDataRole.DisplayRole)) -> Any:  # type: ignore[override]
         if not index.isValid() or role not in (
@@ -28,15 +119,18 @@ class DataFrameModel(QAbstractTableModel):
                 int(Qt.ItemDataRole.EditRole),
         ):
             return None
-        value = self._df.iat[index.row(), index.column()]
-        return "" if pd.isna(value) else str(value)
+        row = index.row()
+        texts = self._texts[index.column()]
+        if row >= len(texts):
+            texts = self._column_texts(index.column(), self._visible_rows)
+        return texts[row]
 
     def headerData(self, section: int, orientation: Qt.Orientation,
                    role: int = int(Qt.ItemDataRole.DisplayRole)) -> Any:  # type: ignore[override]
         if role != int(Qt.ItemDataRole.DisplayRole):
             return None
         if orientation == Qt.Orientation.Horizontal:
-            if 0 <= section < len(self._df.columns):
-                return str(self._df.columns[section])
+            if 0 <= section < len(self._columns):
+                return str(self._columns[section])
             return ""
         return str(section + 1)
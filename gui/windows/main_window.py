@@ -1,31 +1,62 @@
 import logging
+import os
 import shutil
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from gui.logging_handlers import QtLogHandler
-from gui.worker import Worker
-from gui.models.dataframe_model import DataFrameModel
-import pandas as pd
+from gui.worker import CatalogLoader, Estimator, Worker
+from app.core.enums import OutputFormats, OutputSplits
+from app.settings import AppConfig
 from gui.styles import BASE_STYLESHEET, MARGINS, SPACING_MEDIUM, SPACING_SMALL, system_mono_font
-from gui.config import APP_ORG, APP_NAME
+from gui.config import APP_ORG, APP_NAME, LOG_FLUSH_INTERVAL_MS, LOG_VIEW_MAX_LINES
+
+# The preview model and the pipeline types need pandas; they are imported when the first result
+# arrives, so the window does not wait for pandas to load
+if TYPE_CHECKING:
+    from gui.models.dataframe_model import DataFrameModel
+    from app.pipelines import FanOutEstimate, PipelineResult
 
 # identifiers come from gui.config
 
+# Output formats offered in the toolbar and the save dialog filter for each
+_OUTPUT_FORMATS = (
+    ("Excel (openpyxl)", OutputFormats.XLSX),
+    ("Excel (xlsxwriter, fast)", OutputFormats.XLSXWRITER),
+    ("CSV", OutputFormats.CSV),
+    ("Parquet", OutputFormats.PARQUET),
+)
+# Output splits offered in the toolbar
+_OUTPUT_SPLITS = (
+    ("One file", OutputSplits.NONE),
+    ("Parts by rows", OutputSplits.ROWS),
+    ("Parts by brand", OutputSplits.BRAND),
+)
+_SAVE_FILTERS = {
+    ".xlsx": "Excel Files (*.xlsx)",
+    ".csv": "CSV Files (*.csv)",
+    ".parquet": "Parquet Files (*.parquet)",
+}
+
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, process_excel_callable) -> None:
+    def __init__(self, process_excel_callable, warm_up_callable=None, estimate_callable=None) -> None:
         super().__init__()
         self._process_excel = process_excel_callable
+        self._estimate_excel = estimate_callable
 
         self.setWindowTitle(f"{APP_ORG} - {APP_NAME}")
         self.resize(960, 640)
 
         self._selected_path: Optional[Path] = None
         self._worker: Optional[Worker] = None
+        self._catalog_loader: Optional[CatalogLoader] = None
+        # The current estimate, and every estimator still running (replaced ones finish in the background)
+        self._estimator: Optional[Estimator] = None
+        self._estimators: set[Estimator] = set()
         self._start_time_ms: Optional[int] = None
         self._settings = QtCore.QSettings(APP_ORG, APP_NAME)
 
@@ -53,6 +84,38 @@ class MainWindow(QtWidgets.QMainWindow):
         self.lbl_path.setTextInteractionFlags(QtCore.Qt.TextInteractionFlag.TextSelectableByMouse)
         toolbar.addWidget(self.lbl_path, 1)
 
+        toolbar.addWidget(QtWidgets.QLabel("Workers:"))
+        self.spin_workers = QtWidgets.QSpinBox()
+        self.spin_workers.setRange(1, max(1, os.cpu_count() or 1))
+        self.spin_workers.setToolTip(
+            f"Processes used to build mirrors and to write split outputs; "
+            f"sheets under {AppConfig.min_parallel_rows} rows are built in one process"
+        )
+        try:
+            self.spin_workers.setValue(int(self._settings.value("workers", 1)))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            self.spin_workers.setValue(1)
+        toolbar.addWidget(self.spin_workers)
+
+        toolbar.addWidget(QtWidgets.QLabel("Format:"))
+        self.combo_format = QtWidgets.QComboBox()
+        for label, output_format in _OUTPUT_FORMATS:
+            self.combo_format.addItem(label, output_format.value)
+        self.combo_format.setToolTip("Writer used for the output file")
+        saved_format = self.combo_format.findData(self._settings.value("output_format", OutputFormats.XLSX.value))
+        self.combo_format.setCurrentIndex(max(0, saved_format))
+        self.combo_format.currentIndexChanged.connect(self._on_format_changed)
+        toolbar.addWidget(self.combo_format)
+
+        toolbar.addWidget(QtWidgets.QLabel("Split:"))
+        self.combo_split = QtWidgets.QComboBox()
+        for label, output_split in _OUTPUT_SPLITS:
+            self.combo_split.addItem(label, output_split.value)
+        self.combo_split.setToolTip("Write the output as several files, each fitting on an Excel sheet")
+        saved_split = self.combo_split.findData(self._settings.value("output_split", OutputSplits.NONE.value))
+        self.combo_split.setCurrentIndex(max(0, saved_split))
+        toolbar.addWidget(self.combo_split)
+
         self.btn_process = QtWidgets.QPushButton("Process")
         self.btn_process.setProperty("primary", True)
         self.btn_process.setDefault(True)
@@ -80,10 +143,16 @@ class MainWindow(QtWidgets.QMainWindow):
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.setSpacing(SPACING_SMALL)
 
-        # Preview table (shows first N rows after processing)
-        self.preview_model = DataFrameModel()
+        # Dry run prediction for the selected file, shown before it is processed
+        self.lbl_estimate = QtWidgets.QLabel()
+        self.lbl_estimate.setWordWrap(True)
+        self.lbl_estimate.setTextInteractionFlags(QtCore.Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.lbl_estimate.setVisible(False)
+        left_layout.addWidget(self.lbl_estimate)
+
+        # Preview table (the processed rows, loaded as the view scrolls); the model is set with the first result
+        self.preview_model: Optional["DataFrameModel"] = None
         self.preview = QtWidgets.QTableView()
-        self.preview.setModel(self.preview_model)
         self.preview.setAlternatingRowColors(True)
         self.preview.horizontalHeader().setStretchLastSection(True)
         self.preview.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.NoSelection)
@@ -99,6 +168,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.logs = QtWidgets.QPlainTextEdit()
         self.logs.setReadOnly(True)
+        self.logs.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
         self.logs.setFont(system_mono_font())
         self.logs.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
         self.logs.customContextMenuRequested.connect(self._show_logs_context_menu)
@@ -119,6 +189,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Status bar
         self.status = self.statusBar()
+        self.lbl_catalog = QtWidgets.QLabel()
+        self.status.addPermanentWidget(self.lbl_catalog)
         # Toggle sidebar action
         self._act_toggle_logs = QtGui.QAction("Toggle Logs", self)
         self._act_toggle_logs.triggered.connect(self._toggle_logs_sidebar)
@@ -135,7 +207,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # Logging to UI
         self._logger = logging.getLogger("gui")
         self._logger.setLevel(logging.INFO)
-        self._qt_handler = QtLogHandler()
+        self._qt_handler = QtLogHandler(flush_interval_ms=LOG_FLUSH_INTERVAL_MS)
         self._qt_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
         self._qt_handler.sig_message.connect(self._append_log_line)
         logging.getLogger().addHandler(self._qt_handler)
@@ -143,6 +215,16 @@ class MainWindow(QtWidgets.QMainWindow):
         # Stylesheet
         self.setStyleSheet(BASE_STYLESHEET)
 
+        # Catalog warm-up; Process stays available, a run started meanwhile waits for the catalog
+        if warm_up_callable is not None:
+            self.lbl_catalog.setText("Catalog: loading…")
+            self._catalog_loader = CatalogLoader(warm_up_callable, logging.getLogger("gui.catalog"), parent=self)
+            self._catalog_loader.progressed.connect(self._on_catalog_progress)
+            self._catalog_loader.ready.connect(self._on_catalog_ready)
+            self._catalog_loader.failed.connect(self._on_catalog_failed)
+            # Started from the event loop, once the window has been shown
+            QtCore.QTimer.singleShot(0, self._catalog_loader.start)
+
     # ---------------- UI helpers ----------------
     def _show_logs_context_menu(self, pos: QtCore.QPoint) -> None:
         menu = self.logs.createStandardContextMenu()
@@ -167,6 +249,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.lbl_path.setText(elided)
 
     # ---------------- Events ----------------
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:  # type: ignore[override]
+        if self._catalog_loader is not None:
+            self._catalog_loader.cancel()
+            self._catalog_loader.wait()
+        self._stop_estimate()
+        for estimator in list(self._estimators):
+            estimator.wait()
+        logging.getLogger().removeHandler(self._qt_handler)
+        self._qt_handler.close()
+        super().closeEvent(event)
+
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:  # type: ignore[override]
         super().resizeEvent(event)
         self._update_path_label()
@@ -191,11 +284,84 @@ class MainWindow(QtWidgets.QMainWindow):
         self._update_path_label()
         self.btn_process.setEnabled(True)
         self.logs.appendPlainText(f"Selected file: {path}")
+        self._start_estimate(path)
+
+    def _start_estimate(self, path: Path) -> None:
+        """Predict the output of ``path`` in the background; a newer selection replaces the running one."""
+        if self._estimate_excel is None:
+            return
+        self._stop_estimate()
+        self.lbl_estimate.setText("Estimating output…")
+        self.lbl_estimate.setVisible(True)
+        estimator = Estimator(
+            path,
+            logging.getLogger("pipeline"),
+            self._estimate_excel,
+            options={"output_format": self.combo_format.currentData()},
+            parent=self,
+        )
+        estimator.progressed.connect(self._on_estimate_progress)
+        estimator.ready.connect(self._on_estimate_ready)
+        estimator.failed.connect(self._on_estimate_failed)
+        estimator.finished.connect(self._on_estimator_finished)
+        self._estimator = estimator
+        self._estimators.add(estimator)
+        estimator.start()
+
+    def _on_format_changed(self) -> None:
+        # The size estimate depends on the format
+        if self._selected_path is not None and self._worker is None:
+            self._start_estimate(self._selected_path)
+
+    def _stop_estimate(self) -> None:
+        """Cancel the current estimate without waiting for it; its results are ignored."""
+        if self._estimator is not None:
+            self._estimator.cancel()
+            self._estimator = None
+
+    def _on_estimator_finished(self) -> None:
+        estimator = self.sender()
+        self._estimators.discard(estimator)
+        estimator.deleteLater()
+
+    def _on_estimate_progress(self, percent: int) -> None:
+        if self.sender() is self._estimator:
+            self.lbl_estimate.setText(f"Estimating output… {percent}%")
+
+    def _on_estimate_ready(self, estimate: "FanOutEstimate") -> None:
+        if self.sender() is not self._estimator:
+            return
+        self._estimator = None
+        text = (
+            f"Predicted output: {estimate.rows_out:,} rows from {estimate.rows_in:,} "
+            f"({estimate.rows_out - estimate.rows_in:,} mirrors); {estimate.unresolved_entries:,} of "
+            f"{estimate.compat_entries:,} compatibility entries unresolved ({estimate.unresolved_distinct:,} distinct)"
+        )
+        if estimate.est_output_bytes is not None:
+            text += f"; about {estimate.est_output_bytes / 2 ** 20:.1f} MiB and {estimate.est_seconds:.0f}s"
+        if estimate.exceeds_sheet_limit and self.combo_split.currentData() == OutputSplits.NONE.value:
+            text += ". Too many rows for one Excel sheet: choose a split"
+        self.lbl_estimate.setText(text)
+        if estimate.unresolved_models:
+            self.lbl_estimate.setToolTip("Unresolved: " + ", ".join(estimate.unresolved_models))
+
+    def _on_estimate_failed(self, message: str) -> None:
+        if self.sender() is not self._estimator:
+            return
+        self._estimator = None
+        self.lbl_estimate.setText("Output estimate failed; see the logs")
 
     def on_start_processing(self) -> None:
         if not self._selected_path:
             return
+        # The run reports the real numbers; an estimate still running only competes with it
+        if self._estimator is not None:
+            self._stop_estimate()
+            self.lbl_estimate.setVisible(False)
         self.logs.clear()
+        self.status.clearMessage()
+        # Busy indicator until the pipeline reports its first percentage
+        self.progress.setRange(0, 0)
         self.progress.setVisible(True)
         self.btn_process.setEnabled(False)
         self.btn_cancel.setEnabled(True)
@@ -204,33 +370,86 @@ class MainWindow(QtWidgets.QMainWindow):
         worker_logger = logging.getLogger("pipeline")
         worker_logger.setLevel(logging.INFO)
 
-        self._worker = Worker(self._selected_path, worker_logger, self._process_excel, parent=self)
+        self._settings.setValue("workers", self.spin_workers.value())
+        self._settings.setValue("output_format", self.combo_format.currentData())
+        self._settings.setValue("output_split", self.combo_split.currentData())
+        self._worker = Worker(
+            self._selected_path,
+            worker_logger,
+            self._process_excel,
+            options={
+                "workers": self.spin_workers.value(),
+                "output_format": self.combo_format.currentData(),
+                "output_split": self.combo_split.currentData(),
+            },
+            parent=self,
+        )
         self._worker.finished_ok.connect(self._on_worker_success)
         self._worker.failed.connect(self._on_worker_failed)
+        self._worker.cancelled.connect(self._on_worker_cancelled)
+        self._worker.progressed.connect(self._on_worker_progress)
         self._worker.finished.connect(self._on_worker_finished)
         self._worker.start()
 
     def on_cancel(self) -> None:
         if self._worker is not None:
             self._worker.cancel()
+            self.btn_cancel.setEnabled(False)
             self.logs.appendPlainText("Cancellation requested…")
 
-    def _on_worker_success(self, output_path: Path) -> None:
+    def _on_catalog_progress(self, percent: int) -> None:
+        self.lbl_catalog.setText(f"Catalog: loading… {percent}%")
+
+    def _on_catalog_ready(self, seconds: float) -> None:
+        self.lbl_catalog.setText("Catalog ready")
+        self.lbl_catalog.setToolTip(f"Loaded and compiled in {seconds:.2f}s")
+        self._catalog_loader = None
+
+    def _on_catalog_failed(self, message: str) -> None:
+        self.lbl_catalog.setText("Catalog: not loaded")
+        self.lbl_catalog.setToolTip(message)
+        self._catalog_loader = None
+
+    def _on_worker_progress(self, percent: int) -> None:
+        if self.progress.maximum() == 0:
+            self.progress.setRange(0, 100)
+        self.progress.setValue(percent)
+
+    def _ensure_preview_model(self) -> "DataFrameModel":
+        if self.preview_model is None:
+            from gui.models.dataframe_model import DataFrameModel
+
+            self.preview_model = DataFrameModel()
+            self.preview.setModel(self.preview_model)
+        return self.preview_model
+
+    def _on_worker_success(self, result: "PipelineResult") -> None:
+        output_path = result.output_path
         self.logs.appendPlainText(f"Processing finished. Temporary output: {output_path}")
-        # Try to load a small preview from the output file
-        try:
-            df = pd.read_excel(str(output_path))
-        except (OSError, ValueError) as exc:
-            logging.getLogger().error("Failed to load preview from output: %s", exc)
-        else:
-            self.preview_model.set_dataframe(df.head(200))
+        # A split output is previewed from its first part
+        preview_path = result.parts[0] if result.parts else output_path
+        if result.frame is not None:
+            self._ensure_preview_model().set_dataframe(result.frame)
+        elif preview_path.suffix.lower() == ".xlsx":
+            from app.adapters.excel.openpyxl_stream import iter_sheet_chunks
+            from gui.models.dataframe_model import FETCH_BATCH_ROWS
+
+            # Streamed runs do not keep their rows; page through the output file instead
+            try:
+                self._ensure_preview_model().set_chunks(
+                    iter_sheet_chunks(str(preview_path), AppConfig().sheet_name, FETCH_BATCH_ROWS))
+            except (OSError, ValueError, KeyError) as exc:
+                logging.getLogger().error("Failed to load preview from output: %s", exc)
+        if result.parts:
+            self._save_parts(result)
+            return
         suggested = output_path.name
         start_dir = str(self._settings.value("last_dir", str(Path.home())))
         save_path, _ = QtWidgets.QFileDialog.getSaveFileName(
             self,
             "Save As",
             str(Path(start_dir) / suggested),
-            "Excel Files (*.xlsx)"
+            _SAVE_FILTERS.get(output_path.suffix.lower(), "All Files (*)")
         )
         if save_path:
             try:
@@ -247,15 +466,46 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             self.logs.appendPlainText("Save canceled. Temporary file remains at: " + str(output_path))
 
+    def _save_parts(self, result: "PipelineResult") -> None:
+        """Copy the parts of a split output and their manifest into a folder the user picks."""
+        from app.pipelines.output_partitions import remove_previous_parts
+
+        parts_dir = result.output_path.parent
+        start_dir = str(self._settings.value("last_dir", str(Path.home())))
+        target_root = QtWidgets.QFileDialog.getExistingDirectory(self, "Save Parts To", start_dir)
+        if not target_root:
+            self.logs.appendPlainText("Save canceled. Temporary files remain in: " + str(parts_dir))
+            return
+        target = Path(target_root) / parts_dir.name
+        try:
+            if target.resolve() == parts_dir.resolve():
+                self.logs.appendPlainText("Destination is the temporary folder. Skipping copy.")
+                return
+            target.mkdir(exist_ok=True)
+            remove_previous_parts(target)
+            for path in (*result.parts, result.output_path):
+                shutil.copyfile(str(path), str(target / path.name))
+        except OSError as exc:
+            logging.getLogger().error("Failed to save output files: %s", exc)
+            QtWidgets.QMessageBox.critical(self, "Save Error", str(exc))
+        else:
+            self.logs.appendPlainText(f"Saved {len(result.parts)} parts to: {target}")
+            self._settings.setValue("last_dir", target_root)
+
+    def _on_worker_cancelled(self) -> None:
+        self.logs.appendPlainText("Processing cancelled.")
+        self.status.showMessage("Cancelled")
+
     def _on_worker_failed(self, message: str) -> None:
         self.logs.appendPlainText("ERROR: " + message)
         QtWidgets.QMessageBox.critical(self, "Processing Error", message)
 
     def _on_worker_finished(self) -> None:
+        self._qt_handler.flush()
         self.progress.setVisible(False)
         self.btn_cancel.setEnabled(False)
         self.btn_process.setEnabled(self._selected_path is not None)
-        if self._start_time_ms is not None:
+        if self._start_time_ms is not None and self.status.currentMessage() != "Cancelled":
             elapsed_ms = QtCore.QTime.currentTime().msecsSinceStartOfDay() - self._start_time_ms
             self.status.showMessage(f"Done in {elapsed_ms / 1000:.2f}s")
         self._worker = None
@@ -1,62 +1,173 @@
 import logging
+import time
 import traceback
 from pathlib import Path
-from typing import Optional, Callable
+from typing import TYPE_CHECKING, Any, Optional, Callable
 
 from PySide6 import QtCore
 
+if TYPE_CHECKING:
+    from app.pipelines import FanOutEstimate, PipelineResult, ProgressContext
 
-class Worker(QtCore.QThread):
+# app.pipelines (and with it pandas/openpyxl) is imported inside run(), in the background
+# thread, so that creating these threads never loads it on the GUI thread.
+
+
+class _CancellableThread(QtCore.QThread):
+    """QThread with a ``ProgressContext`` created in ``run`` that ``cancel`` may precede."""
+
+    progressed = QtCore.Signal(int)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._context: Optional["ProgressContext"] = None
+        self._cancel_requested = False
+
+    def cancel(self) -> None:
+        """Request cancellation; the pipeline stops at its next progress check."""
+        self._cancel_requested = True
+        if self._context is not None:
+            self._context.cancel()
+
+    def _start_context(self) -> "ProgressContext":
+        from app.pipelines import ProgressContext
+
+        # Signals are queued to the GUI thread, so the pipeline can report from here
+        self._context = ProgressContext(on_progress=self.progressed.emit)
+        if self._cancel_requested:
+            self._context.cancel()
+        return self._context
+
+
+class Worker(_CancellableThread):
     """Background worker that runs the Excel processing pipeline.
 
     Signals:
-        finished_ok(Path): Processing finished successfully, provides output path.
+        finished_ok(PipelineResult): Processing finished successfully, provides the output path
+            and, for in-memory runs, the built rows.
         failed(str): Processing failed, provides error message/trace.
-        progressed(int): Optional progress updates (0-100). Not used for now.
+        cancelled(): Processing stopped after a cancellation request.
+        progressed(int): Progress updates (0-100) reported by the pipeline.
     """
 
-    finished_ok = QtCore.Signal(Path)
+    finished_ok = QtCore.Signal(object)
     failed = QtCore.Signal(str)
-    progressed = QtCore.Signal(int)
+    cancelled = QtCore.Signal()
 
     def __init__(
             self,
             input_path: Path,
             logger: logging.Logger,
-            processor: Callable[[Path, logging.Logger], Path],
+            processor: Callable[..., "PipelineResult"],
+            options: Optional[dict[str, Any]] = None,
             parent: Optional[QtCore.QObject] = None,
     ) -> None:
         super().__init__(parent)
         self._input_path = input_path
         self._logger = logger
         self._processor = processor
-        self._cancel_requested = False
+        self._options = options or {}
 
-    def cancel(self) -> None:
-        """Request cancellation. Pipeline may choose to check a flag.
+    def run(self) -> None:  # type: ignore[override]
+        from app.pipelines import OperationCancelled
 
-        If the underlying pipeline does not support cooperative cancellation,
-        the UI will still reflect that cancellation was requested.
-        """
-        self._cancel_requested = True
-        # If your pipeline supports it, you can pass this flag via the logger or a context.
+        try:
+            context = self._start_context()
+            context.check()
+            self._logger.info(f"Starting processing: {self._input_path}")
+            result = self._processor(self._input_path, self._logger, context=context, **self._options)
+            self.finished_ok.emit(result)
+        except OperationCancelled:
+            self._logger.info("Processing cancelled.")
+            self.cancelled.emit()
+        except (Exception,):
+            trace = traceback.format_exc()
+            try:
+                self._logger.exception("Processing failed with an exception")
+            finally:
+                self.failed.emit(trace)
+
+
+class CatalogLoader(_CancellableThread):
+    """Background thread that loads the catalog and compiles its patterns once, at start-up.
+
+    Signals:
+        ready(float): The catalog is loaded and warm, provides the seconds it took.
+        failed(str): Loading failed, provides error message/trace.
+        progressed(int): Progress updates (0-100) while the patterns are compiled.
+    """
+
+    ready = QtCore.Signal(float)
+    failed = QtCore.Signal(str)
+
+    def __init__(
+            self,
+            warm_up: Callable[..., Any],
+            logger: logging.Logger,
+            parent: Optional[QtCore.QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self._warm_up = warm_up
+        self._logger = logger
 
     def run(self) -> None:  # type: ignore[override]
+        started = time.perf_counter()
+        from app.pipelines import OperationCancelled
+
         try:
-            if self._cancel_requested:
-                self._logger.info("Cancelled before start.")
-                self.failed.emit("Cancelled")
-                return
+            self._warm_up(context=self._start_context())
+        except OperationCancelled:
+            return
+        except (Exception,):
+            trace = traceback.format_exc()
+            try:
+                self._logger.exception("Catalog loading failed with an exception")
+            finally:
+                self.failed.emit(trace)
+            return
+        elapsed = time.perf_counter() - started
+        self._logger.info("Catalog ready in %.2fs", elapsed)
+        self.ready.emit(elapsed)
 
-            self._logger.info(f"Starting processing: {self._input_path}")
-            output = self._processor(self._input_path, self._logger)
 
-            if self._cancel_requested:
-                self._logger.info("Cancellation requested after processing.")
-            self.finished_ok.emit(output)
+class Estimator(_CancellableThread):
+    """Background thread that runs a dry run of the pipeline for the selected file.
+
+    Signals:
+        ready(FanOutEstimate): The prediction for a full run.
+        failed(str): The dry run failed, provides error message/trace.
+        progressed(int): Progress updates (0-100) reported by the dry run.
+    """
+
+    ready = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    def __init__(
+            self,
+            input_path: Path,
+            logger: logging.Logger,
+            estimate: Callable[..., "FanOutEstimate"],
+            options: Optional[dict[str, Any]] = None,
+            parent: Optional[QtCore.QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self._input_path = input_path
+        self._logger = logger
+        self._estimate = estimate
+        self._options = options or {}
+
+    def run(self) -> None:  # type: ignore[override]
+        from app.pipelines import OperationCancelled
+
+        try:
+            result = self._estimate(self._input_path, self._logger, context=self._start_context(), **self._options)
+        except OperationCancelled:
+            return
         except (Exception,):
             trace = traceback.format_exc()
             try:
-                self._logger.exception("Processing failed with an exception")
+                self._logger.exception("Dry run failed with an exception")
             finally:
                 self.failed.emit(trace)
+            return
+        self.ready.emit(result)
@@ -0,0 +1,228 @@
+"""
+The mirror build as it was before the optimizations: a regex search per column and language,
+a keyword regex per part, a full resolver lookup per compatibility entry and one
+``pd.Series`` per built row. Regression tests compare the optimized paths against it.
+"""
+from functools import lru_cache
+from typing import Optional
+import re
+
+import pandas as pd
+from pandas import DataFrame
+
+from app.core.enums import CustomExcelColumns, ExcelColumns, RecordTypeChoices
+from app.core.services.compat_utils import clear_fields, dedupe_models, same_pair
+from app.settings import (
+    ALLOWED_LANGUAGES,
+    BRAND_MODEL_COLUMNS,
+    KEYWORDS_DROP_UNCHANGED,
+    KEYWORDS_MAX_LEN,
+    MIRROR_CLEAR_COLUMNS,
+)
+from app.utils.finder import pair_regex_both, token_to_regex
+
+_CYRILLIC = re.compile(r"[А-Яа-яЁёІіЇїЄєҐґ]")
+
+
+@lru_cache(maxsize=None)
+def _pair_patterns(trip_key: tuple) -> dict:
+    return {lang: pair_regex_both(brand, model) for lang, brand, model in trip_key}
+
+
+def _trip_key(trip: dict) -> tuple:
+    return tuple((lang, trip[lang]["brand"], trip[lang]["model"]) for lang in ("ua", "ru", "en"))
+
+
+def replace_pair_once(text: str, trip: dict, dst_brand: str, dst_model: str) -> str:
+    """Replace the first "brand model"/"model brand" spelling of ``trip`` by the destination pair."""
+    if not text:
+        return text
+    patterns = _pair_patterns(_trip_key(trip))
+    for language in ALLOWED_LANGUAGES:
+        regex_brand_model, regex_model_brand = patterns[language]
+        match = regex_brand_model.search(text) or regex_model_brand.search(text)
+        if not match:
+            continue
+        sep = match.groupdict().get("sep") or " "
+        return text[:match.start()] + f"{dst_brand}{sep}{dst_model}" + text[match.end():]
+    return text
+
+
+@lru_cache(maxsize=None)
+def _model_regex(model: str) -> Optional[re.Pattern]:
+    if not model or not model.strip():
+        return None
+    return re.compile(r"(?<!\w)" + token_to_regex(model.strip()) + r"(?!\w)", flags=re.IGNORECASE | re.UNICODE)
+
+
+def _truncate_join(parts: list[str], limit: int, sep: str = ", ") -> str:
+    out: list[str] = []
+    total = 0
+    for part in parts:
+        add = len(part) if not out else len(sep) + len(part)
+        if total + add > limit:
+            break
+        out.append(part)
+        total += add
+    return sep.join(out)
+
+
+def normalize_keywords(raw, src_trip: dict, dst_trip: dict, cyrillic_lang: str):
+    """Keyword cell with the source model of every part replaced, unchanged parts dropped and duplicates removed."""
+    if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+        return raw
+    raw_str = str(raw).strip()
+    if not raw_str:
+        return raw
+
+    out, seen = [], set()
+    for part in (p.strip() for p in re.split(r"\s*,\s*", raw_str) if p.strip()):
+        first = cyrillic_lang if _CYRILLIC.search(part) else "en"
+        new_part, changed = part, False
+        for lang in [first] + [lang for lang in ALLOWED_LANGUAGES if lang != first]:
+            rx = _model_regex(src_trip[lang]["model"])
+            match = rx.search(part) if rx else None
+            if match:
+                new_part = part[:match.start()] + dst_trip[lang]["model"] + part[match.end():]
+                changed = True
+                break
+        if KEYWORDS_DROP_UNCHANGED and not changed:
+            continue
+        key = new_part.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(new_part)
+    return _truncate_join(out, KEYWORDS_MAX_LEN)
+
+
+def _norm(value: str) -> str:
+    return " ".join(str(value).strip().lower().split())
+
+
+def _base_token(model: str) -> Optional[str]:
+    tokens = [token for token in re.split(r"[\s.\-_/]+", model) if token]
+    if not tokens or (len(tokens[0]) < 2 and not any(ch.isdigit() for ch in tokens[0])):
+        return None
+    return tokens[0].lower()
+
+
+class BaselineResolver:
+    """Compatibility model names to triplets: the exact name in any language, else its first token."""
+
+    def __init__(self, triplets_raw: list[dict]) -> None:
+        self._full_map: dict[str, list[tuple[dict, set[str]]]] = {}
+        self._base_map: dict[str, list[tuple[dict, set[str]]]] = {}
+        for trip in triplets_raw:
+            ref = (trip, {trip[lang]["brand"].lower() for lang in ("ua", "ru", "en")})
+            for lang in ALLOWED_LANGUAGES:
+                model = trip[lang]["model"]
+                if not model:
+                    continue
+                self._full_map.setdefault(_norm(model), []).append(ref)
+                base = _base_token(model)
+                if base:
+                    self._base_map.setdefault(base, []).append(ref)
+
+    def resolve(self, model: str, prefer_brand: Optional[str] = None, *, allow_base_fallback: bool = True):
+        if model is None:
+            return None
+
+        def pick(candidates: list[tuple[dict, set[str]]]) -> Optional[dict]:
+            if not candidates:
+                return None
+            if prefer_brand:
+                for trip, brands in candidates:
+                    if prefer_brand.strip().lower() in brands:
+                        return trip
+            return candidates[0][0]
+
+        key = _norm(model)
+        resolved = pick(self._full_map.get(key, []))
+        if resolved or not allow_base_fallback:
+            return resolved
+        tokens = [token for token in re.split(r"[\s.\-_/]+", key) if token]
+        return pick(self._base_map.get(tokens[0], [])) if tokens else None
+
+
+class BaselineBuilder:
+    """Original + mirror rows of every input row, built one ``pd.Series`` at a time."""
+
+    def __init__(
+            self,
+            triplets_raw: list[dict],
+            filtered_groups: Optional[dict[str, str]] = None,
+            include_record_type: bool = False,
+    ) -> None:
+        # Lowercase (brand, model) of every language combination; later triplets win
+        self.pairs: dict[tuple[str, str], dict] = {}
+        for trip in triplets_raw:
+            for brand_lang in ALLOWED_LANGUAGES:
+                for model_lang in ALLOWED_LANGUAGES:
+                    self.pairs[(trip[brand_lang]["brand"].lower(), trip[model_lang]["model"].lower())] = trip
+        self.resolver = BaselineResolver(triplets_raw)
+        self._filtered_groups = filtered_groups or {}
+        self._include_record_type = include_record_type
+
+    def resolve(self, model: str) -> Optional[dict]:
+        return self.resolver.resolve(model, allow_base_fallback=False)
+
+    def source_trip(self, brand: str, model: str) -> Optional[dict]:
+        return self.pairs.get((str(brand).lower(), str(model).lower()))
+
+    def apply_all(self, row: pd.Series, src_brand: str, src_model: str, dst_pair: Optional[dict] = None) -> pd.Series:
+        """Rewrite the brand/model and keyword columns of ``row`` from the source pair to ``dst_pair``."""
+        src_trip = self.source_trip(src_brand, src_model)
+        if not src_trip:
+            return row
+        dst_trip = dst_pair or src_trip
+        for column, lang in BRAND_MODEL_COLUMNS:
+            if column in row:
+                text = "" if pd.isna(row.get(column)) else str(row.get(column))
+                row[column] = replace_pair_once(text, src_trip, dst_trip[lang]["brand"], dst_trip[lang]["model"])
+        for column, lang in ((ExcelColumns.KEYWORDS_RU.value, "ru"), (ExcelColumns.KEYWORDS_UA.value, "ua")):
+            if column in row.index:
+                row[column] = normalize_keywords(row.get(column), src_trip, dst_trip, lang)
+        return row
+
+    def build_rows_for(self, row: pd.Series) -> list[pd.Series]:
+        brand = row.get(ExcelColumns.BRAND.value, "")
+        model = row.get(ExcelColumns.MODEL.value, "")
+
+        original = row.copy()
+        if self._include_record_type:
+            original[CustomExcelColumns.RECORD_TYPE.value] = RecordTypeChoices.ORIGINAL.value
+        result = [self.apply_all(original, brand, model)]
+
+        for compat_model in dedupe_models(row.get(ExcelColumns.COMPATIBILITY.value, "")):
+            trip = self.resolve(compat_model)
+            if not trip or same_pair(trip["en"]["brand"], trip["en"]["model"], brand, model):
+                continue
+            mirror = row.copy()
+            for lang, brand_column, model_column in (
+                    ("en", ExcelColumns.BRAND, ExcelColumns.MODEL),
+                    ("ru", ExcelColumns.BRAND_CYRILLIC, ExcelColumns.MODEL_CYRILLIC),
+                    ("ua", ExcelColumns.BRAND_CYRILLIC_UA, ExcelColumns.MODEL_CYRILLIC_UA),
+            ):
+                mirror[brand_column.value] = trip[lang]["brand"]
+                mirror[model_column.value] = trip[lang]["model"]
+            if ExcelColumns.BAS_CATEGORY.value in mirror:
+                mirror[ExcelColumns.BAS_CATEGORY.value] = trip["en"]["model"]
+            group_code = self._filtered_groups.get(trip["en"]["model"])
+            if group_code:
+                mirror[ExcelColumns.GROUP_NAME.value] = trip["en"]["model"]
+                mirror[ExcelColumns.GROUP_CODE.value] = group_code
+            if self._include_record_type:
+                mirror[CustomExcelColumns.RECORD_TYPE.value] = RecordTypeChoices.MIRROR.value
+            mirror[ExcelColumns.NEW_ARTICLE.value] = mirror.get(ExcelColumns.ARTICLE.value)
+            mirror[ExcelColumns.ARTICLE.value] = pd.NA
+            mirror = clear_fields(mirror, MIRROR_CLEAR_COLUMNS)
+            result.append(self.apply_all(mirror, brand, model, trip))
+        return result
+
+    def process(self, df: DataFrame) -> DataFrame:
+        rows = [built for _, row in df.iterrows() for built in self.build_rows_for(row)]
+        if not rows:
+            return df.copy()
+        result = pd.DataFrame(rows)
+        return result[[c for c in df.columns if c in result.columns] + [c for c in result.columns if c not in df.columns]]
@@ -0,0 +1,8 @@
+import pytest
+
+from app.adapters.trip_data import PreloadedTripDataProvider, ResourceTripDataProvider
+
+
+@pytest.fixture(scope="session")
+def provider() -> PreloadedTripDataProvider:
+    return PreloadedTripDataProvider(ResourceTripDataProvider(use_snapshot=False)).preload()
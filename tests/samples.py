@@ -0,0 +1,51 @@
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+from app.core.enums import ExcelColumns
+from app.core.services import MirrorBuilder, RowTransformer
+from app.settings import AppConfig
+from benchmarks.workload import WorkloadSpec, generate_frame
+from tests.baseline import BaselineBuilder
+
+SAMPLE = Path(__file__).resolve().parent.parent / "test.xlsx"
+
+
+def write_sample(path: Path, rows: int, blank_compat: int, drop: Sequence[str] = ()) -> Path:
+    """Write ``rows`` copies of the sample row, the first ``blank_compat`` without compatibility models."""
+    df = pd.read_excel(SAMPLE, sheet_name=AppConfig.sheet_name)
+    df = pd.concat([df] * rows, ignore_index=True).drop(columns=list(drop))
+    df[ExcelColumns.COMPATIBILITY.value] = df[ExcelColumns.COMPATIBILITY.value].astype(object)
+    df.loc[:blank_compat - 1, ExcelColumns.COMPATIBILITY.value] = None
+    df.to_excel(path, sheet_name=AppConfig.sheet_name, index=False)
+    return path
+
+
+def synthetic_frame(provider, rows: int, **spec) -> pd.DataFrame:
+    """A benchmark workload of ``rows`` rows over the catalog of ``provider`` (see ``benchmarks.workload``)."""
+    return generate_frame(WorkloadSpec(rows=rows, **spec), provider.load_triplets().raw)
+
+
+def make_builder(provider, include_record_type: bool = False, **kwargs) -> MirrorBuilder:
+    """A mirror builder as the pipeline sets it up; ``kwargs`` go to ``MirrorBuilder``."""
+    triplets = provider.load_triplets()
+    trip_index = provider.build_index(triplets)
+    return MirrorBuilder(
+        transformer=RowTransformer(trip_index=trip_index, triplets=triplets),
+        trip_index=trip_index,
+        resolver=provider.build_resolver(triplets),
+        include_record_type=include_record_type,
+        filtered_groups=provider.load_filtered_groups(),
+        **kwargs,
+    )
+
+
+def make_baseline(provider, include_record_type: bool = False) -> BaselineBuilder:
+    return BaselineBuilder(provider.load_triplets().raw, provider.load_filtered_groups(), include_record_type)
+
+
+def write_workload(provider, path: Path, rows: int) -> Path:
+    """Write a ``synthetic_frame`` of ``rows`` rows as the input sheet."""
+    synthetic_frame(provider, rows).to_excel(path, sheet_name=AppConfig.sheet_name, index=False)
+    return path
@@ -0,0 +1,119 @@
+import random
+import re
+from typing import Optional
+
+import pytest
+
+from app.settings import ALLOWED_LANGUAGES
+from app.utils.brand_model_matcher import BrandModelMatcher, fold, skeleton_pattern
+from app.utils.finder import pair_regex_both, token_to_regex
+
+
+def _regex_find(text: str, brand: str, model: str) -> Optional[tuple]:
+    """What the baseline searched: "brand model" first, then "model brand"."""
+    regex_brand_model, regex_model_brand = pair_regex_both(brand, model)
+    for order, regex in (("bm", regex_brand_model), ("mb", regex_model_brand)):
+        match = regex.search(text)
+        if match:
+            return match.start(), match.end(), order, match.group("sep")
+    return None
+
+
+def _find(matcher: BrandModelMatcher, text: str, brand: str, model: str) -> Optional[tuple]:
+    match = matcher.find_pair(text, brand, model)
+    return None if match is None else (match.start, match.end, match.order, match.sep)
+
+
+@pytest.fixture(scope="module")
+def pairs(provider) -> list[tuple[str, str]]:
+    return sorted({(trip[lang]["brand"], trip[lang]["model"])
+                   for trip in provider.load_triplets().raw for lang in ALLOWED_LANGUAGES})
+
+
+@pytest.fixture(scope="module")
+def matcher(provider) -> BrandModelMatcher:
+    return BrandModelMatcher(provider.load_triplets().raw)
+
+
+def _texts(rnd: random.Random, pairs: list[tuple[str, str]], brand: str, model: str) -> list[str]:
+    other_brand, other_model = rnd.choice(pairs)
+    return [
+        f"Реле {brand} {model} оригинал",
+        f"{model} {brand}",
+        f"{brand.upper()}  {model.lower()}, {brand}-{model}",
+        f"{other_brand} {other_model} / {model} {brand} / {brand} {model}",
+        f"x{brand} {model}",
+        f"{brand} {model}1, {brand}_{model}",
+        f"{brand}{model}",
+        f"{brand[:2]} {brand[2:]} {model}, {model[:1]}-{model[1:]}.{brand}",
+        f"{brand} {other_model} {model}",
+        f"{other_brand} {other_model}",
+        "",
+    ]
+
+
+def test_catalog_pairs_match_like_the_pair_regexes(matcher, pairs):
+    rnd = random.Random(3)
+    for brand, model in rnd.sample(pairs, min(len(pairs), 300)):
+        for text in _texts(rnd, pairs, brand, model):
+            assert _find(matcher, text, brand, model) == _regex_find(text, brand, model), (text, brand, model)
+
+
+def test_memoized_scans_are_shared_between_pairs(matcher, pairs):
+    text = " | ".join(f"{brand} {model}" for brand, model in pairs[:20])
+    matcher.scan.cache_clear()
+    for brand, model in pairs[:20]:
+        assert _find(matcher, text, brand, model) == _regex_find(text, brand, model)
+    assert matcher.scan.cache_info().misses == 1
+
+
+# Names with lookalike letters, inner separators, digits and characters the skeleton form cannot fold
+_NAMES = [
+    ("Opel", "Astra H"), ("BMW", "X5 E70"), ("BMW", "1 E81"), ("Mercedes-Benz", "W124"), ("Škoda", "Octavia"),
+    ("Audi", "A4"), ("Хонда", "CR-V"), ("Citroën", "C4"), ("Opel", "-Class"), ("Kia", "Pıcanto"), ("Seat", "Ibiza"),
+]
+
+_SEPARATORS = [" ", "", "  ", ".", "-", "_", " - ", "\t", "\n", "\xa0", "\u2003", "\u3000", "/"]
+
+
+def _lookalike(text: str) -> str:
+    return text.translate(str.maketrans("AaBCEeHKMOoPpTXxYy", "АаВСЕеНКМОоРрТХхУу"))
+
+
+def _spellings(brand: str, model: str) -> list[str]:
+    texts = []
+    for sep in _SEPARATORS:
+        texts += [f"{brand}{sep}{model}", f"{model}{sep}{brand}", f"{model.replace(' ', sep)}{sep}{brand}"]
+    texts += [_lookalike(f"{brand} {model}"), _lookalike(brand) + " " + model.lower(), f"{brand.upper()} {model}"]
+    return texts
+
+
+def _contexts(text: str) -> list[str]:
+    return [text, f"Реле {text} оригинал", f"x{text}", f"{text}1", f"_{text}_", f"{text}ё", f"ё{text}", f"({text})",
+            f"{text} ı", f"İ {text}", f"ſ{text}", f"{text}, {text}"]
+
+
+def test_separators_boundaries_and_lookalikes_match_like_the_regexes(provider):
+    triplets = [{lang: {"brand": brand, "model": model} for lang in ALLOWED_LANGUAGES} for brand, model in _NAMES]
+    matcher = BrandModelMatcher(provider.load_triplets().raw + triplets)
+    for brand, model in _NAMES:
+        for spelling in _spellings(brand, model):
+            for text in _contexts(spelling):
+                assert _find(matcher, text, brand, model) == _regex_find(text, brand, model), (text, brand, model)
+
+
+def test_skeleton_literals_match_like_the_model_regexes():
+    literal = 0
+    for _, model in _NAMES:
+        regex = re.compile(r"(?<!\w)" + token_to_regex(model) + r"(?!\w)", flags=re.IGNORECASE | re.UNICODE)
+        pattern = skeleton_pattern(model)
+        for spelling in [model, _lookalike(model), model.upper(), *(model.replace(" ", sep) for sep in _SEPARATORS)]:
+            for text in _contexts(spelling):
+                folded = fold(text)
+                if pattern is None or folded is None:
+                    # Callers search these with the regex
+                    continue
+                match = regex.search(text)
+                assert folded.search(pattern) == (match.span() if match else None), (text, model)
+                literal += 1
+    assert literal > 1000
@@ -0,0 +1,115 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import app.adapters.trip_data.catalog_snapshot as catalog_snapshot
+from app.adapters.trip_data import ResourceTripDataProvider
+from app.adapters.trip_data.catalog_snapshot import CatalogSnapshotStore
+
+
+def _trip(brand: str, model: str) -> dict:
+    return {lang: {"brand": brand, "model": model} for lang in ("en", "ua", "ru")}
+
+
+@pytest.fixture
+def resources(tmp_path) -> Path:
+    base = tmp_path / "resources"
+    base.mkdir()
+    (base / "opel.json").write_text(json.dumps([_trip("Opel", "Astra"), _trip("Opel", "Vectra")]), encoding="utf-8")
+    (tmp_path / "filtered_groups.json").write_text(json.dumps({"Astra": "G1"}), encoding="utf-8")
+    return base
+
+
+def _load(resources: Path) -> ResourceTripDataProvider:
+    provider = ResourceTripDataProvider(resources, snapshot_path=resources.parent / "catalog.pickle")
+    triplets = provider.load_triplets()
+    provider.build_index(triplets)
+    return provider
+
+
+def _stored(resources: Path):
+    """The snapshot as a provider for the current resource files would find it."""
+    sources = sorted(resources.glob("*.json")) + [resources.parent / "filtered_groups.json"]
+    return CatalogSnapshotStore(resources.parent / "catalog.pickle").load(sources)
+
+
+def _models(provider: ResourceTripDataProvider) -> list[str]:
+    return [trip["en"]["model"] for trip in provider.load_triplets().raw]
+
+
+def _rewrite(path: Path, text: str) -> None:
+    """Replace the file contents, moving its mtime on even on coarse-grained clocks."""
+    mtime_ns = path.stat().st_mtime_ns
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+
+
+def test_snapshot_matches_the_parsed_catalog(resources):
+    _load(resources)
+    assert _stored(resources) is not None
+    cached = _load(resources)
+
+    parsed = ResourceTripDataProvider(resources, use_snapshot=False)
+    assert cached.load_triplets().raw == parsed.load_triplets().raw
+    assert cached.load_filtered_groups() == parsed.load_filtered_groups() == {"Astra": "G1"}
+    triplets = cached.load_triplets()
+    assert cached.build_index(triplets).get_pair("opel", "vectra")["en"]["model"] == "Vectra"
+    assert cached.build_resolver(triplets).resolve("Astra", allow_base_fallback=False)["en"]["model"] == "Astra"
+
+
+def test_changed_resource_rebuilds_the_snapshot(resources, caplog):
+    _load(resources)
+    _rewrite(resources / "opel.json", json.dumps([_trip("Opel", "Zafira")]))
+    with caplog.at_level("INFO"):
+        assert _models(_load(resources)) == ["Zafira"]
+    assert "Catalog resources changed" in caplog.text
+
+
+def test_same_size_edit_is_caught_by_the_content_hash(resources):
+    _load(resources)
+    path = resources / "opel.json"
+    _rewrite(path, path.read_text(encoding="utf-8").replace("Astra", "Aster"))
+    assert _models(_load(resources)) == ["Aster", "Vectra"]
+
+
+def test_touched_resource_keeps_the_snapshot(resources, monkeypatch, caplog):
+    _load(resources)
+    path = resources / "opel.json"
+    _rewrite(path, path.read_text(encoding="utf-8"))
+    with caplog.at_level("INFO"):
+        assert _models(_load(resources)) == ["Astra", "Vectra"]
+    assert "Catalog loaded from snapshot" in caplog.text
+
+    # Re-stamped: the next load does not hash the file again
+    hashed = []
+    sha256 = catalog_snapshot._sha256
+    monkeypatch.setattr(catalog_snapshot, "_sha256", lambda p: hashed.append(p) or sha256(p))
+    _load(resources)
+    assert hashed == []
+
+
+def test_added_or_removed_resource_rebuilds_the_snapshot(resources):
+    _load(resources)
+    (resources / "seat.json").write_text(json.dumps([_trip("Seat", "Leon")]), encoding="utf-8")
+    assert _models(_load(resources)) == ["Astra", "Vectra", "Leon"]
+    (resources / "opel.json").unlink()
+    assert _models(_load(resources)) == ["Leon"]
+
+
+def test_format_version_change_rebuilds_the_snapshot(resources, monkeypatch, caplog):
+    _load(resources)
+    monkeypatch.setattr(catalog_snapshot, "SNAPSHOT_FORMAT_VERSION", catalog_snapshot.SNAPSHOT_FORMAT_VERSION + 1)
+    with caplog.at_level("INFO"):
+        assert _stored(resources) is None
+    assert "format changed" in caplog.text
+    assert _models(_load(resources)) == ["Astra", "Vectra"]
+    assert _stored(resources) is not None
+
+
+def test_unreadable_snapshot_is_rebuilt(resources):
+    _load(resources)
+    (resources.parent / "catalog.pickle").write_bytes(b"not a pickle")
+    assert _models(_load(resources)) == ["Astra", "Vectra"]
+    assert _stored(resources) is not None
@@ -0,0 +1,59 @@
+import pytest
+
+from app.pipelines.chunk_pipeline import run_chunk_pipeline
+from app.pipelines.progress import OperationCancelled, ProgressContext
+
+
+class _Reader:
+    """Chunk generator that records whether it was closed."""
+
+    def __init__(self, count: int) -> None:
+        self.closed = False
+        self._chunks = self._read(count)
+
+    def _read(self, count: int):
+        try:
+            yield from range(count)
+        finally:
+            self.closed = True
+
+    def __iter__(self):
+        return self._chunks
+
+    def close(self) -> None:
+        self._chunks.close()
+
+
+def test_chunks_are_written_in_read_order():
+    written = []
+    run_chunk_pipeline(iter(range(50)), lambda n: n * 2, written.append, depth=2, context=ProgressContext())
+    assert written == [n * 2 for n in range(50)]
+
+
+def test_failing_build_closes_the_reader():
+    reader = _Reader(1000)
+
+    def build(n: int) -> int:
+        if n == 3:
+            raise RuntimeError("build failed")
+        return n
+
+    with pytest.raises(RuntimeError, match="build failed"):
+        run_chunk_pipeline(reader, build, lambda n: None, depth=2, context=ProgressContext())
+    assert reader.closed
+
+
+def test_cancel_closes_the_reader():
+    reader = _Reader(1000)
+    context = ProgressContext()
+
+    def build(n: int) -> int:
+        # Builds check for cancellation as they report progress
+        context.check()
+        if n == 3:
+            context.cancel()
+        return n
+
+    with pytest.raises(OperationCancelled):
+        run_chunk_pipeline(reader, build, lambda n: None, depth=2, context=context)
+    assert reader.closed
@@ -0,0 +1,70 @@
+from dataclasses import replace
+import logging
+
+import pandas as pd
+import pytest
+
+from app.core.enums import ExcelColumns
+from app.pipelines import DataFrameProcessor, ExcelFilePipeline
+from app.settings import AppConfig
+from tests.samples import make_baseline, make_builder, synthetic_frame, write_sample
+
+ENGINES = ["row", "columnar"]
+
+
+@pytest.mark.parametrize("min_parallel_rows", [5000, 1])
+def test_workers_start_only_for_large_sheets(tmp_path, provider, caplog, min_parallel_rows):
+    src = write_sample(tmp_path / "in.xlsx", rows=400, blank_compat=100)
+    cfg = AppConfig(use_catalog_snapshot=False, processing_engine="columnar", output_format="csv")
+    log = logging.getLogger("test")
+    reference = ExcelFilePipeline(cfg, trip_provider=provider).run(src, log, output_path=tmp_path / "ref.csv")
+
+    parallel = replace(cfg, workers=2, min_parallel_rows=min_parallel_rows)
+    with caplog.at_level(logging.INFO, logger="test"):
+        result = ExcelFilePipeline(parallel, trip_provider=provider) \
+            .run(src, log, output_path=tmp_path / "out.csv")
+
+    sharded = min_parallel_rows == 1
+    assert result.report.caches_parent_only is sharded
+    assert ("min_parallel_rows" in caplog.text) is not sharded
+    assert result.frame.equals(reference.frame)
+
+
+@pytest.fixture(scope="module")
+def workload(provider) -> pd.DataFrame:
+    return synthetic_frame(provider, rows=150)
+
+
+def _edge_cases(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    compat = ExcelColumns.COMPATIBILITY.value
+    sparse = df.drop(columns=[
+        ExcelColumns.GROUP_CODE.value, ExcelColumns.GROUP_NAME.value, ExcelColumns.NEW_ARTICLE.value,
+        ExcelColumns.BRAND_CYRILLIC.value, ExcelColumns.BAS_CATEGORY.value,
+    ])
+    sparse.index = sparse.index * 3 + 7
+    sparse.loc[sparse.index[0], compat] = None
+    sparse["Дата"] = pd.Timestamp("2024-01-01")
+    unresolved = df.head(20).assign(**{compat: "Zzz, , Unknown 1"})
+    return {
+        "sparse": sparse,
+        "empty": df.iloc[:0],
+        "one_row": df.iloc[[5]],
+        "no_compatibility": df.drop(columns=[compat]),
+        "unresolved": unresolved,
+    }
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("include_record_type", [False, True])
+def test_engines_match_the_baseline_build(provider, workload, engine, include_record_type):
+    expected = make_baseline(provider, include_record_type).process(workload)
+    built = DataFrameProcessor(make_builder(provider, include_record_type), engine=engine).process(workload)
+    pd.testing.assert_frame_equal(built, expected, check_exact=True)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_match_the_baseline_on_edge_cases(provider, workload, engine):
+    processor = DataFrameProcessor(make_builder(provider), engine=engine)
+    baseline = make_baseline(provider)
+    for name, df in _edge_cases(workload).items():
+        pd.testing.assert_frame_equal(processor.process(df), baseline.process(df), check_exact=True, obj=name)
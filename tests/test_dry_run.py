@@ -0,0 +1,71 @@
+from collections import Counter
+from dataclasses import replace
+import logging
+
+import pandas as pd
+import pytest
+
+from app.core.enums import ExcelColumns
+from app.core.services.compat_utils import dedupe_models
+from app.pipelines import ExcelFilePipeline
+from app.settings import AppConfig
+from tests.samples import make_baseline, synthetic_frame
+
+LOG = logging.getLogger("test")
+
+
+@pytest.fixture(scope="module")
+def workload(provider) -> pd.DataFrame:
+    df = synthetic_frame(provider, rows=120, unresolved_ratio=0.3)
+    df.loc[:9, ExcelColumns.COMPATIBILITY.value] = None
+    return df
+
+
+def _write(df: pd.DataFrame, path):
+    df.to_excel(path, sheet_name=AppConfig.sheet_name, index=False)
+    return path
+
+
+@pytest.mark.parametrize("output_format", ["xlsx", "csv"])
+def test_dry_run_predicts_the_baseline_build(tmp_path, provider, workload, output_format):
+    src = _write(workload, tmp_path / "in.xlsx")
+    pipeline = ExcelFilePipeline(AppConfig(use_catalog_snapshot=False, output_format=output_format),
+                                 trip_provider=provider)
+    estimate = pipeline.dry_run(src, LOG, sample_rows=40)
+    result = pipeline.run(src, LOG, output_path=tmp_path / f"out{pipeline.output_suffix}")
+
+    baseline = make_baseline(provider)
+    built = baseline.process(pd.read_excel(src, sheet_name=AppConfig.sheet_name))
+    mirrors = built.index.value_counts().reindex(range(len(workload)), fill_value=0) - 1
+    unresolved = Counter(model for compat in workload[ExcelColumns.COMPATIBILITY.value].dropna()
+                         for model in dedupe_models(compat) if baseline.resolve(model) is None)
+
+    assert (estimate.rows_in, estimate.rows_out) == (len(workload), len(built)) == (len(workload), len(result.frame))
+    assert estimate.mirrors_per_row == dict(Counter(mirrors.tolist())) == result.report.mirrors_per_row
+    assert estimate.unresolved_entries == sum(unresolved.values()) == result.report.unresolved_entries
+    assert estimate.unresolved_distinct == len(unresolved)
+    assert estimate.compat_entries == result.report.compat_entries
+    assert set(estimate.unresolved_models) <= set(unresolved)
+    assert not estimate.exceeds_sheet_limit
+
+    # Size and time are scaled up from the first 40 rows, so only their magnitude is right
+    assert estimate.sample_rows == 40
+    assert 0.5 < estimate.est_output_bytes / result.output_path.stat().st_size < 2
+    assert estimate.est_seconds > 0
+
+
+def test_dry_run_without_a_sample_or_compatibility_column(tmp_path, provider, workload):
+    src = _write(workload.drop(columns=[ExcelColumns.COMPATIBILITY.value]), tmp_path / "in.xlsx")
+    pipeline = ExcelFilePipeline(AppConfig(use_catalog_snapshot=False), trip_provider=provider)
+    estimate = pipeline.dry_run(src, LOG, sample_rows=0)
+    assert (estimate.rows_out, estimate.compat_entries, estimate.mirrors_per_row) == (len(workload), 0, {0: 120})
+    assert (estimate.sample_rows, estimate.est_output_bytes, estimate.est_seconds) == (0, None, None)
+
+
+def test_dry_run_flags_outputs_over_one_sheet(tmp_path, provider, workload, monkeypatch):
+    src = _write(workload, tmp_path / "in.xlsx")
+    monkeypatch.setattr("app.pipelines.excel_file_pipeline.DEFAULT_PART_ROWS", 100)
+    cfg = AppConfig(use_catalog_snapshot=False)
+    assert ExcelFilePipeline(cfg, trip_provider=provider).dry_run(src, LOG, sample_rows=0).exceeds_sheet_limit
+    csv = replace(cfg, output_format="csv")
+    assert not ExcelFilePipeline(csv, trip_provider=provider).dry_run(src, LOG, sample_rows=0).exceeds_sheet_limit
@@ -0,0 +1,28 @@
+import pickle
+
+from app.utils import ProcessLocalCaches
+
+
+class _Squares(ProcessLocalCaches):
+    _local_caches = {"square": ("_square", "_size")}
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self.calls = 0
+        self._reset_local_caches()
+
+    def _square(self, value: int) -> int:
+        self.calls += 1
+        return value * value
+
+
+def test_process_local_caches_are_not_pickled():
+    squares = _Squares(size=2)
+    assert [squares.square(3), squares.square(3)] == [9, 9]
+    assert squares.calls == 1
+
+    copy = pickle.loads(pickle.dumps(squares))
+    assert copy.square.cache_info().currsize == 0
+    assert copy.square.cache_info().maxsize == 2
+    assert copy.square(3) == 9 and copy.calls == 2
+    assert squares.square.cache_info().currsize == 1
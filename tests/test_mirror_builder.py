@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from app.core.enums import ExcelColumns
+from app.core.services.compat_utils import dedupe_models
+from app.pipelines import DataFrameProcessor
+from tests.samples import make_baseline, make_builder, synthetic_frame
+
+
+@pytest.fixture(scope="module")
+def shared_compat(provider) -> pd.DataFrame:
+    """Rows repeating compatibility lists under other source pairs, the list's own pair among them."""
+    df = synthetic_frame(provider, rows=60, repeat_ratio=0.5)
+    baseline = make_baseline(provider)
+    compat = ExcelColumns.COMPATIBILITY.value
+    variants = []
+    for _, row in df.dropna(subset=[compat]).head(15).iterrows():
+        trips = [trip for trip in map(baseline.resolve, dedupe_models(row[compat])) if trip]
+        if not trips:
+            continue
+        for brand, model in ((f" {trips[0]['en']['brand'].upper()}", f"{trips[0]['en']['model'].lower()} "),
+                             (row[ExcelColumns.BRAND.value], row[ExcelColumns.MODEL.value])):
+            variant = df.iloc[(len(variants) * 7) % len(df)].copy()
+            variant[[ExcelColumns.BRAND.value, ExcelColumns.MODEL.value, compat]] = [brand, model, row[compat]]
+            variants.append(variant)
+    return pd.concat([df, pd.DataFrame(variants)], ignore_index=True)
+
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+@pytest.mark.parametrize("plan_cache_size", [4096, 1])
+def test_cached_plans_match_the_baseline(provider, shared_compat, engine, plan_cache_size):
+    builder = make_builder(provider, plan_cache_size=plan_cache_size)
+    built = DataFrameProcessor(builder, engine=engine).process(shared_compat)
+    pd.testing.assert_frame_equal(built, make_baseline(provider).process(shared_compat), check_exact=True)
+
+    info = builder.plan_cache_info()
+    assert info.hits > 0 if plan_cache_size > 1 else info.currsize == 1
+
+
+def test_plan_skips_the_source_pair_however_it_is_spelled(provider, shared_compat):
+    builder = make_builder(provider)
+    for _, row in shared_compat.iterrows():
+        brand, model = row[ExcelColumns.BRAND.value], row[ExcelColumns.MODEL.value]
+        plan = builder.mirror_plan(brand, model, row[ExcelColumns.COMPATIBILITY.value])
+        assert all((t.trip["en"]["brand"].lower(), t.trip["en"]["model"].lower())
+                   != (str(brand).strip().lower(), str(model).strip().lower()) for t in plan)
+        assert plan == builder.mirror_plan(f" {str(brand).upper()}", str(model).lower(),
+                                           row[ExcelColumns.COMPATIBILITY.value])
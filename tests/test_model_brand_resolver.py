@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def resolver(provider):
+    return provider.build_resolver(provider.load_triplets())
+
+
+@pytest.fixture(scope="module")
+def typo(resolver):
+    """A catalog model with one letter changed that only the fuzzy match resolves."""
+    fuzzy = resolver.with_fuzzy_distance(1)
+    for trip in resolver.triplets:
+        model = trip["en"]["model"]
+        if len(model) >= 8 and model[-1].isalpha():
+            changed = model[:-1] + ("q" if model[-1].lower() != "q" else "z")
+            if resolver.resolve(changed, allow_base_fallback=False) is None \
+                    and fuzzy.resolve(changed, allow_base_fallback=False) is not None:
+                return changed
+    pytest.skip("no suitable catalog model")
+
+
+def test_fuzzy_views_leave_the_shared_resolver_alone(resolver, typo):
+    fuzzy = resolver.with_fuzzy_distance(1)
+    exact = resolver.with_fuzzy_distance(0)
+    assert fuzzy.resolve(typo, allow_base_fallback=False) is not None
+    assert exact.resolve(typo, allow_base_fallback=False) is None
+    assert resolver.resolve(typo, allow_base_fallback=False) is None
+    assert fuzzy.fuzzy_info().misses == 1 and exact.fuzzy_info().misses == 0
+
+
+def test_concurrent_views_keep_their_distance(resolver, typo):
+    def resolve(distance: int) -> bool:
+        view = resolver.with_fuzzy_distance(distance)
+        return all((view.resolve(typo, allow_base_fallback=False) is not None) == bool(distance) for _ in range(200))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert all(pool.map(resolve, [0, 1] * 20))
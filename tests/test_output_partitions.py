@@ -0,0 +1,92 @@
+from dataclasses import replace
+import json
+import logging
+
+import pandas as pd
+import pytest
+
+from app.core.enums import ExcelColumns, OutputSplits
+from app.pipelines import ExcelFilePipeline
+from app.pipelines.output_partitions import MANIFEST_NAME, split_frame
+from app.settings import AppConfig
+from tests.samples import make_baseline, write_sample, write_workload
+
+
+def _manifest_files(directory) -> list[str]:
+    manifest = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+    return [part["file"] for part in manifest["parts"]]
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_second_split_run_replaces_the_parts_of_the_first(tmp_path, provider, streamed):
+    src = write_sample(tmp_path / "in.xlsx", rows=5, blank_compat=0)
+    out = tmp_path / "out" / "in_processed.xlsx"
+    out.parent.mkdir()
+    (out.parent / "in_processed").mkdir()
+    (out.parent / "in_processed" / "notes.txt").write_text("kept")
+    cfg = replace(AppConfig(use_catalog_snapshot=False), excel_chunk_rows=2 if streamed else 0)
+    log = logging.getLogger("test")
+
+    ExcelFilePipeline(replace(cfg, output_split="rows", output_part_rows=3), trip_provider=provider).run(src, log, output_path=out)
+    result = ExcelFilePipeline(replace(cfg, output_split="brand"), trip_provider=provider).run(src, log, output_path=out)
+
+    parts_dir = result.output_path.parent
+    assert sorted(path.name for path in parts_dir.iterdir()) == sorted(
+        [*_manifest_files(parts_dir), MANIFEST_NAME, "notes.txt"]
+    )
+    assert [path.name for path in result.parts] == _manifest_files(parts_dir)
+
+
+def test_split_frame_keeps_brand_order_and_limits_rows():
+    df = pd.DataFrame({"Марка": ["B", "A", "B", None, "B"], "n": range(5)})
+    parts = split_frame(df, OutputSplits.BRAND, max_rows=2)
+    assert [(brand, rows["n"].tolist()) for brand, rows in parts] == [
+        ("B", [0, 2]), ("B", [4]), ("A", [1]), ("", [3]),
+    ]
+    assert [rows["n"].tolist() for _, rows in split_frame(df, OutputSplits.ROWS, max_rows=2)] == [[0, 1], [2, 3], [4]]
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory, provider):
+    return write_workload(provider, tmp_path_factory.mktemp("workload") / "in.xlsx", rows=120)
+
+
+def _brand_order(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` with the rows of every brand together, brands in the order they first appear."""
+    keys = df[ExcelColumns.BRAND.value].fillna("").astype(str).str.strip()
+    first = {key: i for i, key in reversed(list(enumerate(keys)))}
+    return df.iloc[sorted(range(len(df)), key=lambda i: first[keys.iloc[i]])].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("split", ["rows", "brand"])
+@pytest.mark.parametrize("mode", [
+    {},
+    {"output_writers": 2},
+    {"excel_chunk_rows": 25},
+    {"excel_chunk_rows": 25, "pipeline_depth": 2},
+])
+def test_parts_and_manifest_match_the_baseline(tmp_path, provider, workbook, split, mode):
+    expected = make_baseline(provider).process(pd.read_excel(workbook, sheet_name=AppConfig.sheet_name))
+    expected_path = tmp_path / "expected.xlsx"
+    expected.to_excel(expected_path, index=False)
+    expected = pd.read_excel(expected_path, dtype=str)
+    if split == "brand":
+        expected = _brand_order(expected)
+
+    cfg = replace(AppConfig(use_catalog_snapshot=False), output_split=split, output_part_rows=100, **mode)
+    result = ExcelFilePipeline(cfg, trip_provider=provider) \
+        .run(workbook, logging.getLogger("test"), output_path=tmp_path / "in_processed.xlsx")
+
+    parts_dir = result.output_path.parent
+    manifest = json.loads((parts_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert (manifest["split"], manifest["rows"]) == (split, len(expected))
+    assert [part["file"] for part in manifest["parts"]] == [path.name for path in result.parts]
+
+    frames = [pd.read_excel(parts_dir / part["file"], dtype=str) for part in manifest["parts"]]
+    for part, frame in zip(manifest["parts"], frames):
+        assert part["rows"] == len(frame) <= 100
+        if split == "brand":
+            assert set(frame[ExcelColumns.BRAND.value].fillna("").astype(str).str.strip()) == {part["brand"]}
+        else:
+            assert part["brand"] is None
+    pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True), expected)
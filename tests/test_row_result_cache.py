@@ -0,0 +1,84 @@
+import time
+
+import pandas as pd
+import pytest
+
+from app.adapters.row_cache import SqliteRowCache
+from app.core.enums import ExcelColumns
+from app.pipelines import DataFrameProcessor
+from app.pipelines.row_result_cache import RowResultCache, catalog_version
+from tests.samples import make_baseline, make_builder, synthetic_frame
+
+
+@pytest.fixture(scope="module")
+def workload(provider) -> pd.DataFrame:
+    return synthetic_frame(provider, rows=80)
+
+
+def _cache(provider, path, include_record_type: bool = False, max_bytes: int = 2 ** 26) -> RowResultCache:
+    triplets = provider.load_triplets()
+    version = catalog_version(triplets, provider.load_filtered_groups())
+    return RowResultCache(SqliteRowCache(path, max_bytes), version, include_record_type)
+
+
+def _run(provider, cache: RowResultCache, df: pd.DataFrame, engine: str = "row",
+         include_record_type: bool = False) -> pd.DataFrame:
+    cache.hits = cache.misses = 0
+    builder = make_builder(provider, include_record_type)
+    result = DataFrameProcessor(builder, engine=engine, row_cache=cache).process(df)
+    pd.testing.assert_frame_equal(result, make_baseline(provider, include_record_type).process(df), check_exact=True)
+    return result
+
+
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+@pytest.mark.parametrize("include_record_type", [False, True])
+def test_cached_rows_reassemble_like_a_full_build(provider, workload, tmp_path, engine, include_record_type):
+    cache = _cache(provider, tmp_path / "rows.sqlite3", include_record_type)
+    _run(provider, cache, workload, engine, include_record_type)
+    assert (cache.hits, cache.misses) == (0, len(workload))
+
+    _run(provider, cache, workload, engine, include_record_type)
+    assert (cache.hits, cache.misses) == (len(workload), 0)
+
+    # Reordered rows, some edited, under another index
+    edited = workload.sample(frac=1, random_state=1)
+    edited.iloc[:10, edited.columns.get_loc(ExcelColumns.COMPATIBILITY.value)] = "Zzz"
+    edited.index = range(1000, 1000 + len(edited))
+    _run(provider, cache, edited, engine, include_record_type)
+    assert (cache.hits, cache.misses) == (len(workload) - 10, 10)
+
+
+def test_group_columns_added_by_the_build_come_back_in_order(provider, workload, tmp_path):
+    df = workload.drop(columns=[ExcelColumns.GROUP_CODE.value, ExcelColumns.GROUP_NAME.value])
+    cache = _cache(provider, tmp_path / "rows.sqlite3")
+    _run(provider, cache, df.iloc[40:])
+    # Only some rows come from the cache; rows without mirrors add no columns of their own
+    _run(provider, cache, df)
+    assert cache.hits == len(df) - 40
+
+
+def test_builder_options_use_their_own_entries(provider, workload, tmp_path):
+    path = tmp_path / "rows.sqlite3"
+    _run(provider, _cache(provider, path), workload)
+    cache = _cache(provider, path, include_record_type=True)
+    _run(provider, cache, workload, include_record_type=True)
+    assert cache.hits == 0
+
+
+def test_eviction_drops_the_least_recently_used_rows(provider, workload, tmp_path):
+    path = tmp_path / "rows.sqlite3"
+    cache = _cache(provider, path)
+    _run(provider, cache, workload.iloc[:60])
+    time.sleep(0.01)
+    _run(provider, cache, workload.iloc[60:])
+    size = cache.stats().size
+    cache.close()
+
+    small = _cache(provider, path, max_bytes=size * 3 // 4)
+    evicted = small.evict()
+    assert evicted > 0 and small.stats().size <= small.stats().maxsize
+    assert len(small.lookup(small.row_keys(workload.iloc[60:]))) == 20
+    assert len(small.lookup(small.row_keys(workload.iloc[:60]))) == 60 - evicted
+
+    _run(provider, small, workload)
+    assert (small.hits, small.misses) == (len(workload) - evicted, evicted)
@@ -0,0 +1,131 @@
+import random
+
+import pandas as pd
+import pytest
+
+from app.core.dataclasses import TripIndex, Triplets
+from app.core.enums import ExcelColumns
+from app.core.services import RowTransformer
+from app.settings import ALLOWED_LANGUAGES, BRAND_MODEL_COLUMNS
+from app.utils.finder import build_trip_index
+from tests.baseline import BaselineBuilder
+from tests.samples import make_baseline, synthetic_frame
+
+
+@pytest.fixture(scope="module")
+def cases(provider) -> list[tuple[pd.Series, str, str, dict]]:
+    """Rows with their own or another row's source pair, each towards several destinations."""
+    rnd = random.Random(7)
+    rows = [row for _, row in synthetic_frame(provider, rows=40, repeat_ratio=0.5).iterrows()]
+    trips = provider.load_triplets().raw
+    cases = []
+    for row in rows:
+        source = row if rnd.random() < 0.8 else rnd.choice(rows)
+        brand, model = source[ExcelColumns.BRAND.value], source[ExcelColumns.MODEL.value]
+        for dst in [None, *rnd.sample(trips, 3)]:
+            cases.append((row, brand, model, dst))
+    rnd.shuffle(cases)
+    return cases
+
+
+def _transformer(provider, **kwargs) -> RowTransformer:
+    triplets = provider.load_triplets()
+    return RowTransformer(trip_index=provider.build_index(triplets), triplets=triplets, **kwargs)
+
+
+@pytest.mark.parametrize("memo_size", [16384, 1])
+def test_memoized_cells_match_the_baseline(provider, cases, memo_size):
+    transformer = _transformer(provider, memo_size=memo_size)
+    baseline = make_baseline(provider)
+    for _ in range(2):
+        for row, brand, model, dst in cases:
+            expected = baseline.apply_all(row.copy(), brand, model, dst)
+            pd.testing.assert_series_equal(transformer.apply_all(row.copy(), src_brand=brand, src_model=model,
+                                                                 dst_pair=dst), expected)
+
+    info = transformer.memo_info()
+    assert info.size <= memo_size
+    assert info.hits > 0 if memo_size > 1 else info.evictions > 0
+
+
+def test_memo_keys_keep_destinations_apart(provider):
+    transformer = _transformer(provider)
+    trips = provider.load_triplets().raw
+    src, first = trips[0], trips[1]
+    rebranded = {**first, "en": {"brand": "Rebranded", "model": first["en"]["model"]}}
+    text = f"Реле {src['en']['brand']} {src['en']['model']}"
+    replaced = [
+        transformer.replace_brand_model_text(text, src_trip=src, dst_pair=dst, dst_lang="en")
+        for dst in (first, rebranded, first)
+    ]
+    assert replaced[0] == f"Реле {first['en']['brand']} {first['en']['model']}"
+    assert replaced[1] == f"Реле Rebranded {first['en']['model']}"
+    assert replaced[2] == replaced[0]
+    assert transformer.memo_info().hits == 1
+
+
+def _keyword_cells(rnd: random.Random, src: dict, other: dict) -> list:
+    models = [src[lang]["model"] for lang in ("en", "ru", "ua")] + [other["en"]["model"], other["ru"]["model"]]
+    cells = [None, float("nan"), "", " , ,", 12345]
+    for _ in range(8):
+        parts = []
+        for _ in range(rnd.randint(1, 120)):
+            model = rnd.choice(models)
+            model = rnd.choice([model, model.upper(), model.lower()])
+            parts.append(rnd.choice([f"реле {model}", f"sensor {model} 2", model, f"{model}x", f"WL{rnd.randint(0, 99)}"]))
+        cells.append(rnd.choice([", ", ",", " ,  "]).join(parts))
+    return cells
+
+
+def test_keyword_cells_match_the_baseline(provider):
+    rnd = random.Random(11)
+    trips = provider.load_triplets().raw
+    transformer = _transformer(provider)
+    baseline = make_baseline(provider)
+    columns = [ExcelColumns.KEYWORDS_RU.value, ExcelColumns.KEYWORDS_UA.value]
+
+    rows, sources, destinations = [], [], []
+    for src in rnd.sample(trips, 15):
+        for raw in _keyword_cells(rnd, src, rnd.choice(trips)):
+            rows.append(pd.Series([raw, raw], index=columns, dtype=object))
+            sources.append(src)
+            destinations.append(rnd.choice([None, rnd.choice(trips)]))
+
+    expected = [baseline.apply_all(row.copy(), src["en"]["brand"], src["en"]["model"], dst)
+                for row, src, dst in zip(rows, sources, destinations)]
+    for row, src, dst, want in zip(rows, sources, destinations, expected):
+        got = transformer.apply_all(row.copy(), src_brand=src["en"]["brand"], src_model=src["en"]["model"], dst_pair=dst)
+        pd.testing.assert_series_equal(got, want)
+
+    # The column-wise path normalizes repeated cells once per call
+    values = {column: pd.DataFrame(rows)[column].to_numpy(dtype=object) for column in columns}
+    src_trips = [baseline.source_trip(src["en"]["brand"], src["en"]["model"]) for src in sources]
+    transformer.apply_all_columns(values, src_trips=src_trips, dst_pairs=destinations)
+    pd.testing.assert_frame_equal(pd.DataFrame(values), pd.DataFrame(expected).reset_index(drop=True))
+
+
+def test_prefiltered_cells_match_the_baseline():
+    names = [("Opel", "Astra H"), ("Opel", "Astra"), ("BMW", "1 E81"), ("Хонда", "CR-V"), ("Kia", "Pıcanto"),
+             ("Kia", "Rio"), ("Seat", "Leon"),
+             ("Citroën", "C4"), ("Audi", "A4"), ("Audi", "А4 Allroad")]
+    raw = [{lang: {"brand": brand, "model": model} for lang in ALLOWED_LANGUAGES} for brand, model in names]
+    triplets = Triplets(raw=raw)
+    transformer = RowTransformer(trip_index=TripIndex(build_trip_index(raw), triplets.catalog), triplets=triplets)
+    baseline = BaselineBuilder(raw)
+
+    mentions = [f"{brand} {model}" for brand, model in names] + [f"{model}-{brand}" for brand, model in names]
+    cells = [f"Реле {mention} 12V" for mention in mentions] + [
+        "Реле без марки", "OPEL ASTRA h", "ОреІ Аstra", "Astra, Pıcanto, a4, C4 Opel", "Kİa Picanto", "KİA Rio", "ſeat Leon", "",
+    ]
+    columns = [column for column, _ in BRAND_MODEL_COLUMNS] + [ExcelColumns.KEYWORDS_RU.value]
+    for brand, model in names:
+        for dst in [None, *raw]:
+            for cell in cells:
+                row = pd.Series([cell] * len(columns), index=columns, dtype=object)
+                expected = baseline.apply_all(row.copy(), brand, model, dst)
+                got = transformer.apply_all(row.copy(), src_brand=brand, src_model=model, dst_pair=dst)
+                pd.testing.assert_series_equal(got, expected)
+
+    info = transformer.fast_path_info()
+    assert 0 < info.brand_model_skipped < info.brand_model_cells
+    assert 0 < info.keyword_skipped < info.keyword_cells
@@ -0,0 +1,84 @@
+from dataclasses import replace
+import logging
+from typing import Optional
+
+import pandas as pd
+import pytest
+
+from app.core.enums import ExcelColumns
+from app.core.services import MirrorBuilder, RowTransformer
+from app.core.services.compat_utils import dedupe_models
+from app.pipelines import ExcelFilePipeline
+from app.pipelines.run_report import RunMetrics
+from app.settings import AppConfig
+from tests.samples import SAMPLE, write_sample
+
+RUN_MODES = [
+    {},
+    {"processing_engine": "columnar"},
+    {"excel_chunk_rows": 2},
+    {"excel_chunk_rows": 2, "pipeline_depth": 2},
+]
+
+
+def _resolved_models(text: str) -> list[tuple[str, Optional[int]]]:
+    return [(model, 0 if model == "A" else None) for model in dedupe_models(text)]
+
+
+def test_record_rows_without_compatibility_values():
+    metrics = RunMetrics()
+    blank = pd.DataFrame({ExcelColumns.COMPATIBILITY.value: [None, float("nan")]})
+    metrics.record_rows(blank, blank, _resolved_models)
+    empty = pd.DataFrame({ExcelColumns.COMPATIBILITY.value: pd.Series([], dtype=object)})
+    metrics.record_rows(empty, empty, _resolved_models)
+    assert (metrics.rows_in, metrics.compat_entries, metrics.unresolved_entries) == (2, 0, 0)
+
+
+def test_record_rows_counts_deduped_entries():
+    metrics = RunMetrics()
+    df = pd.DataFrame({ExcelColumns.COMPATIBILITY.value: ["A, B, A", " , C", None]})
+    metrics.record_rows(df, df, _resolved_models)
+    assert metrics.compat_entries == 3
+    assert metrics.unresolved_entries == 2
+    assert dict(metrics.unresolved_models) == {"B": 1, "C": 1}
+
+
+def test_counting_entries_reuses_the_mirror_plans(provider):
+    triplets = provider.load_triplets()
+    trip_index = provider.build_index(triplets)
+    resolver = provider.build_resolver(triplets).with_fuzzy_distance(1)
+    builder = MirrorBuilder(RowTransformer(trip_index=trip_index, triplets=triplets), trip_index, resolver)
+    df = pd.read_excel(SAMPLE, sheet_name=AppConfig.sheet_name)
+    built = builder.build_frame(df)
+    fuzzy_before = resolver.fuzzy_info()
+
+    calls = []
+    resolve_id = resolver.resolve_id
+    resolver.resolve_id = lambda *args, **kwargs: calls.append(args) or resolve_id(*args, **kwargs)
+    metrics = RunMetrics()
+    metrics.record_rows(df, built, builder.resolved_models)
+    assert calls == []
+    assert resolver.fuzzy_info() == fuzzy_before
+    assert metrics.compat_entries == len(dedupe_models(df[ExcelColumns.COMPATIBILITY.value].iloc[0]))
+
+
+@pytest.mark.parametrize("mode", RUN_MODES)
+def test_run_with_empty_compatibility_column(tmp_path, provider, mode):
+    src = write_sample(tmp_path / "blank.xlsx", rows=1, blank_compat=1)
+    cfg = replace(AppConfig(use_catalog_snapshot=False), **mode)
+    result = ExcelFilePipeline(cfg, trip_provider=provider).run(src, logging.getLogger("test"), output_path=tmp_path / "out.xlsx")
+    assert result.report.rows_in == 1
+    assert result.report.compat_entries == 0
+    assert not result.report.caches_parent_only
+
+
+@pytest.mark.parametrize("mode", RUN_MODES)
+def test_run_with_chunk_without_compatibility(tmp_path, provider, mode):
+    src = write_sample(tmp_path / "chunk.xlsx", rows=5, blank_compat=2)
+    cfg = replace(AppConfig(use_catalog_snapshot=False), **mode)
+    result = ExcelFilePipeline(cfg, trip_provider=provider).run(src, logging.getLogger("test"), output_path=tmp_path / "out.xlsx")
+    reference = ExcelFilePipeline(AppConfig(use_catalog_snapshot=False), trip_provider=provider).run(
+        src, logging.getLogger("test"), output_path=tmp_path / "ref.xlsx",
+    )
+    assert result.report.rows_out == reference.report.rows_out
+    assert result.report.compat_entries == reference.report.compat_entries
@@ -0,0 +1,68 @@
+from dataclasses import replace
+import logging
+
+import pandas as pd
+import pytest
+
+from app.core.enums import ExcelColumns
+from app.pipelines import ExcelFilePipeline
+from app.settings import AppConfig
+from tests.samples import make_baseline, write_sample, write_workload
+
+# Columns the build adds when the input lacks them
+ADDED = [
+    ExcelColumns.NEW_ARTICLE.value,
+    ExcelColumns.GROUP_NAME.value,
+    ExcelColumns.GROUP_CODE.value,
+    ExcelColumns.BRAND_CYRILLIC.value,
+    ExcelColumns.MODEL_CYRILLIC.value,
+    ExcelColumns.BRAND_CYRILLIC_UA.value,
+    ExcelColumns.MODEL_CYRILLIC_UA.value,
+]
+
+
+def _output(result) -> pd.DataFrame:
+    paths = result.parts or (result.output_path,)
+    return pd.concat([pd.read_excel(path, dtype=str) for path in paths], ignore_index=True)
+
+
+@pytest.mark.parametrize("include_record_type", [False, True])
+@pytest.mark.parametrize("blank_compat", [0, 3, 5])
+def test_streamed_header_matches_in_memory(tmp_path, provider, include_record_type, blank_compat):
+    src = write_sample(tmp_path / "in.xlsx", rows=5, blank_compat=blank_compat, drop=ADDED)
+    log = logging.getLogger("test")
+    cfg = AppConfig(use_catalog_snapshot=False)
+    reference = _output(
+        ExcelFilePipeline(cfg, trip_provider=provider, include_record_type=include_record_type)
+        .run(src, log, output_path=tmp_path / "ref.xlsx")
+    )
+    for mode in ({"excel_chunk_rows": 2}, {"excel_chunk_rows": 2, "output_split": "rows", "output_part_rows": 4}):
+        result = ExcelFilePipeline(replace(cfg, **mode), trip_provider=provider, include_record_type=include_record_type) \
+            .run(src, log, output_path=tmp_path / "out.xlsx")
+        pd.testing.assert_frame_equal(_output(result), reference)
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory, provider):
+    return write_workload(provider, tmp_path_factory.mktemp("workload") / "in.xlsx", rows=120)
+
+
+def _read(path) -> pd.DataFrame:
+    if path.suffix == ".csv":
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+@pytest.mark.parametrize("output_format", ["xlsx", "xlsxwriter", "csv"])
+def test_pipelined_output_matches_the_baseline(tmp_path, provider, workbook, output_format):
+    baseline = make_baseline(provider).process(pd.read_excel(workbook, sheet_name=AppConfig.sheet_name))
+    expected_path = tmp_path / "expected.xlsx"
+    baseline.to_excel(expected_path, index=False)
+    expected = pd.read_excel(expected_path)
+
+    log = logging.getLogger("test")
+    cfg = AppConfig(use_catalog_snapshot=False, output_format=output_format, excel_chunk_rows=25)
+    for depth in (0, 1, 3):
+        pipeline = ExcelFilePipeline(replace(cfg, pipeline_depth=depth), trip_provider=provider)
+        result = pipeline.run(workbook, log, output_path=tmp_path / f"out{depth}{pipeline.output_suffix}")
+        pd.testing.assert_frame_equal(_read(result.output_path), expected, obj=f"pipeline_depth={depth}")
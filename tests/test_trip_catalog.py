@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+
+from app.settings import ALLOWED_LANGUAGES
+from tests.samples import make_baseline
+
+
+@pytest.fixture(scope="module")
+def triplets(provider):
+    return provider.load_triplets()
+
+
+@pytest.fixture(scope="module")
+def baseline(provider):
+    return make_baseline(provider)
+
+
+def test_index_ids_point_at_the_baseline_triplets(provider, triplets, baseline):
+    index = provider.build_index(triplets)
+    assert set(index.raw) == set(baseline.pairs)
+    for (brand, model), trip in baseline.pairs.items():
+        assert index.get_pair(brand.upper(), model) is trip
+        assert triplets.catalog.trips[index.get_pair_id(brand, model)] is trip
+
+
+def test_resolved_ids_match_the_baseline_resolver(provider, triplets, baseline):
+    resolver = provider.build_resolver(triplets)
+    brands = sorted({trip["en"]["brand"] for trip in triplets.raw})
+    names = {trip[lang]["model"] for trip in triplets.raw for lang in ALLOWED_LANGUAGES}
+    queries = sorted(names | {f"  {name.upper()} " for name in names} | {f"{name} Restyling" for name in names})
+    for query in [*queries, "", "  ", "Zzz", "1"]:
+        for prefer_brand in (None, brands[len(query) % len(brands)], "Opel"):
+            for fallback in (False, True):
+                expected = baseline.resolver.resolve(query, prefer_brand, allow_base_fallback=fallback)
+                trip_id = resolver.resolve_id(query, prefer_brand, allow_base_fallback=fallback)
+                assert (None if trip_id is None else resolver.triplets[trip_id]) is expected, (query, prefer_brand)
+
+
+def test_pair_classes_group_triplets_with_equal_values(triplets):
+    catalog = triplets.catalog
+    first: dict[tuple, int] = {}
+    for trip_id, trip in enumerate(triplets.raw):
+        values = tuple((trip[lang]["brand"], trip[lang]["model"]) for lang in ALLOWED_LANGUAGES)
+        assert catalog.pair_class[trip_id] == first.setdefault(values, trip_id)
+        assert catalog.models[trip_id] == tuple(model for _, model in values)
+        assert catalog.id_of(trip) == trip_id
+    assert catalog.id_of(dict(triplets.raw[0])) is None
+
+
+def test_catalog_ids_survive_pickling(triplets):
+    copy = pickle.loads(pickle.dumps(triplets))
+    assert copy.raw == triplets.raw
+    assert all(copy.catalog.id_of(trip) == trip_id for trip_id, trip in enumerate(copy.raw))
+    assert copy.catalog.pair_class == triplets.catalog.pair_class
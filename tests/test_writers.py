@@ -0,0 +1,55 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from app.adapters.excel import ParquetChunkWriter, XlsxwriterChunkWriter
+from app.adapters.excel.openpyxl_stream import OpenpyxlChunkWriter
+from app.core.enums import ExcelColumns
+
+ARTICLE = ExcelColumns.ARTICLE.value
+
+
+def test_parquet_text_columns_do_not_follow_the_first_chunk(tmp_path):
+    path = tmp_path / "out.parquet"
+    with ParquetChunkWriter(str(path), columns=[ARTICLE, "note", "qty"]) as writer:
+        writer.append(pd.DataFrame({ARTICLE: [101, 102], "note": [None, None], "qty": [1, 2]}))
+        writer.append(pd.DataFrame({ARTICLE: ["A-7", None], "note": ["late", None], "qty": [3, None]}))
+        writer.append(pd.DataFrame({ARTICLE: [103.0, None], "note": [None, None], "qty": [4, 5]}))
+
+    table = pq.read_table(path)
+    assert [str(field.type) for field in table.schema] == ["string", "string", "int64"]
+    assert table.column(ARTICLE).to_pylist() == ["101", "102", "A-7", None, "103", None]
+    assert table.column("note").to_pylist() == [None, None, "late", None, None, None]
+    assert table.column("qty").to_pylist() == [1, 2, 3, None, 4, 5]
+
+
+def test_parquet_value_outside_the_schema_removes_the_file(tmp_path):
+    path = tmp_path / "out.parquet"
+    with pytest.raises(ValueError, match="'qty'"):
+        with ParquetChunkWriter(str(path), columns=["qty"]) as writer:
+            writer.append(pd.DataFrame({"qty": [1, 2]}))
+            writer.append(pd.DataFrame({"qty": ["many"]}))
+    assert not path.exists()
+
+
+def test_parquet_append_leaves_the_input_frame_alone(tmp_path):
+    df = pd.DataFrame({0: [1, 2], 1: ["a", "b"]})
+    with ParquetChunkWriter(str(tmp_path / "out.parquet")) as writer:
+        writer.append(df)
+    assert list(df.columns) == [0, 1]
+    assert pq.read_table(tmp_path / "out.parquet").column_names == ["0", "1"]
+
+
+@pytest.mark.parametrize("writer_class", [OpenpyxlChunkWriter, XlsxwriterChunkWriter])
+def test_excel_writers_leave_only_the_finished_file(tmp_path, writer_class):
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    with writer_class(str(tmp_path / "out.xlsx"), "Sheet") as writer:
+        writer.append(df)
+    assert [path.name for path in tmp_path.iterdir()] == ["out.xlsx"]
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "out.xlsx"), df)
+
+    with pytest.raises(RuntimeError):
+        with writer_class(str(tmp_path / "failed.xlsx"), "Sheet") as writer:
+            writer.append(df)
+            raise RuntimeError("write failed")
+    assert [path.name for path in tmp_path.iterdir()] == ["out.xlsx"]